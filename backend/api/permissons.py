@@ -12,7 +12,7 @@ class IsOwnerAdminOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        return bool(obj.owner == request.user or request.user.is_staff)
+        return bool(obj.owner_id == request.user.pk or request.user.is_staff)
 
 
 class IsOwnerOrAdmin(BasePermission):
@@ -20,4 +20,4 @@ class IsOwnerOrAdmin(BasePermission):
         return bool(request.user and request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
-        return bool(obj.owner == request.user or request.user.is_staff)
+        return bool(obj.owner_id == request.user.pk or request.user.is_staff)
@@ -9,7 +9,7 @@ from links.models import ShortLink, UserGroup
 
 from .validators import AliasCodeValidator
 from .services.links_file import check_request_fields, check_user_groups_amount
-from .services.short_links import validate_alias, validate_group_for_link
+from .services.short_links import validate_group_for_link
 
 
 class UserGroupReadSerializer(serializers.ModelSerializer):
@@ -81,8 +81,8 @@ class ShortLinkWriteSerializer(serializers.ModelSerializer):
         """Валидация данных"""
         user = self.context.get("request").user
 
-        data_valid_alias = validate_alias(data)
-        return validate_group_for_link(data_valid_alias, user)
+        # Занятость alias проверяется при вставке ссылки (alias_error)
+        return validate_group_for_link(data, user)
 
     def to_representation(self, instance):
         return ShortLinkReadSerializer(instance).data
@@ -112,17 +112,22 @@ class ShortLinkEditSerializer(serializers.Serializer):
         """Изменение группы и статуса ссылки"""
         active_status = validated_data.pop("is_active", None)
         group = validated_data.pop("group", None)
+        update_fields = []
 
         if (
             isinstance(active_status, bool)
             and instance.is_active != active_status
         ):
             instance.is_active = active_status
+            update_fields.append("is_active")
 
         if group and instance.group != group:
             instance.group = group
+            update_fields.append("group")
 
-        instance.save()
+        # Только изменённые поля: счётчик и время клика не перезаписываются
+        if update_fields:
+            instance.save(update_fields=update_fields)
 
         return instance
 
@@ -177,3 +182,20 @@ class LinksExportWriteSerializer(serializers.Serializer):
         check_request_fields(attrs)
 
         return attrs
+
+
+class AliasCheckSerializer(serializers.Serializer):
+    """Сериализатор для проверки занятости alias"""
+
+    aliases = serializers.ListField(
+        child=serializers.CharField(
+            max_length=Limits.MAX_LEN_LINK_SHORT_CODE,
+            allow_blank=False,
+        ),
+        allow_empty=False,
+        max_length=Limits.MAX_ALIASES_CHECK_AMOUNT,
+        help_text=_("Проверяемые пользовательские коды ссылок"),
+    )
+
+    class Meta:
+        write_only = True
@@ -1,18 +1,15 @@
+from django.db import DatabaseError
+from rest_framework import status
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import APIException
 from rest_framework.validators import ValidationError
 
+from core.enums import Limits
 from links.models import ShortLink
-
-
-def validate_alias(data):
-    alias = data.get("alias")
-
-    if alias and ShortLink.objects.filter(short=alias).exists():
-        raise ValidationError(
-            {"alias_error": _("Данный код для ссылки уже занят.")}
-        )
-
-    return data
+from api.validators import AliasCodeValidator
+from links.services.code_pool import quarantined_short_codes
+from links.services.short_links import get_quarantine_model
 
 
 def validate_group_for_link(data, user):
@@ -30,3 +27,106 @@ def validate_group_for_link(data, user):
         )
 
     return data
+
+
+class ShortLinkCreateUnavailable(APIException):
+    """БД недоступна при создании ссылки"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _("Не удалось создать ссылку, повторите запрос позже.")
+    default_code = "service_unavailable"
+
+
+def create_short_link(serializer, owner=None) -> dict:
+    """Проверка данных, создание ссылки и её представление.
+
+    Общий путь создания для ShortLinkViewSet и асинхронного view.
+
+    :param serializer: ShortLinkWriteSerializer с данными запроса
+    :param owner: владелец ссылки, None - анонимная ссылка
+    :raises ValidationError: данные не прошли проверку
+    :raises ShortLinkCreateUnavailable: ошибка БД при создании
+    """
+    serializer.is_valid(raise_exception=True)
+
+    try:
+        if owner is not None:
+            serializer.save(owner=owner)
+        else:
+            serializer.save()
+    except DatabaseError:
+        raise ShortLinkCreateUnavailable from None
+
+    return serializer.data
+
+
+# Суффиксы для вариантов занятого alias
+ALIAS_SUGGESTION_SUFFIXES = [str(number) for number in range(1, 10)]
+
+
+def is_valid_alias(alias: str) -> bool:
+    """Проходит ли alias AliasCodeValidator"""
+    try:
+        AliasCodeValidator()(alias)
+    except DjangoValidationError:
+        return False
+    return True
+
+
+def get_alias_variants(alias: str) -> list[str]:
+    """Близкие варианты alias: другой регистр и цифровые суффиксы"""
+    variants = [alias.lower(), alias.upper(), alias.capitalize()]
+    variants += [alias + suffix for suffix in ALIAS_SUGGESTION_SUFFIXES]
+
+    return [
+        variant
+        for variant in dict.fromkeys(variants)
+        if variant != alias and is_valid_alias(variant)
+    ]
+
+
+def get_aliases_availability(aliases: list[str]) -> list[dict]:
+    """Занятость alias и свободные варианты для занятых.
+
+    Кандидаты и все их варианты проверяются одним запросом short__in
+    по уникальному индексу кода.
+    """
+    valid_aliases = [alias for alias in aliases if is_valid_alias(alias)]
+    variants = {alias: get_alias_variants(alias) for alias in valid_aliases}
+
+    codes = set(valid_aliases)
+    for alias_variants in variants.values():
+        codes.update(alias_variants)
+
+    taken = set(
+        ShortLink.objects.filter(short__in=codes).values_list(
+            "short", flat=True
+        )
+    )
+
+    # Коды удалённых ссылок на карантине для alias тоже заняты
+    quarantine_model = get_quarantine_model()
+    if quarantine_model is not None:
+        taken |= quarantined_short_codes(quarantine_model, list(codes))
+
+    results = []
+    for alias in aliases:
+        valid = alias in variants
+        available = valid and alias not in taken
+        suggestions = []
+
+        if valid and not available:
+            suggestions = [
+                variant for variant in variants[alias] if variant not in taken
+            ][: Limits.MAX_ALIAS_SUGGESTIONS]
+
+        results.append(
+            {
+                "alias": alias,
+                "valid": valid,
+                "available": available,
+                "suggestions": suggestions,
+            }
+        )
+
+    return results
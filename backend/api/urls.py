@@ -2,7 +2,14 @@ from django.urls import path, include, re_path
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt import views
 
-from .views import ShortLinkViewSet, UserGroupLinkViewSet
+from links.conf import get_links_setting
+
+from .views import (
+    LinksMetricsView,
+    ShortLinkViewSet,
+    UserGroupLinkViewSet,
+    AsyncShortLinkCreateView,
+)
 
 
 VERSION = "v1"
@@ -26,6 +33,17 @@ urlpatterns = [
         views.TokenRefreshView.as_view(),
         name="jwt-refresh",
     ),
+    path("metrics/", LinksMetricsView.as_view(), name="links-metrics"),
 ]
 
+if get_links_setting("ASYNC_VIEWS"):
+    # Перед маршрутом роутера: анонимное создание ссылки без стека DRF
+    urlpatterns.append(
+        path(
+            "links/",
+            AsyncShortLinkCreateView.as_view(),
+            name="link-actions-async-create",
+        )
+    )
+
 urlpatterns += router.urls
@@ -2,10 +2,12 @@ import re
 from re import Pattern
 from dataclasses import dataclass
 
+from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 
 from core.enums import Limits
+from links.services.word_filter import get_word_filter
 
 
 class AliasCodeValidator(RegexValidator):
@@ -17,6 +19,20 @@ class AliasCodeValidator(RegexValidator):
     regex = rf"^[a-zA-Z0-9]{{{min_val},{max_val}}}$"
     message = _("Пользовательский код ссылки недействителен.")
     code = "alias_url_error"
+    blocked_message = _(
+        "Пользовательский код ссылки содержит запрещённое слово."
+    )
+    blocked_code = "alias_blocked_word"
+
+    def __call__(self, value):
+        super().__call__(value)
+
+        if not get_word_filter().is_allowed(str(value)):
+            raise ValidationError(
+                self.blocked_message,
+                code=self.blocked_code,
+                params={"value": value},
+            )
 
 
 @dataclass
@@ -25,7 +41,7 @@ class Link:
     alias: str
 
     LINK_REGEX: Pattern = re.compile(
-        r"(^$|(http(s)?://)([\w-]+\.)+[\w-]+([\w- ;,./?%&=]*))"
+        r"(^$|(http(s)?://)([\w-]+\.)+[\w-]+([\w\- ;,./?%&=]*))"
     )
 
     def __post_init__(self):
@@ -1,18 +1,28 @@
+import json
 from pathlib import Path
 
+from django.conf import settings
+from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.views import View
 from rest_framework import status, viewsets, exceptions
+from rest_framework.views import APIView, exception_handler
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.response import Response
 from rest_framework.decorators import action, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 
 from links.models import ShortLink, UserGroup
+from links.services.clicks import record_click
+from links.services.redirects import get_redirect_stats
+from links.services.short_links import get_short_code_stats
 
 from .filters import LinkFilter
 from .paginators import LinkPagination, GroupPagination
 from .permissons import IsOwnerOrAdmin
 from .serializers import (
+    AliasCheckSerializer,
     ShortLinkEditSerializer,
     ShortLinkReadSerializer,
     UserGroupReadSerializer,
@@ -20,6 +30,7 @@ from .serializers import (
     UserGroupWriteSerializer,
     LinksExportWriteSerializer,
 )
+from .services.short_links import create_short_link, get_aliases_availability
 
 
 class ShortLinkViewSet(viewsets.ModelViewSet):
@@ -41,6 +52,24 @@ class ShortLinkViewSet(viewsets.ModelViewSet):
     ]
     search_fields = ["original_link"]
 
+    # Поля для ShortLinkReadSerializer: владелец и группа с её
+    # владельцем загружаются тем же запросом, что и ссылки
+    read_queryset_fields = [
+        "id",
+        "original_link",
+        "short",
+        "owner__username",
+        "clicks_count",
+        "last_clicked_at",
+        "is_active",
+        "created_at",
+        "group__id",
+        "group__name",
+        "group__owner__username",
+        "group__color",
+        "group__created_at",
+    ]
+
     def get_permissions(self):
         """Выдача разрешения в зависимости от действия"""
         permissions = []  # noqa
@@ -52,8 +81,18 @@ class ShortLinkViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permissions]
 
     def get_queryset(self):
-        """Выдача queryset к действию"""
+        """Выдача queryset к действию.
+
+        Для чтения загружаются только поля сериализатора, изменение
+        сохраняет ссылку с full_clean() и получает все поля.
+        """
         queryset = ShortLink.objects.all()
+        related = queryset.select_related("owner", "group__owner")
+
+        if self.action in ("list", "retrieve"):
+            queryset = related.only(*self.read_queryset_fields)
+        elif self.action in ("update", "partial_update"):
+            queryset = related
 
         if (
             self.action in ("list", "update", "partial_update", "destroy")
@@ -77,18 +116,38 @@ class ShortLinkViewSet(viewsets.ModelViewSet):
         if not link.is_active:
             raise exceptions.NotFound
 
+        link.last_clicked_at = record_click(ShortLink, link.pk)
         link.clicks_count += 1
-        link.save()
 
         serializer = self.get_serializer(link)
         return Response(serializer.data)
 
-    def perform_create(self, serializer):
-        user = self.request.user
+    def create(self, request, *args, **kwargs):
+        user = request.user
+        data = create_short_link(
+            self.get_serializer(data=request.data),
+            owner=user if user.is_authenticated else None,
+        )
 
-        if user.is_authenticated:
-            serializer.save(owner=user)
-        serializer.save()
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(
+        methods=["post"],
+        url_path="check-aliases",
+        description="Проверить занятость alias и получить свободные варианты",
+        detail=False,
+    )
+    def check_aliases(self, request):
+        serializer = AliasCheckSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        return Response(
+            {
+                "results": get_aliases_availability(
+                    serializer.validated_data["aliases"]
+                )
+            }
+        )
 
     @permission_classes([IsAuthenticated])
     @action(
@@ -160,9 +219,16 @@ class UserGroupLinkViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permissions]
 
     def get_queryset(self):
+        queryset = UserGroup.objects.all()
+
+        if self.action in ("list", "retrieve"):
+            queryset = queryset.select_related("owner").only(
+                "id", "name", "owner__username", "color", "created_at"
+            )
+
         if not self.request.user.is_staff:
-            return UserGroup.objects.filter(owner=self.request.user)
-        return UserGroup.objects.all()
+            return queryset.filter(owner=self.request.user)
+        return queryset
 
     def get_serializer_class(self):
         if self.action in ("create", "update", "partial_update"):
@@ -172,3 +238,88 @@ class UserGroupLinkViewSet(viewsets.ModelViewSet):
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
+
+
+class LinksMetricsView(APIView):
+    """Метрики пути перехода по коротким ссылкам текущего процесса"""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {**get_redirect_stats(), "short_codes": get_short_code_stats()}
+        )
+
+
+class AsyncShortLinkCreateView(View):
+    """Создание ссылки анонимным пользователем под ASGI без стека DRF.
+
+    Ссылка создаётся тем же create_short_link, что и в ShortLinkViewSet,
+    в потоке через sync_to_async: async ORM здесь не используется,
+    так как проверки сериализатора и подбор кода синхронные. Ошибки
+    переводятся в ответы обработчиком исключений DRF. Запросы
+    с токеном или сессией и получение списка ссылок передаются
+    в ShortLinkViewSet, где работает аутентификация DRF.
+    """
+
+    http_method_names = ["get", "post", "options"]
+
+    viewset_view = staticmethod(
+        ShortLinkViewSet.as_view({"get": "list", "post": "create"})
+    )
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Аутентификация только по JWT, CSRF не нужен, как и в DRF
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def _delegate(self, request):
+        return await sync_to_async(self.viewset_view)(request)
+
+    async def get(self, request):
+        return await self._delegate(request)
+
+    async def options(self, request):
+        return await self._delegate(request)
+
+    @staticmethod
+    def _is_anonymous(request) -> bool:
+        return (
+            "HTTP_AUTHORIZATION" not in request.META
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
+
+    async def post(self, request):
+        if (
+            not self._is_anonymous(request)
+            or request.content_type != "application/json"
+        ):
+            return await self._delegate(request)
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return await self._delegate(request)
+
+        serializer = ShortLinkWriteSerializer(
+            data=data, context={"request": request}
+        )
+
+        try:
+            link_data = await sync_to_async(create_short_link)(serializer)
+        except exceptions.APIException as e:
+            response = exception_handler(e, {"request": request, "view": self})
+            # WWW-Authenticate, Retry-After от обработчика DRF
+            headers = dict(response.items())
+            headers.pop("Content-Type", None)
+
+            return JsonResponse(
+                response.data,
+                status=response.status_code,
+                headers=headers,
+                safe=False,
+            )
+
+        return JsonResponse(link_data, status=status.HTTP_201_CREATED)
@@ -0,0 +1,45 @@
+import os
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class RecentFileBasedCache(FileBasedCache):
+    """FileBasedCache, который при переполнении удаляет записи,
+    дольше всего не использовавшиеся.
+
+    Стандартный бэкенд удаляет случайные файлы, и свежие записи теряются
+    так же часто, как давно не нужные. Здесь удаляются файлы с самым
+    ранним временем изменения: его обновляет запись и mark_used().
+    """
+
+    # Время использования обновляется не чаще раза в столько секунд
+    used_interval = 60
+
+    def mark_used(self, key, version=None):
+        """Отметить запись использованной без перезаписи файла"""
+        fname = self._key_to_file(key, version)
+
+        try:
+            if time.time() - os.path.getmtime(fname) >= self.used_interval:
+                os.utime(fname)
+        except FileNotFoundError:
+            pass
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            return self.clear()
+
+        def used_at(fname: str) -> float:
+            try:
+                return os.path.getmtime(fname)
+            except FileNotFoundError:
+                return 0
+
+        filelist.sort(key=used_at)
+        for fname in filelist[: int(num_entries / self._cull_frequency)]:
+            self._delete(fname)
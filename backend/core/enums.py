@@ -24,3 +24,9 @@ class Limits(IntEnum):
     MAX_CAMPAIGNS_AMOUNT = 10
     # Максимальная длина названия цвета
     MAX_LEN_COLOR_NAME = 70
+    # Длина хэша user agent и IP в событии перехода
+    LEN_CLICK_EVENT_HASH = 32
+    # Максимальное количество alias в одной проверке занятости
+    MAX_ALIASES_CHECK_AMOUNT = 300
+    # Количество свободных вариантов для занятого alias
+    MAX_ALIAS_SUGGESTIONS = 5
@@ -0,0 +1,84 @@
+from django.db import models, migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """AddIndex без блокировки записи в таблицу на PostgreSQL.
+
+    На PostgreSQL индекс создаётся CREATE INDEX CONCURRENTLY, на других
+    БД обычным CREATE INDEX. CONCURRENTLY не работает в транзакции,
+    поэтому у миграции должно быть atomic = False.
+    """
+
+    def _concurrently(self, schema_editor) -> dict:
+        if schema_editor.connection.vendor == "postgresql":
+            return {"concurrently": True}
+        return {}
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        model = to_state.apps.get_model(app_label, self.model_name)
+
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(
+                model, self.index, **self._concurrently(schema_editor)
+            )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        model = from_state.apps.get_model(app_label, self.model_name)
+
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(
+                model, self.index, **self._concurrently(schema_editor)
+            )
+
+
+class RemoveFieldIndexConcurrently(migrations.AlterField):
+    """AlterField, снимающий db_index с поля без блокировки записи.
+
+    На PostgreSQL удаляется только индекс поля (DROP INDEX
+    CONCURRENTLY): обычный AlterField ещё и пересоздаёт внешний ключ
+    с проверкой всей таблицы. На других БД обычный AlterField.
+    У миграции должно быть atomic = False.
+    """
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            column = model._meta.get_field(self.name).column
+            for index_name in schema_editor._constraint_names(
+                model, [column], index=True, type_=models.Index.suffix
+            ):
+                schema_editor.execute(
+                    "DROP INDEX CONCURRENTLY IF EXISTS "
+                    f"{schema_editor.quote_name(index_name)}"
+                )
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state
+    ):
+        if schema_editor.connection.vendor != "postgresql":
+            return super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.execute(
+                schema_editor._create_index_sql(
+                    model,
+                    fields=[model._meta.get_field(self.name)],
+                    concurrently=True,
+                )
+            )
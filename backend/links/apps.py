@@ -5,3 +5,10 @@ class UrlsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "links"
     verbose_name = "Ссылки и Группы"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .services.word_filter import get_word_filter
+
+        # Файл запрещённых слов читается при старте, а не на первом коде
+        get_word_filter()
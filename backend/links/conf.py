@@ -0,0 +1,107 @@
+from django.conf import settings
+
+
+# Значения по умолчанию для настроек SHORT_LINKS
+DEFAULTS = {
+    # 301 вместо 302 при переходе по короткой ссылке
+    "REDIRECT_PERMANENT": False,
+    # Асинхронные view перехода и создания ссылки (для ASGI)
+    "ASYNC_VIEWS": False,
+    # Отложенная пакетная запись кликов (write-behind)
+    "CLICK_BUFFER_ENABLED": False,
+    # Сброс буфера не реже, чем раз в указанное количество мс
+    "CLICK_BUFFER_FLUSH_INTERVAL_MS": 1000,
+    # Сброс буфера после указанного количества переходов
+    "CLICK_BUFFER_FLUSH_MAX_EVENTS": 1000,
+    # Сброс буфера при завершении процесса
+    "CLICK_BUFFER_FLUSH_ON_SHUTDOWN": True,
+    # Запись last_clicked_at не чаще раза в указанное количество секунд
+    # на ссылку (0 - при каждом клике)
+    "LAST_CLICKED_INTERVAL": 0,
+    # Запись кликов в шарды счётчика (ShortLinkClickShard)
+    "CLICK_SHARDS_ENABLED": False,
+    # Количество шардов счётчика на одну ссылку
+    "CLICK_SHARDS_COUNT": 16,
+    # Журнал переходов ClickEvent
+    "CLICK_EVENTS_ENABLED": False,
+    # Размер очереди событий, при переполнении события отбрасываются
+    "CLICK_EVENTS_QUEUE_SIZE": 10000,
+    # Количество событий в одном bulk_create
+    "CLICK_EVENTS_BATCH_SIZE": 500,
+    # Запись неполной пачки не реже, чем раз в указанное количество мс
+    "CLICK_EVENTS_FLUSH_INTERVAL_MS": 1000,
+    # LRU-кэш short -> (pk, original_link, is_active) в памяти процесса
+    "RESOLVE_CACHE_ENABLED": True,
+    # Максимальное количество кодов в кэше
+    "RESOLVE_CACHE_SIZE": 10000,
+    # Время жизни записи в секундах. Ограничивает устаревание данных
+    # в других воркерах, сигналы сбрасывают кэш только своего процесса
+    "RESOLVE_CACHE_TTL": 60,
+    # Объединение одновременных промахов по одному коду в один запрос
+    "RESOLVE_SINGLE_FLIGHT": True,
+    # Фильтр Блума существующих кодов для отсечения несуществующих
+    "BLOOM_FILTER_ENABLED": False,
+    # Допустимая доля ложных срабатываний фильтра
+    "BLOOM_FILTER_FP_RATE": 0.01,
+    # Сколько последних pk перечитывать при догрузке кодов других
+    # воркеров (больше числа одновременно вставляемых ссылок)
+    "BLOOM_FILTER_RELOAD_OVERLAP": 1000,
+    # Догрузка кодов других воркеров промахом не чаще раза в столько
+    # секунд, остальные промахи отвечают из памяти
+    "BLOOM_FILTER_RELOAD_INTERVAL": 1.0,
+    # Общая для воркеров узла таблица кодов в memory-mapped файле
+    "SHARED_TABLE_ENABLED": False,
+    # Путь к файлу таблицы, лучше на tmpfs (/dev/shm)
+    "SHARED_TABLE_PATH": "/dev/shm/viqzo-links.table",
+    # Количество слотов, заполняется не более чем на 70%
+    "SHARED_TABLE_CAPACITY": 1_048_576,
+    # Размер области оригинальных ссылок в байтах
+    "SHARED_TABLE_HEAP_SIZE": 256 * 1024 * 1024,
+    # Через сколько секунд запись таблицы перечитывается из БД
+    "SHARED_TABLE_TTL": 300,
+    # Генератор кодов: "random" (LinkHash с проверкой в БД) или
+    # "sequence" (SequenceLinkHash по последовательности БД)
+    "SHORT_CODE_GENERATOR": "random",
+    # Ключ перестановки SequenceLinkHash (None - SECRET_KEY)
+    "SHORT_CODE_SEQUENCE_KEY": None,
+    # Номеров в блоке, резервируемом процессом за одно обращение к БД
+    "SHORT_CODE_ID_BLOCK_SIZE": 10_000,
+    # Рост длины случайных кодов с заполненностью пространства кодов
+    "SHORT_CODE_ADAPTIVE_LENGTH": False,
+    # Допустимая вероятность совпадения случайного кода с существующим
+    "SHORT_CODE_MAX_COLLISION_RATE": 0.001,
+    # Как часто дочитывать заполненность из БД, секунды
+    "SHORT_CODE_OCCUPANCY_REFRESH_INTERVAL": 60.0,
+    # Сгенерированный код кодирует первичный ключ ссылки, переход
+    # ищет ссылку по ключу (PostgreSQL и SQLite)
+    "SHORT_CODE_DECODABLE": False,
+    # Выдача сгенерированных кодов из пула ShortCodePool
+    "SHORT_CODE_POOL_ENABLED": False,
+    # Сколько свободных кодов держать в пуле
+    "SHORT_CODE_POOL_SIZE": 100_000,
+    # Сколько кодов генерировать и проверять за одну пачку
+    "SHORT_CODE_POOL_BATCH_SIZE": 10_000,
+    # Карантин сгенерированных кодов удалённых ссылок перед повторной
+    # выдачей через пул
+    "SHORT_CODE_QUARANTINE_ENABLED": False,
+    # Длительность карантина, дни
+    "SHORT_CODE_QUARANTINE_DAYS": 180,
+    # Коды, совпадающие с путями сайта (без учёта регистра). Путь api/
+    # не резервируется: коды короче 4 символов не выдаются
+    "SHORT_CODE_RESERVED_WORDS": ("admin", "static"),
+    # Файл запрещённых подстрок кодов, по слову в строке (None - нет)
+    "SHORT_CODE_BLOCKED_WORDS_PATH": None,
+    # Переход по снимку последних данных ссылок при ошибках БД
+    "STALE_FALLBACK_ENABLED": False,
+    # Алиас кэша Django для снимка (лучше файловый, переживает рестарт)
+    "STALE_CACHE_ALIAS": "links_snapshot",
+    # Максимум кликов, отложенных до восстановления БД
+    "CLICK_REPLAY_MAX_EVENTS": 100_000,
+    # Как часто (в секундах) пробовать записать отложенные клики
+    "CLICK_REPLAY_RETRY_INTERVAL": 5.0,
+}
+
+
+def get_links_setting(name: str):
+    """Получить настройку коротких ссылок с учётом значения по умолчанию"""
+    return getattr(settings, "SHORT_LINKS", {}).get(name, DEFAULTS[name])
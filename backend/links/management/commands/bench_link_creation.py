@@ -0,0 +1,228 @@
+import time
+import statistics
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import DatabaseError, connection, connections
+from django.conf import settings
+from django.test import override_settings
+from django.core.exceptions import ValidationError
+from django.core.management import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError as APIValidationError
+
+from links.models import ShortLink, ShortCodePool
+from links.services.code_pool import refill_short_code_pool
+from links.services.short_links import get_code_length_tracker
+from links.services.url_short_logic import LinkHash
+
+
+# Ссылки предзагрузки и созданные во время замера различаются,
+# чтобы предзагрузку можно было переиспользовать между запусками
+PRELOAD_LINK = "https://example.com/bench-link-creation/preload"
+CREATED_LINK = "https://example.com/bench-link-creation/created"
+PRELOAD_CHUNK_SIZE = 10_000
+
+# Настройки SHORT_LINKS для каждой стратегии генерации кодов
+STRATEGIES = {
+    "random": {"SHORT_CODE_GENERATOR": "random"},
+    "adaptive": {
+        "SHORT_CODE_GENERATOR": "random",
+        "SHORT_CODE_ADAPTIVE_LENGTH": True,
+    },
+    "pool": {
+        "SHORT_CODE_GENERATOR": "random",
+        "SHORT_CODE_POOL_ENABLED": True,
+    },
+    "sequence": {"SHORT_CODE_GENERATOR": "sequence"},
+    "decodable": {"SHORT_CODE_DECODABLE": True},
+}
+
+
+def _init_worker():
+    """Django в процессе-создателе (нужно при запуске через spawn)"""
+    django.setup()
+
+
+def _create_links(short_links: dict, amount: int) -> dict:
+    """Создание amount ссылок в процессе пула и сбор замеров"""
+    latencies = []
+    errors = Counter()
+
+    with override_settings(SHORT_LINKS=short_links):
+        tracker = get_code_length_tracker(ShortLink)
+        retries_before = tracker.retries
+        started_at = time.time()
+
+        for _ in range(amount):
+            started = time.perf_counter()
+            try:
+                ShortLink.objects.create(original_link=CREATED_LINK)
+            except (DatabaseError, ValidationError, APIValidationError) as e:
+                errors[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+        finished_at = time.time()
+        retries = tracker.retries - retries_before
+
+    connections.close_all()
+    return {
+        "latencies": latencies,
+        "retries": retries,
+        "errors": dict(errors),
+        "started_at": started_at,
+        "finished_at": finished_at,
+    }
+
+
+def _drop_links(original_link: str) -> int:
+    """Удалить ссылки замера одним DELETE.
+
+    Без сигналов: коды не ставятся на карантин и не удаляются по одному
+    из общей таблицы. Связанных записей (клики, события) у ссылок
+    замера нет.
+    """
+    links = ShortLink.objects.filter(original_link=original_link)
+    return links._raw_delete(links.db)
+
+
+class Command(BaseCommand):
+    """Команда Django для нагрузочного замера создания ссылок."""
+
+    help = (
+        "Stress benchmark of concurrent link creation: preload N links, "
+        "start a process pool of creators and report creates/s, p50/p99 "
+        "latency, code retries (caught IntegrityError on short) and "
+        "errors for each code generation strategy. Runs against the "
+        "default database: use settings with SQLite or a local "
+        "PostgreSQL to compare them."
+    )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--preload",
+            type=int,
+            default=100_000,
+            help="Amount of existing links in the table before the run.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=32,
+            help="Creator processes.",
+        )
+        parser.add_argument(
+            "--links",
+            type=int,
+            default=200,
+            help="Links created by each worker.",
+        )
+        parser.add_argument(
+            "--strategies",
+            type=lambda value: value.split(","),
+            default=list(STRATEGIES),
+            help=f"Comma separated strategies: {', '.join(STRATEGIES)}.",
+        )
+        parser.add_argument(
+            "--drop-preload",
+            action="store_true",
+            help="Delete preloaded links after the run.",
+        )
+
+    def _preload(self, amount: int):
+        """Дополнить таблицу ссылками предзагрузки до amount"""
+        preloaded = ShortLink.objects.filter(original_link=PRELOAD_LINK)
+        existing = preloaded.count()
+        generator = LinkHash()
+
+        while existing < amount:
+            while existing < amount:
+                size = min(PRELOAD_CHUNK_SIZE, amount - existing)
+                ShortLink.objects.bulk_create(
+                    [
+                        ShortLink(original_link=PRELOAD_LINK, short=short)
+                        for short in generator.get_short_codes(size)
+                    ],
+                    ignore_conflicts=True,
+                )
+                existing += size
+
+            # ignore_conflicts молча пропускает занятые коды,
+            # одна проверка на проход вместо count() на пачку
+            existing = preloaded.count()
+
+        self.stdout.write(f"Preloaded links: {existing}")
+
+    def _run(self, name: str, short_links: dict, options) -> None:
+        """Прогон одной стратегии и вывод результатов"""
+        workers, links = options["workers"], options["links"]
+
+        if short_links.get("SHORT_CODE_POOL_ENABLED"):
+            refill_short_code_pool(
+                ShortCodePool, ShortLink, workers * links, PRELOAD_CHUNK_SIZE
+            )
+
+        # Процессы пула не должны унаследовать соединение родителя
+        connections.close_all()
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker
+        ) as executor:
+            results = list(
+                executor.map(
+                    _create_links,
+                    [short_links] * workers,
+                    [links] * workers,
+                )
+            )
+
+        latencies = sorted(
+            latency for result in results for latency in result["latencies"]
+        )
+        errors = Counter()
+        for result in results:
+            errors.update(result["errors"])
+
+        elapsed = max(result["finished_at"] for result in results) - min(
+            result["started_at"] for result in results
+        )
+        created = len(latencies) - sum(errors.values())
+        percentiles = statistics.quantiles(latencies, n=100)
+
+        self.stdout.write(
+            f"{name}: {created / max(elapsed, 1e-9):.0f} creates/s, "
+            f"p50 {percentiles[49] * 1000:.1f} ms, "
+            f"p99 {percentiles[98] * 1000:.1f} ms, "
+            f"retries {sum(result['retries'] for result in results)}, "
+            f"errors {dict(errors) or 0} "
+            f"({created}/{len(latencies)} created in {elapsed:.2f}s)"
+        )
+
+        _drop_links(CREATED_LINK)
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        unknown = set(options["strategies"]) - set(STRATEGIES)
+        if unknown:
+            raise CommandError(f"Unknown strategies: {', '.join(unknown)}")
+
+        if options["workers"] * options["links"] < 2:
+            raise CommandError("At least two links are needed for p50/p99")
+
+        self.stdout.write(
+            f"Database: {connection.vendor}, workers: {options['workers']}, "
+            f"links per worker: {options['links']}"
+        )
+        self._preload(options["preload"])
+
+        base = dict(getattr(settings, "SHORT_LINKS", {}))
+
+        try:
+            for name in options["strategies"]:
+                self._run(name, {**base, **STRATEGIES[name]}, options)
+        finally:
+            if options["drop_preload"]:
+                _drop_links(PRELOAD_LINK)
+
+        self.stdout.write("Benchmark finished", style_func=self.style.SUCCESS)
@@ -0,0 +1,138 @@
+import time
+import asyncio
+from types import ModuleType
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connections
+from django.conf import settings
+from django.test import Client, AsyncClient, override_settings
+from django.core.management import BaseCommand
+
+from links.conf import get_links_setting
+from links.urls import get_redirect_urlpatterns
+from links.models import ShortLink
+
+
+def get_redirect_urlconf(async_views: bool) -> ModuleType:
+    """URLconf только с маршрутом перехода"""
+    urlconf = ModuleType(f"bench_redirect_urls_{int(async_views)}")
+    urlconf.urlpatterns = get_redirect_urlpatterns(async_views)
+    return urlconf
+
+
+class Command(BaseCommand):
+    """Команда Django для сравнения WSGI и ASGI на пути перехода."""
+
+    help = (
+        "Benchmark redirect throughput through the WSGI handler with "
+        "the sync view and threads versus the ASGI handler with the "
+        "async view and coroutines, in-process."
+    )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Requests per handler.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Concurrent clients (threads for WSGI, tasks for ASGI).",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Disable the resolve cache to measure the database path.",
+        )
+
+    def _bench_wsgi(self, path: str, requests: int, concurrency: int):
+        def worker(amount: int) -> int:
+            client = Client()
+            try:
+                return sum(
+                    client.get(path).status_code == 302 for _ in range(amount)
+                )
+            finally:
+                connections.close_all()
+
+        amounts = [requests // concurrency] * concurrency
+        amounts[0] += requests % concurrency
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return sum(executor.map(worker, amounts))
+
+    def _bench_asgi(self, path: str, requests: int, concurrency: int):
+        async def run() -> int:
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def request() -> bool:
+                async with semaphore:
+                    response = await client.get(path)
+                    return response.status_code == 302
+
+            results = await asyncio.gather(
+                *(request() for _ in range(requests))
+            )
+            return sum(results)
+
+        return asyncio.run(run())
+
+    def _run(self, name: str, bench, async_views: bool, path: str, options):
+        """Прогон одного обработчика и вывод пропускной способности"""
+        requests = options["requests"]
+        urlconf = get_redirect_urlconf(async_views)
+
+        with override_settings(ROOT_URLCONF=urlconf):
+            started = time.perf_counter()
+            redirected = bench(path, requests, options["concurrency"])
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{name}: {requests / elapsed:.0f} req/s "
+            f"({redirected}/{requests} redirected in {elapsed:.2f}s)"
+        )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        short_links = dict(getattr(settings, "SHORT_LINKS", {}))
+        short_links.update(
+            {
+                "REDIRECT_PERMANENT": False,
+                "RESOLVE_CACHE_ENABLED": not options["no_cache"]
+                and get_links_setting("RESOLVE_CACHE_ENABLED"),
+            }
+        )
+
+        link = ShortLink.objects.create(
+            original_link="https://example.com/bench-redirect"
+        )
+        path = f"/{link.short}"
+
+        try:
+            with override_settings(
+                SHORT_LINKS=short_links,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                self._run(
+                    "WSGI (sync view, threads)",
+                    self._bench_wsgi,
+                    False,
+                    path,
+                    options,
+                )
+                self._run(
+                    "ASGI (async view, coroutines)",
+                    self._bench_asgi,
+                    True,
+                    path,
+                    options,
+                )
+        finally:
+            link.delete()
+
+        self.stdout.write("Benchmark finished", style_func=self.style.SUCCESS)
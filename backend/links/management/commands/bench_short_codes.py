@@ -0,0 +1,68 @@
+import time
+
+from django.core.management import BaseCommand
+
+from links.models import ShortLink
+from links.services.short_links import get_short_codes
+from links.services.url_short_logic import LinkHash
+
+
+class Command(BaseCommand):
+    """Команда Django для замера скорости генерации коротких кодов."""
+
+    help = (
+        "Benchmark short code generation: one get_short_code() call per "
+        "code versus batched get_short_codes(n), optionally including "
+        "the short__in check against the database."
+    )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[1, 1_000, 1_000_000],
+            help="Comma separated batch sizes.",
+        )
+        parser.add_argument(
+            "--with-db",
+            action="store_true",
+            help="Also measure batches checked against existing links.",
+        )
+
+    def _report(self, name: str, amount: int, generate):
+        """Замер одного способа генерации и вывод кодов в секунду"""
+        started = time.perf_counter()
+        codes = generate(amount)
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        self.stdout.write(
+            f"  {name}: {len(codes) / elapsed:,.0f} codes/s "
+            f"({len(codes)} codes in {elapsed:.4f}s)"
+        )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        generator = LinkHash()
+
+        for amount in options["sizes"]:
+            self.stdout.write(f"n = {amount}")
+            self._report(
+                "get_short_code() x n",
+                amount,
+                lambda n: [generator.get_short_code() for _ in range(n)],
+            )
+            self._report(
+                "LinkHash.get_short_codes(n)",
+                amount,
+                generator.get_short_codes,
+            )
+
+            if options["with_db"]:
+                self._report(
+                    "get_short_codes(n) + short__in",
+                    amount,
+                    lambda n: get_short_codes(ShortLink, n),
+                )
+
+        self.stdout.write("Benchmark finished", style_func=self.style.SUCCESS)
@@ -0,0 +1,92 @@
+import time
+import random
+import string
+
+from django.core.management import BaseCommand
+
+from links.services.word_filter import ShortCodeWordFilter
+from links.services.url_short_logic import LinkHash
+
+
+class Command(BaseCommand):
+    """Команда Django для замера проверки кодов по списку слов."""
+
+    help = (
+        "Benchmark the blocked words check of short codes: Aho-Corasick "
+        "automaton versus a naive any(word in code) loop for growing "
+        "word lists. The automaton cost per code should stay flat."
+    )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--sizes",
+            type=lambda value: [int(size) for size in value.split(",")],
+            default=[100, 1_000, 10_000, 100_000],
+            help="Comma separated word list sizes.",
+        )
+        parser.add_argument(
+            "--codes",
+            type=int,
+            default=10_000,
+            help="Amount of generated codes to check.",
+        )
+        parser.add_argument(
+            "--naive-limit",
+            type=int,
+            default=10_000,
+            help="Skip the naive loop for larger word lists.",
+        )
+
+    @staticmethod
+    def _random_words(amount: int) -> list[str]:
+        """Случайные слова длиной 5-8 символов, одинаковые между запусками"""
+        rnd = random.Random(amount)
+        chars = string.ascii_lowercase + string.digits
+
+        return [
+            "".join(rnd.choices(chars, k=rnd.randint(5, 8)))
+            for _ in range(amount)
+        ]
+
+    def _report(self, name: str, codes: list[str], check):
+        """Замер одного способа проверки и вывод времени на код"""
+        started = time.perf_counter()
+        blocked = sum(1 for code in codes if check(code))
+        elapsed = max(time.perf_counter() - started, 1e-9)
+
+        self.stdout.write(
+            f"  {name}: {elapsed / len(codes) * 1e6:.2f} us/code "
+            f"({blocked} blocked of {len(codes)})"
+        )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        codes = LinkHash().get_short_codes(options["codes"])
+
+        for size in options["sizes"]:
+            words = self._random_words(size)
+
+            started = time.perf_counter()
+            word_filter = ShortCodeWordFilter(reserved=(), blocked=words)
+            self.stdout.write(
+                f"words = {size} "
+                f"(automaton built in {time.perf_counter() - started:.3f}s)"
+            )
+
+            self._report(
+                "aho-corasick",
+                codes,
+                word_filter.blocked_word,
+            )
+
+            if size <= options["naive_limit"]:
+                self._report(
+                    "any(word in code)",
+                    codes,
+                    lambda code, words=words: any(
+                        word in code.lower() for word in words
+                    ),
+                )
+
+        self.stdout.write("Benchmark finished", style_func=self.style.SUCCESS)
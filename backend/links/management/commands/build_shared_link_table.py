@@ -0,0 +1,31 @@
+from django.db import DatabaseError
+from django.core.management import BaseCommand, CommandError
+
+from links.models import ShortLink
+from links.services.redirects import rebuild_shared_link_table
+
+
+class Command(BaseCommand):
+    """Команда Django для сборки общей таблицы кодов узла."""
+
+    help = (
+        "Build the shared memory-mapped short code table from the database "
+        "and atomically replace the current one."
+    )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        try:
+            saved_amount = rebuild_shared_link_table(ShortLink)
+        except DatabaseError as e:
+            self.stderr.write(
+                f"DatabaseError while building\n\n" f"Details: \n{e}\n\n"
+            )
+            raise CommandError("Error when building shared table") from e
+        except (OSError, RuntimeError) as e:
+            raise CommandError(f"Shared table is unavailable: {e}") from e
+
+        self.stdout.write(
+            f"Shared table built. Codes saved: {saved_amount}",
+            style_func=self.style.SUCCESS,
+        )
@@ -0,0 +1,50 @@
+import time
+
+from django.db import DatabaseError
+from django.core.management import BaseCommand, CommandError
+
+from links.models import ShortLink, ShortLinkClickShard
+from links.services.click_shards import fold_click_shards
+
+
+class Command(BaseCommand):
+    """Команда Django для переноса кликов из шардов в ссылки."""
+
+    help = (
+        "Fold clicks accumulated in ShortLinkClickShard rows "
+        "into ShortLink.clicks_count."
+    )
+
+    def _fold(self) -> None:
+        """Однократный перенос кликов"""
+        try:
+            links_amount = fold_click_shards(ShortLink, ShortLinkClickShard)
+        except DatabaseError as e:
+            self.stderr.write(
+                f"DatabaseError while folding\n\n" f"Details: \n{e}\n\n"
+            )
+            raise CommandError("Error when folding click shards") from e
+
+        self.stdout.write(
+            f"Click shards folded. Links updated: {links_amount}",
+            style_func=self.style.SUCCESS,
+        )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Repeat folding every N seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        interval = options.get("every")
+
+        self._fold()
+
+        while interval:
+            time.sleep(interval)
+            self._fold()
@@ -0,0 +1,72 @@
+import time
+
+from django.db import DatabaseError
+from django.core.management import BaseCommand, CommandError
+
+from links.conf import get_links_setting
+from links.models import ShortLink, ShortCodePool, ShortCodeQuarantine
+from links.services.code_pool import refill_short_code_pool
+
+
+class Command(BaseCommand):
+    """Команда Django для пополнения пула свободных коротких кодов."""
+
+    help = (
+        "Generate free short codes in batches and store them "
+        "in ShortCodePool up to the configured size. Codes of deleted "
+        "links whose quarantine has ended are added first."
+    )
+
+    def _refill(self, size: int, batch_size: int) -> None:
+        """Однократное пополнение пула"""
+        try:
+            added = refill_short_code_pool(
+                ShortCodePool,
+                ShortLink,
+                size,
+                batch_size,
+                quarantine_model=ShortCodeQuarantine
+                if get_links_setting("SHORT_CODE_QUARANTINE_ENABLED")
+                else None,
+            )
+        except DatabaseError as e:
+            self.stderr.write(
+                f"DatabaseError while refilling\n\n" f"Details: \n{e}\n\n"
+            )
+            raise CommandError("Error when refilling short code pool") from e
+
+        self.stdout.write(
+            f"Short code pool refilled. Codes added: {added}",
+            style_func=self.style.SUCCESS,
+        )
+
+    def add_arguments(self, parser):
+        """Добавление аргументов"""
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=get_links_setting("SHORT_CODE_POOL_SIZE"),
+            help="Number of free codes to keep in the pool.",
+        )
+        parser.add_argument(
+            "--batch",
+            type=int,
+            default=get_links_setting("SHORT_CODE_POOL_BATCH_SIZE"),
+            help="Number of codes generated and checked per batch.",
+        )
+        parser.add_argument(
+            "--every",
+            type=float,
+            default=None,
+            help="Repeat refilling every N seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        """Старт команды"""
+        interval = options.get("every")
+
+        self._refill(options["size"], options["batch"])
+
+        while interval:
+            time.sleep(interval)
+            self._refill(options["size"], options["batch"])
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.2 on 2026-10-18 13:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0005_alter_color_color_hex_alter_shortlink_short'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortLinkClickShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Номер шарда')),
+                ('clicks_count', models.PositiveIntegerField(default=0, verbose_name='Переходов по ссылке')),
+                ('last_clicked_at', models.DateTimeField(blank=True, null=True, verbose_name='Последнее время клика')),
+                ('link', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='click_shards', to='links.shortlink', verbose_name='Короткая ссылка')),
+            ],
+            options={
+                'verbose_name': 'Шард счётчика переходов',
+                'verbose_name_plural': 'Шарды счётчиков переходов',
+                'db_table': 'links_short_link_click_shard',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shortlinkclickshard',
+            constraint=models.UniqueConstraint(fields=('link', 'shard'), name='unique_shard_per_link'),
+        ),
+    ]
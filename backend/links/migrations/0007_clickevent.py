@@ -0,0 +1,32 @@
+# Generated by Django 4.2.2 on 2026-10-18 13:10
+
+import core.enums
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0006_shortlinkclickshard_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClickEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clicked_at', models.DateTimeField(verbose_name='Время перехода')),
+                ('referrer', models.CharField(blank=True, max_length=core.enums.Limits['MAX_LEN_ORIGINAL_LINK'], verbose_name='Источник перехода')),
+                ('user_agent_hash', models.CharField(blank=True, max_length=core.enums.Limits['LEN_CLICK_EVENT_HASH'], verbose_name='Хэш user agent')),
+                ('ip_hash', models.CharField(blank=True, max_length=core.enums.Limits['LEN_CLICK_EVENT_HASH'], verbose_name='Хэш IP адреса')),
+                ('link', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='click_events', to='links.shortlink', verbose_name='Короткая ссылка')),
+            ],
+            options={
+                'verbose_name': 'Переход по ссылке',
+                'verbose_name_plural': 'Переходы по ссылкам',
+                'db_table': 'links_click_event',
+                'indexes': [models.Index(fields=['link', 'clicked_at'], name='click_event_link_time_idx')],
+            },
+        ),
+    ]
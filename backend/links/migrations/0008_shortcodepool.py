@@ -0,0 +1,27 @@
+# Generated by Django 4.2.2 on 2026-10-18 13:34
+
+import core.enums
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0007_clickevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortCodePool',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short', models.CharField(max_length=core.enums.Limits['MAX_LEN_LINK_SHORT_CODE'], unique=True, verbose_name='Короткий код ссылки')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+            options={
+                'verbose_name': 'Свободный короткий код',
+                'verbose_name_plural': 'Пул свободных коротких кодов',
+                'db_table': 'links_short_code_pool',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.2 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0008_shortcodepool'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortCodeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Номер короткого кода',
+                'verbose_name_plural': 'Последовательность коротких кодов',
+                'db_table': 'links_short_code_sequence',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:01
+
+import core.enums
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('links', '0009_shortcodesequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShortCodeQuarantine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('short', models.CharField(max_length=core.enums.Limits['MAX_LEN_LINK_SHORT_CODE'], unique=True, verbose_name='Короткий код ссылки')),
+                ('release_at', models.DateTimeField(db_index=True, verbose_name='Дата окончания карантина')),
+            ],
+            options={
+                'verbose_name': 'Код на карантине',
+                'verbose_name_plural': 'Коды на карантине',
+                'db_table': 'links_short_code_quarantine',
+            },
+        ),
+        # Для существующих ссылок неизвестно, был ли код alias,
+        # поэтому их коды не попадают на карантин и не переиспользуются
+        migrations.AddField(
+            model_name='shortlink',
+            name='is_alias',
+            field=models.BooleanField(default=True, editable=False, verbose_name='Код выбран пользователем'),
+        ),
+        migrations.AlterField(
+            model_name='shortlink',
+            name='is_alias',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Код выбран пользователем'),
+        ),
+    ]
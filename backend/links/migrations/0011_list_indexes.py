@@ -0,0 +1,51 @@
+# Generated by Django 4.2.2 on 2026-10-18 14:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.operations import AddIndexConcurrently, RemoveFieldIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE/DROP INDEX CONCURRENTLY на PostgreSQL не работает в транзакции
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('links', '0010_shortcodequarantine_shortlink_is_alias'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='shortlink',
+            index=models.Index(fields=['owner', 'created_at'], name='link_owner_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='shortlink',
+            index=models.Index(fields=['owner', 'group', 'created_at'], name='link_owner_group_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='shortlink',
+            index=models.Index(fields=['owner', 'clicks_count'], name='link_owner_clicks_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='shortlink',
+            index=models.Index(fields=['owner', 'last_clicked_at'], name='link_owner_last_clicked_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='usergroup',
+            index=models.Index(fields=['owner', '-created_at'], name='group_owner_created_idx'),
+        ),
+        # Индексы внешних ключей owner покрыты новыми индексами
+        RemoveFieldIndexConcurrently(
+            model_name='shortlink',
+            name='owner',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='link_owner', to=settings.AUTH_USER_MODEL, verbose_name='Владелец короткой ссылки'),
+        ),
+        RemoveFieldIndexConcurrently(
+            model_name='usergroup',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='group_owner', to=settings.AUTH_USER_MODEL, verbose_name='Владелец группы'),
+        ),
+    ]
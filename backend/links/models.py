@@ -1,14 +1,18 @@
 from django.db import models
-from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxLengthValidator, MinLengthValidator
 from django.utils.translation import gettext_lazy as _
 
 from core.enums import Limits
+from links.conf import get_links_setting
 
 from . import validators
 from .services.short_links import (
     get_short_code,
+    insert_short_link,
+    release_alias_from_pool,
+    get_decodable_short_code,
+    check_alias_not_quarantined,
     check_links_group_constraints,
     full_clean_check_validation_short,
 )
@@ -67,6 +71,7 @@ class UserGroup(models.Model):
         on_delete=models.CASCADE,
         verbose_name=_("Владелец группы"),
         related_name="group_owner",
+        db_index=False,  # покрывается индексом (owner, -created_at)
     )
     color = models.ForeignKey(
         Color,
@@ -82,6 +87,12 @@ class UserGroup(models.Model):
         verbose_name = _("Группа ссылок")
         verbose_name_plural = _("Группы ссылок")
         db_table = "links_user_group"
+        indexes = [
+            models.Index(
+                name="group_owner_created_idx",
+                fields=["owner", "-created_at"],
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 name="unique_name_per_owner",
@@ -147,6 +158,11 @@ class ShortLink(models.Model):
     is_active = models.BooleanField(
         default=True, verbose_name=_("Активна ли ссылка?")
     )
+    is_alias = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name=_("Код выбран пользователем"),
+    )
     owner = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -154,6 +170,7 @@ class ShortLink(models.Model):
         related_name="link_owner",
         blank=True,
         null=True,
+        db_index=False,  # покрывается индексами (owner, ...)
     )
     group = models.ForeignKey(
         UserGroup,
@@ -166,33 +183,66 @@ class ShortLink(models.Model):
     )
 
     def set_short(self):
-        """Поставить короткий код для ссылки, если нет alias"""
+        """Поставить короткий код для ссылки, если нет alias.
+
+        При SHORT_CODE_DECODABLE код кодирует первичный ключ новой
+        ссылки, ключ резервируется до вставки.
+        """
+        if self.pk is None and get_links_setting("SHORT_CODE_DECODABLE"):
+            self.pk, short_code = get_decodable_short_code(self.__class__)
+            return short_code
+
         return get_short_code(self.__class__)
 
     def clean(self):
         """Проверка ограничений ссылки"""
         check_links_group_constraints(self.group)
 
-    def try_full_clean(self):
+    def try_full_clean(self, validate_unique=True):
         """Запустить проверку полей модели"""
-        return full_clean_check_validation_short(self)
+        return full_clean_check_validation_short(self, validate_unique)
 
-    def save(self, *args, **kwargs):
-        """Сохранить ссылку"""
-        if not self.short:
-            self.short = self.set_short()
+    def _regenerate_short(self):
+        """Новый код вместо занятого, ключ резервируется заново"""
+        if get_links_setting("SHORT_CODE_DECODABLE"):
+            self.pk = None
 
-        if "clean" in dir(self):
+        self.short = self.set_short()
+
+    def save(self, *args, **kwargs):
+        """Сохранить ссылку.
+
+        Новая ссылка вставляется без проверки кода в БД заранее,
+        занятый код обнаруживается по нарушению уникальности
+        (insert_short_link).
+        """
+        # Время последнего клика пишет только учёт переходов
+        # (links.services.clicks), изменение ссылки его не трогает
+        if not self._state.adding:
             self.try_full_clean()
+            return super().save(*args, **kwargs)
 
-        if self.pk:
-            if self.clicks_count == 0:
-                # Кликов ещё не было
-                self.last_clicked_at = None
-            else:
-                # Обновляем время последнего клика при переходе
-                self.last_clicked_at = timezone.now()
-        super().save(*args, **kwargs)
+        generated = not self.short
+        self.is_alias = not generated
+
+        if generated:
+            self.short = self.set_short()
+
+            if self.pk is not None:
+                # Ключ зарезервирован в set_short: INSERT без попытки UPDATE
+                kwargs.setdefault("force_insert", True)
+        else:
+            check_alias_not_quarantined(self.short)
+            release_alias_from_pool(self.short)
+
+        self.try_full_clean(validate_unique=False)
+        insert_short_link(
+            self,
+            super().save,
+            self._regenerate_short if generated else None,
+            *args,
+            **kwargs,
+        )
 
     def __str__(self):
         return f"link: {self.original_link} short: {self.short}"
@@ -201,6 +251,173 @@ class ShortLink(models.Model):
         verbose_name = _("Короткая ссылка")
         verbose_name_plural = _("Короткие ссылки")
         db_table = "links_short_link"
+        # Список ссылок пользователя (ShortLinkViewSet) с фильтром
+        # по группе и сортировками без сортировки в памяти БД.
+        # original_link (до 2000 символов) не индексируется: длинные
+        # ссылки не помещаются в строку B-tree индекса PostgreSQL
+        indexes = [
+            models.Index(
+                name="link_owner_created_idx",
+                fields=["owner", "created_at"],
+            ),
+            models.Index(
+                name="link_owner_group_created_idx",
+                fields=["owner", "group", "created_at"],
+            ),
+            models.Index(
+                name="link_owner_clicks_idx",
+                fields=["owner", "clicks_count"],
+            ),
+            models.Index(
+                name="link_owner_last_clicked_idx",
+                fields=["owner", "last_clicked_at"],
+            ),
+        ]
+
+
+class ShortLinkClickShard(models.Model):
+    """Шард счётчика переходов по ссылке.
+
+    Клики распределяются по нескольким строкам, чтобы популярная ссылка
+    не упиралась в блокировку одной строки. Накопленные значения
+    периодически переносятся в ShortLink.clicks_count.
+    """
+
+    link = models.ForeignKey(
+        ShortLink,
+        on_delete=models.CASCADE,
+        verbose_name=_("Короткая ссылка"),
+        related_name="click_shards",
+    )
+    shard = models.PositiveSmallIntegerField(verbose_name=_("Номер шарда"))
+    clicks_count = models.PositiveIntegerField(
+        default=0, verbose_name=_("Переходов по ссылке")
+    )
+    last_clicked_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("Последнее время клика")
+    )
+
+    class Meta:
+        verbose_name = _("Шард счётчика переходов")
+        verbose_name_plural = _("Шарды счётчиков переходов")
+        db_table = "links_short_link_click_shard"
+        constraints = [
+            models.UniqueConstraint(
+                name="unique_shard_per_link",
+                fields=["link", "shard"],
+            )
+        ]
+
+    def __str__(self):
+        return f"link: {self.link_id} shard: {self.shard}"
+
+
+class ShortCodePool(models.Model):
+    """Заранее сгенерированный свободный короткий код.
+
+    Пул пополняется пачками командой refill_short_code_pool, код
+    удаляется из пула при выдаче новой ссылке.
+    """
+
+    short = models.CharField(
+        max_length=Limits.MAX_LEN_LINK_SHORT_CODE,
+        unique=True,
+        verbose_name=_("Короткий код ссылки"),
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Дата создания")
+    )
+
+    class Meta:
+        verbose_name = _("Свободный короткий код")
+        verbose_name_plural = _("Пул свободных коротких кодов")
+        db_table = "links_short_code_pool"
+
+    def __str__(self):
+        return self.short
+
+
+class ShortCodeQuarantine(models.Model):
+    """Сгенерированный код удалённой ссылки на карантине.
+
+    После release_at код переносится в пул свободных кодов
+    (refill_short_code_pool) и выдаётся раньше новых случайных.
+    """
+
+    short = models.CharField(
+        max_length=Limits.MAX_LEN_LINK_SHORT_CODE,
+        unique=True,
+        verbose_name=_("Короткий код ссылки"),
+    )
+    release_at = models.DateTimeField(
+        db_index=True, verbose_name=_("Дата окончания карантина")
+    )
+
+    class Meta:
+        verbose_name = _("Код на карантине")
+        verbose_name_plural = _("Коды на карантине")
+        db_table = "links_short_code_quarantine"
+
+    def __str__(self):
+        return f"{self.short} until {self.release_at}"
+
+
+class ShortCodeSequence(models.Model):
+    """Последовательность номеров для генерации коротких кодов.
+
+    Номер новой ссылки - первичный ключ новой строки (на PostgreSQL
+    nextval последовательности ключа без вставки).
+    """
+
+    class Meta:
+        verbose_name = _("Номер короткого кода")
+        verbose_name_plural = _("Последовательность коротких кодов")
+        db_table = "links_short_code_sequence"
+
+    def __str__(self):
+        return str(self.pk)
+
+
+class ClickEvent(models.Model):
+    """Событие перехода по короткой ссылке (журнал только на добавление)"""
+
+    link = models.ForeignKey(
+        ShortLink,
+        on_delete=models.CASCADE,
+        verbose_name=_("Короткая ссылка"),
+        related_name="click_events",
+        db_index=False,  # покрывается индексом (link, clicked_at)
+    )
+    clicked_at = models.DateTimeField(verbose_name=_("Время перехода"))
+    referrer = models.CharField(
+        max_length=Limits.MAX_LEN_ORIGINAL_LINK,
+        blank=True,
+        verbose_name=_("Источник перехода"),
+    )
+    user_agent_hash = models.CharField(
+        max_length=Limits.LEN_CLICK_EVENT_HASH,
+        blank=True,
+        verbose_name=_("Хэш user agent"),
+    )
+    ip_hash = models.CharField(
+        max_length=Limits.LEN_CLICK_EVENT_HASH,
+        blank=True,
+        verbose_name=_("Хэш IP адреса"),
+    )
+
+    class Meta:
+        verbose_name = _("Переход по ссылке")
+        verbose_name_plural = _("Переходы по ссылкам")
+        db_table = "links_click_event"
+        indexes = [
+            models.Index(
+                name="click_event_link_time_idx",
+                fields=["link", "clicked_at"],
+            )
+        ]
+
+    def __str__(self):
+        return f"link: {self.link_id} clicked at: {self.clicked_at}"
 
 
 # КАМПАНИИ ДЛЯ ГРУПП. ПОКА НЕ РЕАЛИЗОВАНЫ ИЗ-ЗА СОМНЕНИЯ В НЕОБХОДИМОСТИ
@@ -0,0 +1,230 @@
+import math
+import time
+import hashlib
+import threading
+
+
+class BloomFilter:
+    """
+    Фильтр Блума для строк.
+
+    Размер битового массива и количество хэш-функций подбираются
+    по ожидаемому количеству элементов и допустимой доле ложных
+    срабатываний. Отрицательный ответ всегда точный.
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        capacity = max(capacity, 1)
+
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.size = math.ceil(
+            -capacity * math.log(fp_rate) / (math.log(2) ** 2)
+        )
+        self.hashes_amount = max(1, round(self.size / capacity * math.log(2)))
+        self.items = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        """Позиции битов по двойному хэшированию blake2b"""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+
+        for i in range(self.hashes_amount):
+            yield (first + i * second) % self.size
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def estimated_fp_rate(self) -> float:
+        """Ожидаемая доля ложных срабатываний при текущем заполнении"""
+        return (
+            1 - math.exp(-self.hashes_amount * self.items / self.size)
+        ) ** self.hashes_amount
+
+
+class ShortCodeBloom:
+    """
+    Фильтр Блума всех существующих коротких кодов.
+
+    Строится один раз при старте воркера (warm_up_redirects) потоковым
+    чтением кодов из БД, новые коды процесса добавляются сигналом.
+
+    Отрицательный ответ даётся из памяти. Коды, созданные другими
+    воркерами, догружаются промахом не чаще раза в reload_interval
+    секунд: перечитываются строки с pk больше low-water mark -
+    наибольшего прочитанного pk минус reload_overlap. Так подгружаются
+    и строки с меньшим pk, закоммиченные позже строк с большим
+    (параллельные транзакции, ключ SHORT_CODE_DECODABLE). Код другого
+    воркера может отсекаться до reload_interval секунд после создания.
+    """
+
+    # Запас ёмкости при построении, чтобы доля ложных срабатываний
+    # не росла сразу после старта
+    capacity_reserve = 2
+    min_capacity = 100_000
+    chunk_size = 10_000
+
+    def __init__(
+        self,
+        model_link,
+        fp_rate: float,
+        reload_overlap: int,
+        reload_interval: float,
+    ):
+        """
+        :param reload_overlap: сколько последних pk перечитывать при
+            догрузке, больше числа одновременно вставляемых ссылок
+        :param reload_interval: минимальный интервал догрузок, секунды
+        """
+        self.model_link = model_link
+        self.fp_rate = fp_rate
+        self.reload_overlap = reload_overlap
+        self.reload_interval = reload_interval
+
+        self.rejected = 0
+        self.reloads = 0
+        self._filter: BloomFilter | None = None
+        self._last_pk = 0
+        # Время начала последней завершённой догрузки
+        self._reloaded_at = 0.0
+        # Коды, добавленные во время построения нового фильтра
+        self._pending: list[str] | None = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def _codes_after(self, last_pk: int):
+        """Пары (pk, код) строк с pk больше last_pk"""
+        return (
+            self.model_link.objects.filter(pk__gt=last_pk)
+            .order_by()
+            .values_list("pk", "short")
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+    def _load(self, bloom: BloomFilter, last_pk: int) -> int:
+        """Добавить в фильтр коды с pk больше last_pk"""
+        for pk, short in self._codes_after(last_pk):
+            bloom.add(short)
+            last_pk = max(last_pk, pk)
+
+        return last_pk
+
+    def _build(self):
+        """Построение под _build_lock. Коды, добавленные add()
+        во время чтения, переносятся в новый фильтр."""
+        with self._lock:
+            self._pending = []
+
+        started = time.monotonic()
+        capacity = max(
+            self.model_link.objects.count() * self.capacity_reserve,
+            self.min_capacity,
+        )
+        bloom = BloomFilter(capacity, self.fp_rate)
+        last_pk = self._load(bloom, 0)
+
+        with self._lock:
+            for short in self._pending:
+                bloom.add(short)
+
+            self._pending = None
+            self._filter = bloom
+            self._last_pk = max(self._last_pk, last_pk)
+            self._reloaded_at = started
+
+    def build(self):
+        """Построить фильтр по всем кодам в БД и подменить текущий"""
+        with self._build_lock:
+            self._build()
+
+    def ensure_built(self):
+        """Построить фильтр, если он ещё не построен (один раз
+        на процесс, одновременные вызовы ждут одно построение)"""
+        if self._filter is None:
+            with self._build_lock:
+                if self._filter is None:
+                    self._build()
+
+    def _reload_due(self) -> bool:
+        return time.monotonic() - self._reloaded_at >= self.reload_interval
+
+    def _reload(self):
+        """Догрузить коды других воркеров. Чтение из БД идёт без _lock,
+        чтобы не задерживать add(). Пока идёт догрузка, другие промахи
+        отвечают из памяти"""
+        if not self._reload_lock.acquire(blocking=False):
+            return
+
+        try:
+            if not self._reload_due():
+                return
+
+            started = time.monotonic()
+            low_water = max(self._last_pk - self.reload_overlap, 0)
+            rows = list(self._codes_after(low_water))
+
+            with self._lock:
+                for pk, short in rows:
+                    self._filter.add(short)
+                    self._last_pk = max(self._last_pk, pk)
+
+                self._reloaded_at = started
+                self.reloads += 1
+                overfilled = self._filter.items > self._filter.capacity
+        finally:
+            self._reload_lock.release()
+
+        if overfilled:
+            self.build()
+
+    def might_exist(self, short: str) -> bool:
+        """False, если кода точно нет в БД"""
+        self.ensure_built()
+
+        if short in self._filter:
+            return True
+
+        if self._reload_due():
+            self._reload()
+            if short in self._filter:
+                return True
+
+        self.rejected += 1
+        return False
+
+    def add(self, short: str):
+        """Добавить новый код, если фильтр уже построен или строится"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(short)
+
+            if self._pending is not None:
+                self._pending.append(short)
+
+    def stats(self) -> dict:
+        """Параметры фильтра и доля ложных срабатываний"""
+        if self._filter is None:
+            return {"built": False, "fp_rate": self.fp_rate}
+
+        return {
+            "built": True,
+            "fp_rate": self.fp_rate,
+            "estimated_fp_rate": self._filter.estimated_fp_rate(),
+            "items": self._filter.items,
+            "capacity": self._filter.capacity,
+            "size_bits": self._filter.size,
+            "hashes_amount": self._filter.hashes_amount,
+            "rejected": self.rejected,
+            "reloads": self.reloads,
+        }
@@ -0,0 +1,201 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from django.db import DatabaseError, connection
+from django.db.models import (
+    F,
+    Case,
+    When,
+    Value,
+    DateTimeField,
+    PositiveIntegerField,
+)
+
+from .last_clicked import LastClickedThrottle
+
+
+logger = logging.getLogger(__name__)
+
+# Количество ссылок в одном UPDATE, чтобы не упереться
+# в лимит параметров запроса
+CLICKS_CHUNK_SIZE = 500
+
+
+def apply_clicks(
+    model_link, clicks: dict[int, list], chunk_size: int = CLICKS_CHUNK_SIZE
+):
+    """Добавить клики к ссылкам пакетно.
+
+    UPDATE ... SET clicks_count = clicks_count + CASE ... END,
+    last_clicked_at = CASE ... END WHERE id IN (...)
+
+    :param clicks: pk ссылки -> [количество кликов, время последнего].
+        Время None оставляет last_clicked_at без изменений
+    """
+    links_ids = list(clicks)
+
+    for start in range(0, len(links_ids), chunk_size):
+        chunk = links_ids[start : start + chunk_size]
+        fields = {}
+
+        if any(clicks[pk][0] for pk in chunk):
+            fields["clicks_count"] = F("clicks_count") + Case(
+                *(When(pk=pk, then=Value(clicks[pk][0])) for pk in chunk),
+                default=Value(0),
+                output_field=PositiveIntegerField(),
+            )
+
+        if any(clicks[pk][1] for pk in chunk):
+            fields["last_clicked_at"] = Case(
+                *(
+                    When(pk=pk, then=Value(clicks[pk][1]))
+                    for pk in chunk
+                    if clicks[pk][1] is not None
+                ),
+                default=F("last_clicked_at"),
+                output_field=DateTimeField(),
+            )
+
+        if fields:
+            model_link.objects.filter(pk__in=chunk).update(**fields)
+
+
+class ClickBuffer:
+    """
+    Буфер переходов по ссылкам с отложенной пакетной записью.
+
+    Клики копятся в памяти процесса по pk ссылки и сбрасываются в БД
+    одним UPDATE ... CASE раз в flush_interval_ms или после
+    flush_max_events переходов. Максимальная потеря при падении
+    процесса ограничена этими же значениями.
+    """
+
+    chunk_size = CLICKS_CHUNK_SIZE
+
+    def __init__(
+        self,
+        model_link,
+        flush_interval_ms: int,
+        flush_max_events: int,
+        flush_on_shutdown: bool = True,
+        throttle: LastClickedThrottle | None = None,
+    ):
+        self.model_link = model_link
+        self.throttle = throttle
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_max_events = flush_max_events
+
+        self._lock = threading.Lock()
+        self._clicks: dict[int, list] = {}  # pk -> [count, last_clicked_at]
+        self._events = 0
+        self._pid = None
+
+        if flush_on_shutdown:
+            atexit.register(self.flush)
+
+    def _ensure_flusher(self):
+        """Запуск фонового потока сброса (в т.ч. после fork воркера)"""
+        if self._pid == os.getpid():
+            return
+
+        # Клики родительского процесса досчитает сам родитель
+        self._clicks.clear()
+        self._events = 0
+        self._pid = os.getpid()
+
+        threading.Thread(
+            target=self._run, name="click-buffer-flusher", daemon=True
+        ).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except DatabaseError:
+                logger.exception("Ошибка при сбросе буфера кликов")
+            finally:
+                connection.close()
+
+    def add(self, link_id: int, clicked_at: datetime):
+        """Учесть переход по ссылке"""
+        with self._lock:
+            self._ensure_flusher()
+
+            counter = self._clicks.setdefault(link_id, [0, clicked_at])
+            counter[0] += 1
+            counter[1] = max(counter[1], clicked_at)
+            self._events += 1
+
+            flush_now = self._events >= self.flush_max_events
+
+        if flush_now:
+            self.flush()
+
+    def pending(self) -> int:
+        """Количество ещё не записанных кликов"""
+        with self._lock:
+            return self._events
+
+    def flush(self) -> int:
+        """Записать накопленные клики в БД.
+
+        :returns amount: количество ссылок, обновлённых в БД
+        """
+        with self._lock:
+            clicks, self._clicks = self._clicks, {}
+            self._events = 0
+
+        if not clicks and self.throttle is None:
+            return 0
+
+        updates = self._throttled(clicks) if self.throttle else clicks
+
+        if not updates:
+            return 0
+
+        try:
+            apply_clicks(self.model_link, updates, self.chunk_size)
+        except DatabaseError:
+            self._restore(clicks)
+            if self.throttle is not None:
+                # take() и pop_due() уже сняли время с учёта
+                self.throttle.restore(
+                    {
+                        link_id: clicked_at
+                        for link_id, (_, clicked_at) in updates.items()
+                        if clicked_at is not None
+                    }
+                )
+            raise
+
+        return len(updates)
+
+    def _restore(self, clicks: dict[int, list]):
+        """Вернуть в буфер клики, которые не удалось записать"""
+        with self._lock:
+            for link_id, (count, clicked_at) in clicks.items():
+                counter = self._clicks.setdefault(link_id, [0, clicked_at])
+                counter[0] += count
+                counter[1] = max(counter[1], clicked_at)
+                self._events += count
+
+    def _throttled(self, clicks: dict[int, list]) -> dict[int, list]:
+        """Клики с учётом LAST_CLICKED_INTERVAL.
+
+        Время пишется только у ссылок с прошедшим интервалом, к ним
+        добавляется отложенное время кликов из прошлых сбросов.
+        """
+        updates = {
+            link_id: [count, self.throttle.take(link_id, clicked_at)]
+            for link_id, (count, clicked_at) in clicks.items()
+        }
+
+        for link_id, clicked_at in self.throttle.pop_due().items():
+            updates.setdefault(link_id, [0, clicked_at])
+
+        return updates
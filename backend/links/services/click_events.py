@@ -0,0 +1,198 @@
+import os
+import queue
+import atexit
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+from django.db import connection
+from django.conf import settings
+
+from core.enums import Limits
+from links.conf import get_links_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+def hash_click_value(value: str) -> str:
+    """Хэш user agent или IP с ключом из SECRET_KEY"""
+    if not value:
+        return ""
+
+    return hashlib.blake2b(
+        value.encode(),
+        key=settings.SECRET_KEY.encode()[:64],
+        digest_size=Limits.LEN_CLICK_EVENT_HASH // 2,
+    ).hexdigest()
+
+
+class ClickEventWriter:
+    """
+    Запись журнала переходов через очередь в памяти процесса.
+
+    Запрос только кладёт событие в очередь, фоновый поток собирает
+    события в пачки до batch_size и пишет их одним bulk_create.
+    При переполнении очереди события отбрасываются, а не тормозят
+    переход по ссылке.
+    """
+
+    def __init__(
+        self,
+        event_model,
+        queue_size: int,
+        batch_size: int,
+        flush_interval_ms: int,
+    ):
+        self.event_model = event_model
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._start_lock = threading.Lock()
+        self._pid = None
+
+        atexit.register(self.flush)
+
+    def _ensure_writer(self):
+        """Запуск фонового потока записи (в т.ч. после fork воркера)"""
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            threading.Thread(
+                target=self._run, name="click-events-writer", daemon=True
+            ).start()
+
+    def put(
+        self,
+        link_id: int,
+        clicked_at: datetime,
+        referrer: str = "",
+        user_agent: str = "",
+        ip: str = "",
+    ) -> bool:
+        """Поставить событие перехода в очередь на запись"""
+        self._ensure_writer()
+
+        try:
+            self._queue.put_nowait(
+                (link_id, clicked_at, referrer, user_agent, ip)
+            )
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+        return True
+
+    def _take_batch(self, timeout: float | None) -> list[tuple]:
+        """Забрать из очереди до batch_size событий"""
+        batch = []
+
+        try:
+            batch.append(self._queue.get(timeout=timeout))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        return batch
+
+    def _write(self, batch: list[tuple]):
+        self.event_model.objects.bulk_create(
+            [
+                self.event_model(
+                    link_id=link_id,
+                    clicked_at=clicked_at,
+                    referrer=referrer[: Limits.MAX_LEN_ORIGINAL_LINK],
+                    user_agent_hash=hash_click_value(user_agent),
+                    ip_hash=hash_click_value(ip),
+                )
+                for link_id, clicked_at, referrer, user_agent, ip in batch
+            ]
+        )
+
+    def _write_batch(self, batch: list[tuple]):
+        """Записать пачку и отметить события обработанными"""
+        try:
+            self._write(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch(timeout=self.flush_interval)
+            if not batch:
+                continue
+
+            try:
+                self._write_batch(batch)
+            except Exception:
+                logger.exception(
+                    "Ошибка записи журнала переходов, потеряно событий: %s",
+                    len(batch),
+                )
+                connection.close()
+
+    def flush(self) -> int:
+        """Синхронно записать всё, что сейчас лежит в очереди.
+
+        Дожидается и пачки, которую в этот момент пишет фоновый поток.
+
+        :returns amount: количество записанных этим вызовом событий
+        """
+        total = 0
+
+        while batch := self._take_batch(timeout=0):
+            self._write_batch(batch)
+            total += len(batch)
+
+        self._queue.join()
+
+        return total
+
+
+_writer: ClickEventWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_click_event_writer(event_model) -> ClickEventWriter:
+    """Очередь журнала переходов процесса, создаётся при первом обращении"""
+    global _writer
+
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = ClickEventWriter(
+                    event_model,
+                    queue_size=get_links_setting("CLICK_EVENTS_QUEUE_SIZE"),
+                    batch_size=get_links_setting("CLICK_EVENTS_BATCH_SIZE"),
+                    flush_interval_ms=get_links_setting(
+                        "CLICK_EVENTS_FLUSH_INTERVAL_MS"
+                    ),
+                )
+
+    return _writer
+
+
+def log_click_event(event_model, link_id: int, clicked_at, request) -> bool:
+    """Добавить переход в журнал, если он включён"""
+    if not get_links_setting("CLICK_EVENTS_ENABLED"):
+        return False
+
+    meta = request.META
+
+    return get_click_event_writer(event_model).put(
+        link_id,
+        clicked_at,
+        referrer=meta.get("HTTP_REFERER", ""),
+        user_agent=meta.get("HTTP_USER_AGENT", ""),
+        ip=meta.get("REMOTE_ADDR", ""),
+    )
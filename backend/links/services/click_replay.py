@@ -0,0 +1,99 @@
+import time
+import logging
+import threading
+from datetime import datetime
+
+from django.db import DatabaseError
+
+from .click_buffer import apply_clicks
+
+
+logger = logging.getLogger(__name__)
+
+
+class ClickReplayQueue:
+    """
+    Клики, которые не удалось записать из-за недоступности БД.
+
+    Клики копятся по pk ссылки, их общее количество ограничено
+    max_events, лишние отбрасываются. После первой успешной записи
+    клика, но не чаще раза в retry_interval секунд, накопленное
+    записывается одним пакетным UPDATE.
+    """
+
+    def __init__(self, model_link, max_events: int, retry_interval: float):
+        self.model_link = model_link
+        self.max_events = max_events
+        self.retry_interval = retry_interval
+
+        self.dropped = 0
+        self._clicks: dict[int, list] = {}  # pk -> [count, last_clicked_at]
+        self._events = 0
+        self._retried_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, link_id: int, clicked_at: datetime) -> bool:
+        """Отложить клик.
+
+        :returns queued: False, если очередь заполнена
+        """
+        with self._lock:
+            if self._events >= self.max_events:
+                self.dropped += 1
+                return False
+
+            counter = self._clicks.setdefault(link_id, [0, clicked_at])
+            counter[0] += 1
+            counter[1] = max(counter[1], clicked_at)
+            self._events += 1
+
+        return True
+
+    def pending(self) -> int:
+        """Количество отложенных кликов"""
+        with self._lock:
+            return self._events
+
+    def replay(self) -> int:
+        """Записать отложенные клики, если БД снова доступна.
+
+        :returns amount: количество обновлённых ссылок
+        """
+        with self._lock:
+            if (
+                not self._clicks
+                or time.monotonic() - self._retried_at < self.retry_interval
+            ):
+                return 0
+
+            clicks, self._clicks = self._clicks, {}
+            self._events = 0
+            self._retried_at = time.monotonic()
+
+        try:
+            apply_clicks(self.model_link, clicks)
+        except DatabaseError:
+            logger.exception("Ошибка при повторной записи кликов")
+            self._restore(clicks)
+            return 0
+
+        return len(clicks)
+
+    def _restore(self, clicks: dict[int, list]):
+        """Вернуть клики в очередь без учёта ограничения размера"""
+        with self._lock:
+            for link_id, (count, clicked_at) in clicks.items():
+                counter = self._clicks.setdefault(link_id, [0, clicked_at])
+                counter[0] += count
+                counter[1] = max(counter[1], clicked_at)
+                self._events += count
+
+    def stats(self) -> dict:
+        """Размер очереди и количество отброшенных кликов"""
+        with self._lock:
+            return {
+                "pending": self._events,
+                "links": len(self._clicks),
+                "max_events": self.max_events,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,80 @@
+from random import randrange
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Case, When, Value, PositiveIntegerField
+
+from .click_buffer import CLICKS_CHUNK_SIZE, apply_clicks
+
+
+def record_sharded_click(
+    shard_model, link_id: int, clicked_at: datetime, shards_count: int
+):
+    """Учёт перехода в случайном шарде счётчика ссылки"""
+    shard = randrange(shards_count)
+    shard_clicks = shard_model.objects.filter(link_id=link_id, shard=shard)
+
+    updated = shard_clicks.update(
+        clicks_count=F("clicks_count") + 1, last_clicked_at=clicked_at
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            shard_model.objects.create(
+                link_id=link_id,
+                shard=shard,
+                clicks_count=1,
+                last_clicked_at=clicked_at,
+            )
+    except IntegrityError:
+        # Шард успели создать параллельно
+        shard_clicks.update(
+            clicks_count=F("clicks_count") + 1, last_clicked_at=clicked_at
+        )
+
+
+def fold_click_shards(model_link, shard_model) -> int:
+    """Перенос накопленных в шардах кликов в ShortLink.clicks_count.
+
+    Из шардов вычитается ровно прочитанное значение, поэтому клики,
+    пришедшие во время переноса, останутся в шарде до следующего раза.
+    Запускать не более одного переноса одновременно.
+
+    :returns amount: количество обновлённых ссылок
+    """
+    shards = shard_model.objects.filter(clicks_count__gt=0).values_list(
+        "pk", "link_id", "clicks_count", "last_clicked_at"
+    )
+
+    clicks: dict[int, list] = {}
+    folded: dict[int, int] = {}
+
+    for shard_id, link_id, count, clicked_at in shards.iterator():
+        counter = clicks.setdefault(link_id, [0, clicked_at])
+        counter[0] += count
+        counter[1] = max(counter[1], clicked_at)
+        folded[shard_id] = count
+
+    if not clicks:
+        return 0
+
+    shards_ids = list(folded)
+
+    with transaction.atomic():
+        apply_clicks(model_link, clicks)
+
+        for start in range(0, len(shards_ids), CLICKS_CHUNK_SIZE):
+            chunk = shards_ids[start : start + CLICKS_CHUNK_SIZE]
+
+            shard_model.objects.filter(pk__in=chunk).update(
+                clicks_count=F("clicks_count")
+                - Case(
+                    *(When(pk=pk, then=Value(folded[pk])) for pk in chunk),
+                    default=Value(0),
+                    output_field=PositiveIntegerField(),
+                )
+            )
+
+    return len(clicks)
@@ -0,0 +1,241 @@
+import threading
+from datetime import datetime
+
+from django.db import DatabaseError
+from django.apps import apps
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.db.models import F
+
+from links.conf import get_links_setting
+
+from .click_buffer import ClickBuffer, apply_clicks
+from .click_replay import ClickReplayQueue
+from .click_shards import record_sharded_click
+from .last_clicked import LastClickedThrottle
+
+
+_click_buffer: ClickBuffer | None = None
+_click_buffer_lock = threading.Lock()
+_last_clicked_throttle: LastClickedThrottle | None = None
+_click_replay_queue: ClickReplayQueue | None = None
+
+
+def get_click_replay_queue(model_link) -> ClickReplayQueue | None:
+    """Очередь кликов, отложенных при недоступности БД, или None"""
+    global _click_replay_queue
+
+    if not get_links_setting("STALE_FALLBACK_ENABLED"):
+        return None
+
+    if _click_replay_queue is None:
+        with _click_buffer_lock:
+            if _click_replay_queue is None:
+                _click_replay_queue = ClickReplayQueue(
+                    model_link,
+                    max_events=get_links_setting("CLICK_REPLAY_MAX_EVENTS"),
+                    retry_interval=get_links_setting(
+                        "CLICK_REPLAY_RETRY_INTERVAL"
+                    ),
+                )
+
+    return _click_replay_queue
+
+
+def get_last_clicked_throttle() -> LastClickedThrottle | None:
+    """Ограничитель записи last_clicked_at или None, если выключен"""
+    global _last_clicked_throttle
+
+    interval = get_links_setting("LAST_CLICKED_INTERVAL")
+
+    if not interval:
+        return None
+
+    if _last_clicked_throttle is None:
+        _last_clicked_throttle = LastClickedThrottle(interval)
+
+    return _last_clicked_throttle
+
+
+def get_click_buffer(model_link) -> ClickBuffer:
+    """Буфер кликов процесса, создаётся при первом обращении"""
+    global _click_buffer
+
+    if _click_buffer is None:
+        with _click_buffer_lock:
+            if _click_buffer is None:
+                _click_buffer = ClickBuffer(
+                    model_link,
+                    flush_interval_ms=get_links_setting(
+                        "CLICK_BUFFER_FLUSH_INTERVAL_MS"
+                    ),
+                    flush_max_events=get_links_setting(
+                        "CLICK_BUFFER_FLUSH_MAX_EVENTS"
+                    ),
+                    flush_on_shutdown=get_links_setting(
+                        "CLICK_BUFFER_FLUSH_ON_SHUTDOWN"
+                    ),
+                    throttle=get_last_clicked_throttle(),
+                )
+
+    return _click_buffer
+
+
+def _click_update(link_id: int, clicked_at: datetime) -> tuple[dict, dict]:
+    """Поля UPDATE для клика и отложенное время кликов других ссылок.
+
+    С LAST_CLICKED_INTERVAL время клика пишется не чаще раза
+    в интервал, иначе обновляется только счётчик.
+    """
+    fields = {"clicks_count": F("clicks_count") + 1}
+    throttle = get_last_clicked_throttle()
+
+    if throttle is None:
+        fields["last_clicked_at"] = clicked_at
+        return fields, {}
+
+    last_clicked_at = throttle.take(link_id, clicked_at)
+
+    if last_clicked_at is not None:
+        fields["last_clicked_at"] = last_clicked_at
+
+    return fields, throttle.pop_due()
+
+
+def _restore_click_times(link_id: int, fields: dict, due: dict):
+    """Вернуть в ограничитель время кликов, снятое с учёта
+    _click_update, если клик не записан"""
+    throttle = get_last_clicked_throttle()
+
+    if throttle is None:
+        return
+
+    times = dict(due)
+
+    if "last_clicked_at" in fields:
+        times[link_id] = fields["last_clicked_at"]
+
+    if times:
+        throttle.restore(times)
+
+
+def _write_due(model_link, due: dict[int, datetime]):
+    """Запись отложенного времени кликов других ссылок.
+
+    Ошибка БД не считается ошибкой клика: сам клик уже записан,
+    а время возвращается в ограничитель и запишется позже.
+    """
+    if not due:
+        return
+
+    try:
+        apply_clicks(model_link, {pk: [0, ts] for pk, ts in due.items()})
+    except DatabaseError:
+        get_last_clicked_throttle().restore(due)
+
+
+def _write_click(model_link, link_id: int, clicked_at: datetime):
+    """Запись клика в шард счётчика или напрямую в ссылку"""
+    if get_links_setting("CLICK_SHARDS_ENABLED"):
+        record_sharded_click(
+            apps.get_model("links", "ShortLinkClickShard"),
+            link_id,
+            clicked_at,
+            shards_count=get_links_setting("CLICK_SHARDS_COUNT"),
+        )
+        return
+
+    fields, due = _click_update(link_id, clicked_at)
+
+    try:
+        model_link.objects.filter(pk=link_id).update(**fields)
+    except DatabaseError:
+        _restore_click_times(link_id, fields, due)
+        raise
+
+    _write_due(model_link, due)
+
+
+def record_click(model_link, link_id: int) -> datetime:
+    """Учёт перехода по ссылке.
+
+    Один UPDATE по первичному ключу без чтения строки и без full_clean():
+    clicks_count = clicks_count + 1, last_clicked_at = now().
+    Счётчик увеличивается на стороне БД, поэтому параллельные
+    переходы не теряются.
+
+    При включённом CLICK_BUFFER_ENABLED клик попадает в буфер процесса
+    и записывается в БД позже вместе с остальными. При включённом
+    CLICK_SHARDS_ENABLED клик пишется в случайный шард счётчика.
+    С LAST_CLICKED_INTERVAL last_clicked_at обновляется не при каждом
+    клике, а не чаще раза в интервал.
+
+    При STALE_FALLBACK_ENABLED клики, которые не удалось записать
+    из-за ошибки БД, откладываются и записываются после её восстановления.
+
+    :returns clicked_at: время перехода
+    """
+    clicked_at = timezone.now()
+
+    if get_links_setting("CLICK_BUFFER_ENABLED"):
+        try:
+            get_click_buffer(model_link).add(link_id, clicked_at)
+        except DatabaseError:
+            # Клик остался в буфере и будет записан следующим сбросом
+            if get_click_replay_queue(model_link) is None:
+                raise
+        return clicked_at
+
+    try:
+        _write_click(model_link, link_id, clicked_at)
+    except DatabaseError:
+        replay_queue = get_click_replay_queue(model_link)
+
+        if replay_queue is None:
+            raise
+        replay_queue.add(link_id, clicked_at)
+    else:
+        if _click_replay_queue is not None and _click_replay_queue.pending():
+            _click_replay_queue.replay()
+
+    return clicked_at
+
+
+async def arecord_click(model_link, link_id: int) -> datetime:
+    """Асинхронный вариант record_click.
+
+    Прямое увеличение счётчика идёт через async ORM, буфер и шарды
+    работают в потоке, так как могут синхронно писать в БД.
+    """
+    if get_links_setting("CLICK_BUFFER_ENABLED") or get_links_setting(
+        "CLICK_SHARDS_ENABLED"
+    ):
+        return await sync_to_async(record_click)(model_link, link_id)
+
+    clicked_at = timezone.now()
+    fields, due = _click_update(link_id, clicked_at)
+
+    try:
+        await model_link.objects.filter(pk=link_id).aupdate(**fields)
+    except DatabaseError:
+        _restore_click_times(link_id, fields, due)
+        replay_queue = get_click_replay_queue(model_link)
+
+        if replay_queue is None:
+            raise
+        replay_queue.add(link_id, clicked_at)
+    else:
+        if due:
+            await sync_to_async(_write_due)(model_link, due)
+
+        if _click_replay_queue is not None and _click_replay_queue.pending():
+            await sync_to_async(_click_replay_queue.replay)()
+
+    return clicked_at
+
+
+def get_click_replay_stats() -> dict | None:
+    """Состояние очереди отложенных кликов, если она создана"""
+    if _click_replay_queue is None:
+        return None
+    return _click_replay_queue.stats()
@@ -0,0 +1,111 @@
+import time
+import threading
+
+from django.db.models import Max, Count
+from django.db.models.functions import Length
+
+
+class AdaptiveCodeLength:
+    """
+    Длина случайных кодов по заполненности пространства кодов.
+
+    Заполненность (количество ссылок с кодом каждой длины) считается
+    по новым ссылкам с pk больше последнего прочитанного не чаще раза
+    в refresh_interval секунд, удалённые ссылки не вычитаются.
+    Выбирается наименьшая длина, при которой вероятность совпадения
+    случайного кода с существующим (occupied / base ** length)
+    не выше max_collision_rate.
+
+    Модель верна для равновероятных кодов (LinkHash). Попытки генерации
+    и повторы из-за занятых случайных кодов считаются всегда, доля
+    повторов отдаётся в метриках.
+    """
+
+    def __init__(
+        self,
+        model_link,
+        base_len: int,
+        min_length: int,
+        max_length: int,
+        max_collision_rate: float,
+        refresh_interval: float,
+    ):
+        self.model_link = model_link
+        self.base_len = base_len
+        self.min_length = min_length
+        self.max_length = max_length
+        self.max_collision_rate = max_collision_rate
+        self.refresh_interval = refresh_interval
+
+        self.occupancy: dict[int, int] = {}
+        self.attempts = 0
+        self.retries = 0
+        self._length = min_length
+        self._last_pk = 0
+        self._refreshed_at: float | None = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Добавить к заполненности коды новых ссылок"""
+        rows = (
+            self.model_link.objects.filter(pk__gt=self._last_pk)
+            .order_by()
+            .values(length=Length("short"))
+            .annotate(amount=Count("pk"), last_pk=Max("pk"))
+        )
+
+        for row in rows:
+            self.occupancy[row["length"]] = (
+                self.occupancy.get(row["length"], 0) + row["amount"]
+            )
+            self._last_pk = max(self._last_pk, row["last_pk"])
+
+        length = self.min_length
+        while (
+            length < self.max_length
+            and self.collision_rate(length) > self.max_collision_rate
+        ):
+            length += 1
+
+        self._length = length
+
+    def collision_rate(self, length: int) -> float:
+        """Вероятность, что случайный код длины length уже занят"""
+        return self.occupancy.get(length, 0) / self.base_len**length
+
+    def current_length(self) -> int:
+        """Длина для новых кодов, заполненность обновляется по интервалу"""
+        now = time.monotonic()
+
+        if (
+            self._refreshed_at is None
+            or now - self._refreshed_at >= self.refresh_interval
+        ):
+            with self._lock:
+                if (
+                    self._refreshed_at is None
+                    or now - self._refreshed_at >= self.refresh_interval
+                ):
+                    self._refresh()
+                    self._refreshed_at = now
+
+        return self._length
+
+    def record(self, attempts: int, retries: int):
+        """Учёт генерации: попытки и повторы из-за занятых кодов"""
+        with self._lock:
+            self.attempts += attempts
+            self.retries += retries
+
+    def stats(self) -> dict:
+        """Длина, заполненность и доля повторов генерации"""
+        return {
+            "length": self._length,
+            "occupancy": dict(self.occupancy),
+            "collision_rate": self.collision_rate(self._length),
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "retry_rate": self.retries / self.attempts
+            if self.attempts
+            else 0.0,
+        }
@@ -0,0 +1,200 @@
+from datetime import datetime
+
+from django.db import router, connections, transaction
+from django.utils import timezone
+
+from .word_filter import get_word_filter
+from .url_short_logic import LinkHash
+
+
+# Количество кодов в одном запросе short__in при проверке занятости
+CODES_CHUNK_SIZE = 1000
+# Пачек подряд без новых кодов до остановки пополнения
+REFILL_EMPTY_BATCHES = 3
+
+# Один запрос: выбранная строка удаляется и возвращается атомарно
+LEASE_SQL = (
+    "DELETE FROM {table} WHERE id = ("
+    "SELECT id FROM {table} ORDER BY id LIMIT 1{lock}"
+    ") RETURNING short"
+)
+# В PostgreSQL строка, заблокированная другим процессом, пропускается.
+# SQLite (3.35+) сериализует запись, блокировка строк не нужна
+POSTGRESQL_LEASE_LOCK = " FOR UPDATE SKIP LOCKED"
+
+
+def lease_short_code(pool_model) -> str | None:
+    """Забрать свободный код из пула.
+
+    Код удаляется из пула в той же операции, поэтому выдаётся
+    ровно одному вызывающему.
+
+    :returns short_code: None, если пул пуст
+    """
+    connection = connections[router.db_for_write(pool_model)]
+    lock = POSTGRESQL_LEASE_LOCK if connection.vendor == "postgresql" else ""
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            LEASE_SQL.format(
+                table=connection.ops.quote_name(pool_model._meta.db_table),
+                lock=lock,
+            )
+        )
+        row = cursor.fetchone()
+
+    return row[0] if row else None
+
+
+def taken_short_codes(
+    model_link, codes: list[str], quarantine_model=None
+) -> set[str]:
+    """Коды из списка, уже занятые ссылками.
+
+    :param quarantine_model: если передана, занятыми считаются и коды
+        на карантине
+    """
+    taken = set()
+
+    for start in range(0, len(codes), CODES_CHUNK_SIZE):
+        taken.update(
+            model_link.objects.filter(
+                short__in=codes[start : start + CODES_CHUNK_SIZE]
+            ).values_list("short", flat=True)
+        )
+
+    if quarantine_model is not None:
+        taken |= quarantined_short_codes(quarantine_model, codes)
+
+    return taken
+
+
+def quarantined_short_codes(quarantine_model, codes: list[str]) -> set[str]:
+    """Коды из списка, карантин которых ещё не истёк"""
+    now = timezone.now()
+    quarantined = set()
+
+    for start in range(0, len(codes), CODES_CHUNK_SIZE):
+        quarantined.update(
+            quarantine_model.objects.filter(
+                short__in=codes[start : start + CODES_CHUNK_SIZE],
+                release_at__gt=now,
+            ).values_list("short", flat=True)
+        )
+
+    return quarantined
+
+
+def quarantine_short_codes(
+    quarantine_model, codes: list[str], release_at: datetime
+):
+    """Поставить коды удалённых ссылок на карантин до release_at"""
+    quarantine_model.objects.bulk_create(
+        [
+            quarantine_model(short=short, release_at=release_at)
+            for short in codes
+        ],
+        batch_size=CODES_CHUNK_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def release_quarantined_codes(
+    quarantine_model, pool_model, model_link, limit: int, batch_size: int
+) -> int:
+    """Перенести в пул не больше limit кодов с истёкшим карантином.
+
+    Коды, занятые за время карантина (alias), снимаются с карантина
+    без переноса в пул.
+
+    :returns released: количество перенесённых в пул кодов
+    """
+    using = router.db_for_write(pool_model)
+    now = timezone.now()
+    released = 0
+
+    while released < limit:
+        rows = list(
+            quarantine_model.objects.filter(release_at__lte=now)
+            .order_by("release_at", "pk")
+            .values_list("pk", "short")[: min(batch_size, limit - released)]
+        )
+        if not rows:
+            break
+
+        codes = [short for _, short in rows]
+        free_codes = set(codes) - taken_short_codes(model_link, codes)
+
+        with transaction.atomic(using=using):
+            pool_model.objects.bulk_create(
+                [pool_model(short=short) for short in free_codes],
+                batch_size=CODES_CHUNK_SIZE,
+                ignore_conflicts=True,
+            )
+            quarantine_model.objects.filter(
+                pk__in=[pk for pk, _ in rows]
+            ).delete()
+
+        released += len(free_codes)
+
+    return released
+
+
+def refill_short_code_pool(
+    pool_model,
+    model_link,
+    target_size: int,
+    batch_size: int,
+    quarantine_model=None,
+) -> int:
+    """Дополнить пул свободными кодами до target_size.
+
+    Сначала в пул переносятся коды удалённых ссылок с истёкшим
+    карантином (если передан quarantine_model), остаток добирается
+    случайными кодами. Кандидаты генерируются пачками, занятые
+    ссылками отсеиваются запросами short__in, остальные
+    вставляются bulk_create.
+
+    :returns added: количество добавленных кодов
+    """
+    generator = LinkHash(code_filter=get_word_filter().is_allowed)
+    initial_size = pool_model.objects.count()
+    pool_size = initial_size
+    empty_batches = 0
+
+    if quarantine_model is not None and pool_size < target_size:
+        release_quarantined_codes(
+            quarantine_model,
+            pool_model,
+            model_link,
+            target_size - pool_size,
+            batch_size,
+        )
+        pool_size = pool_model.objects.count()
+
+    # Пачка без новых кодов бывает только при почти исчерпанном
+    # пространстве кодов, бесконечно повторять её нет смысла
+    while pool_size < target_size and empty_batches < REFILL_EMPTY_BATCHES:
+        amount = min(batch_size, target_size - pool_size)
+        candidates = generator.get_short_codes(amount)
+        free_codes = set(candidates) - taken_short_codes(
+            model_link, candidates, quarantine_model
+        )
+
+        pool_model.objects.bulk_create(
+            [pool_model(short=short) for short in free_codes],
+            batch_size=CODES_CHUNK_SIZE,
+            ignore_conflicts=True,
+        )
+
+        # ignore_conflicts не сообщает, сколько строк вставлено
+        new_size = pool_model.objects.count()
+        empty_batches = empty_batches + 1 if new_size == pool_size else 0
+        pool_size = new_size
+
+    return pool_size - initial_size
+
+
+def discard_pooled_code(pool_model, short: str):
+    """Убрать из пула код, занятый пользовательским alias"""
+    pool_model.objects.filter(short=short).delete()
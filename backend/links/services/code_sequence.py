@@ -0,0 +1,148 @@
+import os
+import threading
+from collections.abc import Callable
+
+from django.db import NotSupportedError, router, connections, transaction
+
+
+def next_sequence_id(sequence_model) -> int:
+    """Следующий номер последовательности коротких кодов.
+
+    На PostgreSQL номер берётся nextval из последовательности
+    первичного ключа без вставки строки, на остальных БД номером
+    служит первичный ключ новой строки sequence_model.
+    """
+    using = router.db_for_write(sequence_model)
+    connection = connections[using]
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id'))",
+                [sequence_model._meta.db_table],
+            )
+            return cursor.fetchone()[0]
+
+    return sequence_model.objects.using(using).create().pk
+
+
+def next_table_id(model) -> int:
+    """Зарезервировать следующий первичный ключ таблицы model до вставки.
+
+    На PostgreSQL ключ берётся nextval из последовательности первичного
+    ключа, на SQLite увеличивается счётчик AUTOINCREMENT в sqlite_sequence.
+    Строки, вставленные без ключа, получат следующие значения, поэтому
+    ключи не пересекаются.
+    """
+    using = router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [table]
+            )
+            return cursor.fetchone()[0]
+
+    if connection.vendor == "sqlite":
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = seq + 1 WHERE name = %s",
+                [table],
+            )
+            if not cursor.rowcount:
+                cursor.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) "
+                    f"SELECT %s, COALESCE(MAX(id), 0) + 1 FROM {table}",
+                    [table],
+                )
+            cursor.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = %s", [table]
+            )
+            return cursor.fetchone()[0]
+
+    raise NotSupportedError(
+        f"Резервирование ключа не поддерживается для {connection.vendor}"
+    )
+
+
+class IdBlockAllocator:
+    """
+    Выдача номеров кодов блоками по схеме hi/lo.
+
+    Одно обращение к последовательности (hi) резервирует за процессом
+    номера hi * block_size ... hi * block_size + block_size - 1, дальше
+    они выдаются из памяти. Неиспользованный остаток блока при
+    перезапуске теряется. При block_size = 1 номер совпадает
+    с номером последовательности. Размер блока можно только
+    увеличивать, иначе новые номера пересекутся с выданными.
+    """
+
+    def __init__(self, next_hi: Callable[[], int], block_size: int):
+        """
+        :param next_hi: получение следующего номера последовательности
+        :param block_size: количество номеров в блоке
+        """
+        if block_size < 1:
+            raise ValueError("block_size должен быть положительным")
+
+        self.next_hi = next_hi
+        self.block_size = block_size
+
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._next = 0
+        self._end = 0
+        self._blocks_reserved = 0
+
+    def _reserve(self):
+        """Зарезервировать новый блок, блокировка уже взята"""
+        hi = self.next_hi()
+        self._next = hi * self.block_size
+        self._end = self._next + self.block_size
+        self._blocks_reserved += 1
+
+    def _check_fork(self):
+        """Блок, полученный до fork, не должен выдаваться в двух процессах"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._next = self._end = 0
+
+    def next_id(self) -> int:
+        """Следующий номер из блока процесса"""
+        with self._lock:
+            self._check_fork()
+
+            if self._next >= self._end:
+                self._reserve()
+
+            link_id = self._next
+            self._next += 1
+
+        return link_id
+
+    def take(self, amount: int) -> list[int]:
+        """Несколько номеров подряд для пакетного создания ссылок"""
+        ids = []
+
+        with self._lock:
+            self._check_fork()
+
+            while len(ids) < amount:
+                if self._next >= self._end:
+                    self._reserve()
+
+                end = min(self._end, self._next + amount - len(ids))
+                ids.extend(range(self._next, end))
+                self._next = end
+
+        return ids
+
+    def stats(self) -> dict:
+        """Состояние текущего блока"""
+        return {
+            "block_size": self.block_size,
+            "blocks_reserved": self._blocks_reserved,
+            "left_in_block": self._end - self._next,
+        }
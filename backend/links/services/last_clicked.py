@@ -0,0 +1,92 @@
+import time
+import threading
+from datetime import datetime
+from collections import OrderedDict
+
+
+class LastClickedThrottle:
+    """
+    Ограничение записи last_clicked_at: не чаще раза в interval секунд
+    на ссылку в пределах процесса.
+
+    Время кликов между записями запоминается, самое новое из них
+    записывается со следующим обновлением счётчика после окончания
+    интервала.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+
+        # pk -> monotonic-время последней записи, от старых к новым
+        self._written: OrderedDict[int, float] = OrderedDict()
+        # pk -> самое новое незаписанное время клика
+        self._pending: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def take(self, link_id: int, clicked_at: datetime) -> datetime | None:
+        """Время клика, которое нужно записать сейчас.
+
+        :returns clicked_at: None, если интервал ещё не прошёл
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            written = self._written.get(link_id)
+
+            if written is not None and now - written < self.interval:
+                pending = self._pending.get(link_id)
+                if pending is None or pending < clicked_at:
+                    self._pending[link_id] = clicked_at
+                return None
+
+            pending = self._pending.pop(link_id, None)
+            self._written[link_id] = now
+            self._written.move_to_end(link_id)
+
+        return max(clicked_at, pending) if pending else clicked_at
+
+    def pop_due(self) -> dict[int, datetime]:
+        """Незаписанное время кликов ссылок, у которых прошёл интервал.
+
+        Старые записи о ссылках без ожидающих кликов удаляются,
+        поэтому память ограничена ссылками за последний интервал.
+        """
+        now = time.monotonic()
+        due = {}
+
+        with self._lock:
+            while self._written:
+                link_id, written = next(iter(self._written.items()))
+                if now - written < self.interval:
+                    break
+
+                del self._written[link_id]
+                pending = self._pending.pop(link_id, None)
+
+                if pending is not None:
+                    due[link_id] = pending
+                    self._written[link_id] = now
+
+        return due
+
+    def restore(self, times: dict[int, datetime]):
+        """Вернуть время кликов, которое не удалось записать.
+
+        Ссылки отмечаются как с прошедшим интервалом, время будет
+        записано со следующим сбросом или кликом.
+        """
+        due_at = time.monotonic() - self.interval
+
+        with self._lock:
+            for link_id, clicked_at in times.items():
+                pending = self._pending.get(link_id)
+                if pending is None or pending < clicked_at:
+                    self._pending[link_id] = clicked_at
+
+                self._written[link_id] = due_at
+                self._written.move_to_end(link_id, last=False)
+
+    def pending(self) -> int:
+        """Количество ссылок с незаписанным временем клика"""
+        with self._lock:
+            return len(self._pending)
@@ -0,0 +1,424 @@
+import logging
+import threading
+from typing import NamedTuple
+from pathlib import Path
+
+from django.db import DatabaseError
+from django.apps import apps
+from asgiref.sync import sync_to_async
+
+from links.conf import get_links_setting
+
+from .bloom import ShortCodeBloom
+from .clicks import get_click_replay_stats
+from .snapshot import (
+    forget_link,
+    remember_link,
+    aremember_link,
+    get_snapshot_link,
+    aget_snapshot_link,
+)
+from .short_links import decode_short_code
+from .shared_table import SharedLinkTable
+from .resolve_cache import LRUCache
+from .single_flight import SingleFlight, AsyncSingleFlight
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResolvedLink(NamedTuple):
+    """Минимальные данные ссылки, нужные для перехода"""
+
+    pk: int
+    original_link: str
+    is_active: bool
+
+
+_resolve_cache: LRUCache[ResolvedLink] | None = None
+_short_code_bloom: ShortCodeBloom | None = None
+_shared_link_table: SharedLinkTable | None = None
+_short_code_bloom_lock = threading.Lock()
+# Одновременные промахи по одному коду выполняют один запрос в БД
+_resolve_flight = SingleFlight()
+_aresolve_flight = AsyncSingleFlight()
+# Сколько переходов обслужено из снимка при недоступности БД
+_stale_served = 0
+
+
+def get_resolve_cache() -> LRUCache[ResolvedLink]:
+    """Кэш short -> ResolvedLink процесса"""
+    global _resolve_cache
+
+    if _resolve_cache is None:
+        _resolve_cache = LRUCache(
+            max_size=get_links_setting("RESOLVE_CACHE_SIZE"),
+            ttl_seconds=get_links_setting("RESOLVE_CACHE_TTL"),
+        )
+
+    return _resolve_cache
+
+
+def get_short_code_bloom(model_link) -> ShortCodeBloom:
+    """Фильтр Блума существующих кодов процесса"""
+    global _short_code_bloom
+
+    if _short_code_bloom is None:
+        with _short_code_bloom_lock:
+            if _short_code_bloom is None:
+                _short_code_bloom = ShortCodeBloom(
+                    model_link,
+                    fp_rate=get_links_setting("BLOOM_FILTER_FP_RATE"),
+                    reload_overlap=get_links_setting(
+                        "BLOOM_FILTER_RELOAD_OVERLAP"
+                    ),
+                    reload_interval=get_links_setting(
+                        "BLOOM_FILTER_RELOAD_INTERVAL"
+                    ),
+                )
+
+    return _short_code_bloom
+
+
+def warm_up_redirects():
+    """Подготовка пути перехода при старте воркера (wsgi.py, asgi.py).
+
+    Фильтр Блума строится до первого запроса. Если БД недоступна,
+    он будет построен первым переходом.
+    """
+    if not get_links_setting("BLOOM_FILTER_ENABLED"):
+        return
+
+    try:
+        get_short_code_bloom(
+            apps.get_model("links", "ShortLink")
+        ).ensure_built()
+    except DatabaseError:
+        logger.exception("Фильтр Блума не построен при старте")
+
+
+def get_shared_link_table() -> SharedLinkTable | None:
+    """Общая для воркеров узла таблица кодов или None, если выключена"""
+    global _shared_link_table
+
+    if not get_links_setting("SHARED_TABLE_ENABLED"):
+        return None
+
+    if _shared_link_table is None:
+        try:
+            _shared_link_table = SharedLinkTable(
+                get_links_setting("SHARED_TABLE_PATH"),
+                capacity=get_links_setting("SHARED_TABLE_CAPACITY"),
+                heap_size=get_links_setting("SHARED_TABLE_HEAP_SIZE"),
+                ttl=get_links_setting("SHARED_TABLE_TTL"),
+            )
+        except RuntimeError:
+            logger.warning("Общая таблица кодов недоступна на этой ОС")
+            return None
+
+    return _shared_link_table
+
+
+def rebuild_shared_link_table(model_link) -> int:
+    """Собрать таблицу по всем активным кодам и подменить текущую.
+
+    Изменения, записанные воркерами во время сборки, попадают в журнал
+    и переносятся в новый файл перед подменой.
+
+    :returns saved_amount: количество записанных кодов
+    """
+    table = SharedLinkTable(
+        get_links_setting("SHARED_TABLE_PATH"),
+        capacity=get_links_setting("SHARED_TABLE_CAPACITY"),
+        heap_size=get_links_setting("SHARED_TABLE_HEAP_SIZE"),
+    )
+    new_path = Path(f"{table.path}.new")
+    table.path.parent.mkdir(parents=True, exist_ok=True)
+    SharedLinkTable.create_file(new_path, table.capacity, table.heap_size)
+    table.begin_rebuild()
+
+    try:
+        rows = (
+            model_link.objects.filter(is_active=True)
+            .order_by()
+            .values_list("short", "pk", "original_link", "is_active")
+            .iterator(chunk_size=ShortCodeBloom.chunk_size)
+        )
+        saved_amount = SharedLinkTable(
+            new_path, table.capacity, table.heap_size
+        ).put_many(rows)
+
+        table.replace_with(new_path)
+    except BaseException:
+        table.abort_rebuild()
+        new_path.unlink(missing_ok=True)
+        raise
+
+    return saved_amount
+
+
+def update_shared_link(short: str, pk: int, original_link: str, active: bool):
+    """Записать изменения ссылки в общую таблицу"""
+    table = get_shared_link_table()
+
+    if table is not None:
+        try:
+            table.put(short, pk, original_link, active)
+        except OSError:
+            logger.exception("Ошибка записи в общую таблицу кодов")
+
+
+def delete_shared_link(short: str):
+    """Удалить код из общей таблицы"""
+    table = get_shared_link_table()
+
+    if table is not None:
+        try:
+            table.delete(short)
+        except OSError:
+            logger.exception("Ошибка записи в общую таблицу кодов")
+
+
+def register_short_code(short: str):
+    """Добавить новый код в фильтр Блума процесса"""
+    if _short_code_bloom is not None:
+        _short_code_bloom.add(short)
+
+
+def invalidate_resolved_link(short: str):
+    """Сбросить закэшированные данные перехода по коду"""
+    if _resolve_cache is not None:
+        _resolve_cache.invalidate(short)
+
+    if get_links_setting("STALE_FALLBACK_ENABLED"):
+        forget_link(short)
+
+
+def _decode_short_code(short: str) -> int | None:
+    """Первичный ключ из кода при SHORT_CODE_DECODABLE.
+
+    Декодированный ключ проверяется вместе с кодом: alias той же длины
+    тоже декодируется в какой-то ключ, для него поиск идёт по short.
+    """
+    if not get_links_setting("SHORT_CODE_DECODABLE"):
+        return None
+
+    return decode_short_code(short)
+
+
+def _resolve_from_db(model_link, short: str) -> ResolvedLink | None:
+    """Получить данные для перехода по короткому коду одним запросом.
+
+    Коды, которых точно нет по фильтру Блума, отсекаются без запроса.
+    """
+    if get_links_setting("BLOOM_FILTER_ENABLED") and not (
+        get_short_code_bloom(model_link).might_exist(short)
+    ):
+        return None
+
+    rows = model_link.objects.values_list("pk", "original_link", "is_active")
+    row = None
+    link_pk = _decode_short_code(short)
+
+    if link_pk is not None:
+        row = rows.filter(pk=link_pk, short=short).first()
+
+    if row is None:
+        try:
+            row = rows.get(short=short)
+        except model_link.DoesNotExist:
+            return None
+
+    link = ResolvedLink(*row)
+
+    if get_links_setting("STALE_FALLBACK_ENABLED"):
+        remember_link(short, link)
+
+    return link
+
+
+def _resolve_from_shared(model_link, short: str) -> ResolvedLink | None:
+    """Данные для перехода из общей таблицы узла, при промахе из БД.
+
+    Найденная в БД ссылка записывается в таблицу для других воркеров.
+    """
+    table = get_shared_link_table()
+
+    if table is None:
+        return _resolve_from_db(model_link, short)
+
+    try:
+        row = table.get(short)
+    except OSError:
+        logger.exception("Ошибка чтения общей таблицы кодов")
+        return _resolve_from_db(model_link, short)
+
+    if row is not None:
+        return ResolvedLink(*row)
+
+    link = _resolve_from_db(model_link, short)
+
+    if link is not None:
+        update_shared_link(short, *link)
+
+    return link
+
+
+def _resolve_miss(model_link, short: str) -> ResolvedLink | None:
+    """Промах кэша процесса: один запрос на код в потоках процесса"""
+    if not get_links_setting("RESOLVE_SINGLE_FLIGHT"):
+        return _resolve_from_shared(model_link, short)
+
+    return _resolve_flight.do(
+        short, lambda: _resolve_from_shared(model_link, short)
+    )
+
+
+async def _aresolve_from_db(model_link, short: str) -> ResolvedLink | None:
+    """Асинхронное получение данных для перехода одним запросом"""
+    rows = model_link.objects.values_list("pk", "original_link", "is_active")
+    row = None
+    link_pk = _decode_short_code(short)
+
+    if link_pk is not None:
+        row = await rows.filter(pk=link_pk, short=short).afirst()
+
+    if row is None:
+        try:
+            row = await rows.aget(short=short)
+        except model_link.DoesNotExist:
+            return None
+
+    link = ResolvedLink(*row)
+
+    if get_links_setting("STALE_FALLBACK_ENABLED"):
+        await aremember_link(short, link)
+
+    return link
+
+
+async def _aresolve_miss(model_link, short: str) -> ResolvedLink | None:
+    """Промах кэша процесса: один запрос на код в event loop.
+
+    Общая таблица и фильтр Блума синхронные (flock, догрузка из БД),
+    поэтому с ними поиск идёт в потоке, без них через async ORM.
+    """
+    if get_links_setting("SHARED_TABLE_ENABLED") or get_links_setting(
+        "BLOOM_FILTER_ENABLED"
+    ):
+        resolve = sync_to_async(_resolve_from_shared)
+    else:
+        resolve = _aresolve_from_db
+
+    if not get_links_setting("RESOLVE_SINGLE_FLIGHT"):
+        return await resolve(model_link, short)
+
+    return await _aresolve_flight.do(short, lambda: resolve(model_link, short))
+
+
+def resolve_short_code(model_link, short: str) -> ResolvedLink | None:
+    """Данные для перехода по коду.
+
+    Порядок поиска: кэш процесса, общая таблица узла, БД.
+    """
+    if not get_links_setting("RESOLVE_CACHE_ENABLED"):
+        return _resolve_miss(model_link, short)
+
+    cache = get_resolve_cache()
+    link = cache.get(short)
+
+    if link is None:
+        link = _resolve_miss(model_link, short)
+
+        if link is not None:
+            cache.set(short, link)
+
+    return link
+
+
+async def aresolve_short_code(model_link, short: str) -> ResolvedLink | None:
+    """Асинхронный вариант resolve_short_code"""
+    if not get_links_setting("RESOLVE_CACHE_ENABLED"):
+        return await _aresolve_miss(model_link, short)
+
+    cache = get_resolve_cache()
+    link = cache.get(short)
+
+    if link is None:
+        link = await _aresolve_miss(model_link, short)
+
+        if link is not None:
+            cache.set(short, link)
+
+    return link
+
+
+def _stale_link(row: tuple | None) -> ResolvedLink | None:
+    global _stale_served
+
+    if row is None:
+        return None
+
+    _stale_served += 1
+    return ResolvedLink(*row)
+
+
+def resolve_short_code_or_stale(
+    model_link, short: str
+) -> tuple[ResolvedLink | None, bool]:
+    """resolve_short_code с переходом на снимок при ошибке БД.
+
+    :returns link, stale: данные перехода и признак того,
+        что они взяты из снимка
+    """
+    try:
+        return resolve_short_code(model_link, short), False
+    except DatabaseError:
+        if not get_links_setting("STALE_FALLBACK_ENABLED"):
+            raise
+
+        link = _stale_link(get_snapshot_link(short))
+        if link is None:
+            raise
+
+        logger.warning("БД недоступна, переход %s из снимка", short)
+        return link, True
+
+
+async def aresolve_short_code_or_stale(
+    model_link, short: str
+) -> tuple[ResolvedLink | None, bool]:
+    """Асинхронный вариант resolve_short_code_or_stale"""
+    try:
+        return await aresolve_short_code(model_link, short), False
+    except DatabaseError:
+        if not get_links_setting("STALE_FALLBACK_ENABLED"):
+            raise
+
+        link = _stale_link(await aget_snapshot_link(short))
+        if link is None:
+            raise
+
+        logger.warning("БД недоступна, переход %s из снимка", short)
+        return link, True
+
+
+def get_redirect_stats() -> dict:
+    """Метрики компонентов пути перехода по ссылке"""
+    stats = {
+        "resolve_cache": get_resolve_cache().stats(),
+        "single_flight": _resolve_flight.stats(),
+        "async_single_flight": _aresolve_flight.stats(),
+    }
+
+    if _short_code_bloom is not None:
+        stats["bloom_filter"] = _short_code_bloom.stats()
+
+    if _shared_link_table is not None:
+        stats["shared_table"] = _shared_link_table.stats()
+
+    if get_links_setting("STALE_FALLBACK_ENABLED"):
+        stats["stale_served"] = _stale_served
+        stats["click_replay"] = get_click_replay_stats()
+
+    return stats
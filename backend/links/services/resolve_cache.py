@@ -0,0 +1,75 @@
+import time
+import threading
+from typing import Generic, TypeVar
+from collections import OrderedDict
+
+
+Value = TypeVar("Value")
+
+
+class LRUCache(Generic[Value]):
+    """
+    Ограниченный LRU-кэш с TTL в памяти процесса.
+
+    При переполнении вытесняется давно не использованная запись,
+    устаревшие по TTL записи удаляются при обращении.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, tuple[float, Value]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Value | None:
+        """Получить значение или None при промахе"""
+        with self._lock:
+            item = self._data.get(key)
+
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: str, value: Value):
+        """Сохранить значение"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+
+            if len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: str):
+        """Удалить запись из кэша"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Очистить кэш и счётчики"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Размер кэша и счётчики попаданий"""
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -9,3 +9,8 @@ class ShortCodeError(Exception):
             "Сгенерированный short code не "
             "соответствует регулярному выражению"
         )
+
+
+class ShortCodeSpaceExhaustedError(Exception):
+    def __str__(self):
+        return "Номера последовательности вышли за пространство кодов"
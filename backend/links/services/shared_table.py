@@ -0,0 +1,543 @@
+import os
+import json
+import mmap
+import time
+import struct
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from contextlib import suppress, contextmanager
+
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+# Заголовок: magic, версия, количество слотов, флаги, размер кучи,
+# занято в куче, занято слотов (вместе с удалёнными), удалённых слотов
+HEADER = struct.Struct("<4sIIIQQQQ")
+HEADER_SIZE = 64
+MAGIC = b"VQZT"
+VERSION = 2
+# Таблица заменена новой, читателям нужно переоткрыть файл
+FLAG_RETIRED = 1
+
+# Слот: seqlock-счётчик, состояние, активна ли ссылка, длина кода,
+# pk ссылки, смещение оригинальной ссылки в куче, время записи, код
+SLOT = struct.Struct("<IBBBxQQI32s")
+SLOT_EMPTY, SLOT_USED, SLOT_DELETED = 0, 1, 2
+
+# Запись в куче: длина и оригинальная ссылка в utf-8
+URL_LEN = struct.Struct("<H")
+MAX_URL_BYTES = 0xFFFF
+MAX_SHORT_BYTES = 32
+
+# Максимальная заполненность слотов для открытой адресации
+MAX_LOAD_FACTOR = 0.7
+# Сколько раз перечитать слот, который сейчас пишется
+MAX_READ_RETRIES = 100
+# Таблицу пора пересобрать: занята эта доля кучи или эта доля
+# слотов помечена удалёнными
+REBUILD_HEAP_LOAD = 0.9
+REBUILD_DELETED_LOAD = 0.2
+
+
+def _slot_hash(short: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(short.encode(), digest_size=8).digest(), "little"
+    )
+
+
+class SharedLinkTable:
+    """
+    Таблица short -> (pk, original_link, is_active) в memory-mapped файле.
+
+    Все воркеры узла отображают один файл, поэтому горячие коды лежат
+    в памяти один раз, а не в каждом процессе. Чтение без блокировок:
+    каждый слот защищён seqlock-счётчиком. Запись идёт под fcntl.flock,
+    то есть в каждый момент пишет только один процесс. Оригинальные
+    ссылки дописываются в кучу и не меняются, поэтому их чтение
+    безопасно без блокировок.
+
+    Куча только растёт, а удалённые слоты остаются в цепочках поиска
+    до пересборки (build_shared_link_table). Когда куча или удалённые
+    слоты переходят порог, в лог пишется предупреждение, а stats()
+    отдаёт needs_rebuild и количество незаписанных кодов.
+
+    Запись старше ttl секунд считается промахом: изменения ссылок,
+    прошедшие мимо сигналов (update(), другой узел), видны не позже
+    чем через ttl. Пока идёт пересборка, запись дублируется в журнал,
+    который переносится в новый файл перед подменой.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        capacity: int,
+        heap_size: int,
+        ttl: int | None = None,
+    ):
+        if fcntl is None:
+            raise RuntimeError("SharedLinkTable требует fcntl (POSIX)")
+
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.journal_path = self.path.with_name(self.path.name + ".journal")
+        self.capacity = capacity
+        self.heap_size = heap_size
+        self.ttl = ttl
+
+        self.rejected = 0
+        self._mm: mmap.mmap | None = None
+        self._open_lock = threading.Lock()
+        # Предупреждение о пересборке уже записано для текущего файла
+        self._warned = False
+
+    # ОТКРЫТИЕ И СОЗДАНИЕ ФАЙЛА
+
+    @contextmanager
+    def _writer_lock(self):
+        """Эксклюзивная блокировка записи между процессами узла"""
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def create_file(path: Path, capacity: int, heap_size: int):
+        """Создать пустую таблицу (файл разреженный).
+
+        Файл собирается рядом и подменяется атомарно, чтобы читатели
+        не увидели его без заголовка.
+        """
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        total = HEADER_SIZE + capacity * SLOT.size + heap_size
+
+        with open(tmp_path, "wb") as file:
+            file.truncate(total)
+            file.write(
+                HEADER.pack(MAGIC, VERSION, capacity, 0, heap_size, 0, 0, 0)
+            )
+
+        os.replace(tmp_path, path)
+
+    def _open(self, locked: bool = False) -> mmap.mmap:
+        """Отображение актуального файла таблицы.
+
+        :param locked: блокировка записи уже взята этим процессом
+        """
+        with self._open_lock:
+            if self._mm is not None and not self._retired(self._mm):
+                return self._mm
+
+            if not self.path.exists():
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+
+                if locked:
+                    self.create_file(self.path, self.capacity, self.heap_size)
+                else:
+                    with self._writer_lock():
+                        if not self.path.exists():
+                            self.create_file(
+                                self.path, self.capacity, self.heap_size
+                            )
+
+            with open(self.path, "r+b") as file:
+                mm = mmap.mmap(file.fileno(), 0)
+
+            magic, version, capacity, _, heap_size, *_ = HEADER.unpack_from(
+                mm, 0
+            )
+            if magic != MAGIC:
+                mm.close()
+                raise RuntimeError(f"{self.path} не является таблицей ссылок")
+
+            if version != VERSION:
+                # Файл от прошлой версии: заменяем пустым
+                mm.close()
+                if locked:
+                    self._recreate_file(version)
+                else:
+                    with self._writer_lock():
+                        self._recreate_file(version)
+
+                with open(self.path, "r+b") as file:
+                    mm = mmap.mmap(file.fileno(), 0)
+                capacity, heap_size = self.capacity, self.heap_size
+
+            if self._mm is not None:
+                self._close(self._mm)
+
+            self.capacity = capacity
+            self.heap_size = heap_size
+            self._mm = mm
+            self._warned = False
+            return mm
+
+    def _recreate_file(self, version: int):
+        """Заменить файл другой версии, блокировка записи уже взята"""
+        with open(self.path, "r+b") as file:
+            mm = mmap.mmap(file.fileno(), 0)
+
+        try:
+            if HEADER.unpack_from(mm, 0)[1] == version:
+                self.create_file(self.path, self.capacity, self.heap_size)
+                self._retire(mm)
+        finally:
+            mm.close()
+
+    @staticmethod
+    def _retire(mm: mmap.mmap):
+        """Пометить файл выведенным из работы"""
+        header = list(HEADER.unpack_from(mm, 0))
+        header[3] |= FLAG_RETIRED
+        HEADER.pack_into(mm, 0, *header)
+
+    @staticmethod
+    def _close(mm: mmap.mmap):
+        """Закрыть отображение выведенного файла. Если другой поток
+        сейчас читает его буфер, отображение закроет сборщик мусора"""
+        with suppress(BufferError):
+            mm.close()
+
+    @staticmethod
+    def _retired(mm: mmap.mmap) -> bool:
+        return bool(HEADER.unpack_from(mm, 0)[3] & FLAG_RETIRED)
+
+    def _slot_offset(self, index: int) -> int:
+        return HEADER_SIZE + index * SLOT.size
+
+    def _heap_offset(self) -> int:
+        return HEADER_SIZE + self.capacity * SLOT.size
+
+    # ЧТЕНИЕ
+
+    def _read_slot(self, mm: mmap.mmap, offset: int) -> tuple | None:
+        """Согласованное чтение слота по seqlock"""
+        for _ in range(MAX_READ_RETRIES):
+            before = SLOT.unpack_from(mm, offset)
+            if before[0] & 1:
+                continue
+            if SLOT.unpack_from(mm, offset)[0] == before[0]:
+                return before
+        return None
+
+    def _read_url(self, mm: mmap.mmap, url_offset: int) -> str:
+        start = self._heap_offset() + url_offset
+        (length,) = URL_LEN.unpack_from(mm, start)
+        start += URL_LEN.size
+        return mm[start : start + length].decode()
+
+    def get(self, short: str) -> tuple[int, str, bool] | None:
+        """(pk, original_link, is_active) или None, если кода нет"""
+        try:
+            return self._get(self._open(), short)
+        except ValueError:
+            # Отображение закрыто другим потоком после подмены файла
+            return self._get(self._open(), short)
+
+    def _get(self, mm: mmap.mmap, short: str) -> tuple | None:
+        encoded = short.encode()
+        index = _slot_hash(short) % self.capacity
+
+        for probe in range(self.capacity):
+            slot = self._read_slot(
+                mm, self._slot_offset((index + probe) % self.capacity)
+            )
+            if slot is None:
+                return None
+
+            _, state, active, short_len, pk, url_offset, stored_at, code = slot
+
+            if state == SLOT_EMPTY:
+                return None
+
+            if state == SLOT_USED and code[:short_len] == encoded:
+                if self.ttl and time.time() - stored_at > self.ttl:
+                    return None
+                return pk, self._read_url(mm, url_offset), bool(active)
+
+        return None
+
+    # ЗАПИСЬ
+
+    def _write_slot(self, mm: mmap.mmap, offset: int, *fields):
+        """Запись слота: нечётный seq на время записи"""
+        seq = SLOT.unpack_from(mm, offset)[0]
+        struct.pack_into("<I", mm, offset, seq + 1)
+        SLOT.pack_into(mm, offset, seq + 1, *fields)
+        struct.pack_into("<I", mm, offset, seq + 2)
+
+    def _find_slot(self, mm: mmap.mmap, encoded: bytes, index: int):
+        """Смещение слота с этим кодом или первого свободного"""
+        free_offset = None
+
+        for probe in range(self.capacity):
+            offset = self._slot_offset((index + probe) % self.capacity)
+            _, state, _, short_len, _, _, _, code = SLOT.unpack_from(
+                mm, offset
+            )
+
+            if state == SLOT_USED and code[:short_len] == encoded:
+                return offset, True
+            if state == SLOT_DELETED and free_offset is None:
+                free_offset = offset
+            if state == SLOT_EMPTY:
+                return free_offset or offset, False
+
+        return free_offset, False
+
+    def _put(
+        self,
+        mm: mmap.mmap,
+        short: str,
+        pk: int,
+        original_link: str,
+        is_active: bool,
+    ) -> bool:
+        """Запись кода, блокировка записи уже взята"""
+        encoded = short.encode()
+        url = original_link.encode()
+
+        if len(encoded) > MAX_SHORT_BYTES or len(url) > MAX_URL_BYTES:
+            return False
+
+        _, _, capacity, flags, heap_size, heap_used, items, deleted = (
+            HEADER.unpack_from(mm, 0)
+        )
+
+        offset, exists = self._find_slot(
+            mm, encoded, _slot_hash(short) % capacity
+        )
+        if offset is None:
+            return False
+
+        # Слот удалённого кода уже учтён в items
+        reused = not exists and SLOT.unpack_from(mm, offset)[1] == SLOT_DELETED
+
+        if exists:
+            # Та же ссылка: меняется только флаг активности
+            _, _, _, _, old_pk, url_offset, _, _ = SLOT.unpack_from(mm, offset)
+            if old_pk == pk and self._read_url(mm, url_offset) == (
+                original_link
+            ):
+                self._write_slot(
+                    mm,
+                    offset,
+                    SLOT_USED,
+                    int(is_active),
+                    len(encoded),
+                    pk,
+                    url_offset,
+                    int(time.time()),
+                    encoded,
+                )
+                return True
+        elif not reused and items + 1 > capacity * MAX_LOAD_FACTOR:
+            return False
+
+        entry_size = URL_LEN.size + len(url)
+        if heap_used + entry_size > heap_size:
+            return False
+
+        heap_start = self._heap_offset() + heap_used
+        URL_LEN.pack_into(mm, heap_start, len(url))
+        mm[heap_start + URL_LEN.size : heap_start + entry_size] = url
+
+        self._write_slot(
+            mm,
+            offset,
+            SLOT_USED,
+            int(is_active),
+            len(encoded),
+            pk,
+            heap_used,
+            int(time.time()),
+            encoded,
+        )
+        HEADER.pack_into(
+            mm,
+            0,
+            MAGIC,
+            VERSION,
+            capacity,
+            flags,
+            heap_size,
+            heap_used + entry_size,
+            items + (0 if exists or reused else 1),
+            deleted - reused,
+        )
+        return True
+
+    def _needs_rebuild(self, mm: mmap.mmap) -> bool:
+        _, _, capacity, _, heap_size, heap_used, _, deleted = (
+            HEADER.unpack_from(mm, 0)
+        )
+        return (
+            heap_used > heap_size * REBUILD_HEAP_LOAD
+            or deleted > capacity * REBUILD_DELETED_LOAD
+        )
+
+    def _check_load(self, mm: mmap.mmap, saved: bool):
+        """Учёт незаписанных кодов и предупреждение о пересборке"""
+        if not saved:
+            self.rejected += 1
+
+        if not self._warned and (not saved or self._needs_rebuild(mm)):
+            self._warned = True
+            logger.warning(
+                "Общая таблица кодов %s заполняется, нужна пересборка "
+                "командой build_shared_link_table: %s",
+                self.path,
+                self._stats(mm),
+            )
+
+    def put(
+        self, short: str, pk: int, original_link: str, is_active: bool
+    ) -> bool:
+        """Добавить или обновить код.
+
+        :returns saved: False, если таблица заполнена
+        """
+        with self._writer_lock():
+            self._journal("put", short, pk, original_link, is_active)
+            mm = self._open(locked=True)
+            saved = self._put(mm, short, pk, original_link, is_active)
+            self._check_load(mm, saved)
+
+        return saved
+
+    def put_many(self, rows) -> int:
+        """Записать коды под одной блокировкой.
+
+        :param rows: итерируемое (short, pk, original_link, is_active)
+        :returns saved_amount: количество записанных кодов
+        """
+        saved_amount = 0
+
+        with self._writer_lock():
+            mm = self._open(locked=True)
+
+            for row in rows:
+                saved = self._put(mm, *row)
+                saved_amount += saved
+                self._check_load(mm, saved)
+
+        return saved_amount
+
+    def _delete(self, mm: mmap.mmap, short: str):
+        """Пометка кода удалённым, блокировка записи уже взята"""
+        offset, exists = self._find_slot(
+            mm, short.encode(), _slot_hash(short) % self.capacity
+        )
+
+        if exists:
+            slot = SLOT.unpack_from(mm, offset)
+            self._write_slot(mm, offset, SLOT_DELETED, *slot[2:])
+
+            header = list(HEADER.unpack_from(mm, 0))
+            header[7] += 1
+            HEADER.pack_into(mm, 0, *header)
+
+    def delete(self, short: str):
+        """Пометить код удалённым"""
+        with self._writer_lock():
+            self._journal("delete", short)
+            mm = self._open(locked=True)
+            self._delete(mm, short)
+            self._check_load(mm, saved=True)
+
+    # ПЕРЕСБОРКА
+
+    def _journal(self, *operation):
+        """Дописать изменение в журнал пересборки, если она идёт"""
+        if not self.journal_path.exists():
+            return
+
+        with open(self.journal_path, "a") as journal:
+            journal.write(json.dumps(operation) + "\n")
+
+    def begin_rebuild(self):
+        """Начать журнал изменений на время сборки нового файла"""
+        with self._writer_lock():
+            self.journal_path.write_text("")
+
+    def abort_rebuild(self):
+        """Остановить журнал, если сборка не удалась"""
+        with self._writer_lock():
+            self.journal_path.unlink(missing_ok=True)
+
+    def _replay_journal(self, new_path: Path):
+        """Перенести в новый файл изменения, сделанные во время сборки"""
+        if not self.journal_path.exists():
+            return
+
+        new_table = SharedLinkTable(new_path, self.capacity, self.heap_size)
+        mm = new_table._open(locked=True)
+
+        try:
+            with open(self.journal_path) as journal:
+                for line in journal:
+                    operation, *args = json.loads(line)
+
+                    if operation == "put":
+                        new_table._put(mm, *args)
+                    else:
+                        new_table._delete(mm, *args)
+        finally:
+            new_table._mm = None
+            mm.close()
+
+        self.journal_path.unlink()
+
+    def replace_with(self, new_path: Path):
+        """Подменить таблицу заранее собранным файлом.
+
+        Под блокировкой записи в новый файл переносится журнал
+        изменений, сделанных во время сборки. Старый файл помечается
+        выведенным из работы, читатели переоткроют таблицу при
+        следующем обращении. Отображение старого файла в этом процессе
+        закрывается.
+        """
+        with self._writer_lock():
+            self._replay_journal(new_path)
+            old_mm = self._open(locked=True) if self.path.exists() else None
+
+            os.replace(new_path, self.path)
+
+            if old_mm is not None:
+                self._retire(old_mm)
+
+                with self._open_lock:
+                    if self._mm is old_mm:
+                        self._mm = None
+                self._close(old_mm)
+
+    def stats(self) -> dict:
+        """Заполненность таблицы и нужна ли пересборка"""
+        return self._stats(self._open())
+
+    def _stats(self, mm: mmap.mmap) -> dict:
+        _, _, capacity, _, heap_size, heap_used, items, deleted = (
+            HEADER.unpack_from(mm, 0)
+        )
+
+        return {
+            "path": str(self.path),
+            "capacity": capacity,
+            "items": items - deleted,
+            "deleted": deleted,
+            "heap_size": heap_size,
+            "heap_used": heap_used,
+            "rejected": self.rejected,
+            "needs_rebuild": self._needs_rebuild(mm),
+        }
@@ -1,20 +1,304 @@
+import threading
+from datetime import timedelta
+from contextlib import nullcontext
+
+from django.db import IntegrityError, router, transaction
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import gettext_lazy as _
 from rest_framework.validators import ValidationError
 
 from core.enums import Limits
+from links.conf import get_links_setting
 
-from .url_short_logic import LinkHash
+from .code_pool import (
+    lease_short_code,
+    taken_short_codes,
+    discard_pooled_code,
+    quarantine_short_codes,
+    quarantined_short_codes,
+)
+from .code_length import AdaptiveCodeLength
+from .word_filter import get_word_filter
+from .code_sequence import IdBlockAllocator, next_table_id, next_sequence_id
+from .url_short_logic import (
+    ALPHABET,
+    LinkHash,
+    SequenceLinkHash,
+    DecodableLinkHash,
+)
 
 
-def get_short_code(model_link):
-    """Установка обычного короткого кода ссылки, если нет alias"""
+# Попыток вставки ссылки со сгенерированным кодом
+INSERT_ATTEMPTS = 10
+
+_code_id_allocator: IdBlockAllocator | None = None
+_code_id_allocator_lock = threading.Lock()
+_code_length_tracker: AdaptiveCodeLength | None = None
+_code_length_tracker_lock = threading.Lock()
+
+
+def get_code_id_allocator() -> IdBlockAllocator:
+    """Блоки номеров последовательности ShortCodeSequence процесса"""
+    global _code_id_allocator
+
+    if _code_id_allocator is None:
+        sequence_model = apps.get_model("links", "ShortCodeSequence")
+
+        with _code_id_allocator_lock:
+            if _code_id_allocator is None:
+                _code_id_allocator = IdBlockAllocator(
+                    next_hi=lambda: next_sequence_id(sequence_model),
+                    block_size=get_links_setting("SHORT_CODE_ID_BLOCK_SIZE"),
+                )
+
+    return _code_id_allocator
+
+
+def get_sequence_link_hash() -> SequenceLinkHash:
+    """Генератор кодов по последовательности ShortCodeSequence"""
+    allocator = get_code_id_allocator()
+
+    return SequenceLinkHash(
+        next_id=allocator.next_id,
+        key=get_links_setting("SHORT_CODE_SEQUENCE_KEY")
+        or settings.SECRET_KEY,
+        next_ids=allocator.take,
+        code_filter=get_word_filter().is_allowed,
+    )
+
+
+def get_code_length_tracker(model_link) -> AdaptiveCodeLength:
+    """Заполненность пространства случайных кодов и доля повторов"""
+    global _code_length_tracker
+
+    if _code_length_tracker is None:
+        with _code_length_tracker_lock:
+            if _code_length_tracker is None:
+                _code_length_tracker = AdaptiveCodeLength(
+                    model_link,
+                    base_len=len(ALPHABET),
+                    min_length=Limits.BASIC_LEN_SHORT_CODE,
+                    max_length=LinkHash.max_code_len,
+                    max_collision_rate=get_links_setting(
+                        "SHORT_CODE_MAX_COLLISION_RATE"
+                    ),
+                    refresh_interval=get_links_setting(
+                        "SHORT_CODE_OCCUPANCY_REFRESH_INTERVAL"
+                    ),
+                )
+
+    return _code_length_tracker
+
+
+def get_random_code_length(tracker: AdaptiveCodeLength) -> int:
+    """Длина случайного кода: растёт с заполненностью при
+    SHORT_CODE_ADAPTIVE_LENGTH, иначе BASIC_LEN_SHORT_CODE"""
+    if get_links_setting("SHORT_CODE_ADAPTIVE_LENGTH"):
+        return tracker.current_length()
+
+    return Limits.BASIC_LEN_SHORT_CODE
+
+
+def is_random_generation() -> bool:
+    """Коды новых ссылок генерируются случайно: не последовательность,
+    не ключ ссылки и не пул (коды пула проверены заранее)"""
+    return not (
+        get_links_setting("SHORT_CODE_GENERATOR") == "sequence"
+        or get_links_setting("SHORT_CODE_DECODABLE")
+        or get_links_setting("SHORT_CODE_POOL_ENABLED")
+    )
+
+
+def get_short_code_stats() -> dict | None:
+    """Метрики генерации случайных кодов, если они уже генерировались"""
+    if _code_length_tracker is None:
+        return None
+    return _code_length_tracker.stats()
+
+
+def get_pk_link_hash() -> DecodableLinkHash:
+    """Перестановка первичных ключей ссылок в коды и обратно"""
+    key = get_links_setting("SHORT_CODE_SEQUENCE_KEY") or settings.SECRET_KEY
+
+    # Свой ключ, чтобы коды ключей не совпадали с кодами номеров
+    # последовательности при смене режима
+    return DecodableLinkHash(next_id=None, key=f"{key}:pk")
+
+
+def get_decodable_short_code(model_link) -> tuple[int, str]:
+    """Первичный ключ новой ссылки и код, из которого он декодируется.
+
+    Ключ с запрещённым кодом пропускается.
+    """
+    link_hash = get_pk_link_hash()
+    is_allowed = get_word_filter().is_allowed
+
     while True:
-        short_code = LinkHash().get_short_code()
+        link_pk = next_table_id(model_link)
+        short_code = link_hash.short_code_for(link_pk)
+
+        if is_allowed(short_code):
+            return link_pk, short_code
 
-        if not model_link.objects.filter(short=short_code).exists():
+
+def decode_short_code(short: str) -> int | None:
+    """Первичный ключ ссылки по сгенерированному коду"""
+    return get_pk_link_hash().decode(short)
+
+
+def get_short_code(model_link):
+    """Установка обычного короткого кода ссылки, если нет alias.
+
+    Код не проверяется в БД заранее: занятый код обнаруживается
+    при вставке ссылки (insert_short_link) и заменяется новым.
+
+    При SHORT_CODE_GENERATOR = "sequence" код получается перестановкой
+    номера из последовательности БД и уникален без проверки.
+
+    При SHORT_CODE_POOL_ENABLED код берётся из пула заранее
+    проверенных кодов. Если пул пуст, код генерируется случайно.
+    """
+    if get_links_setting("SHORT_CODE_GENERATOR") == "sequence":
+        return get_sequence_link_hash().get_short_code()
+
+    if get_links_setting("SHORT_CODE_POOL_ENABLED"):
+        short_code = lease_short_code(apps.get_model("links", "ShortCodePool"))
+
+        if short_code is not None:
             return short_code
 
+    tracker = get_code_length_tracker(model_link)
+    return LinkHash(
+        code_len=get_random_code_length(tracker),
+        code_filter=get_word_filter().is_allowed,
+    ).get_short_code()
+
+
+def insert_short_link(link, save, regenerate_short, *args, **kwargs):
+    """Вставка новой ссылки одним INSERT без проверок кода заранее.
+
+    Занятый код обнаруживается по нарушению уникальности short.
+    Сгенерированный код заменяется новым (regenerate_short), для
+    alias возвращается alias_error. Внутри транзакции вставка идёт
+    в savepoint, чтобы ошибка не прерывала внешнюю транзакцию.
+
+    :param save: сохранение модели (Model.save)
+    :param regenerate_short: замена кода, None для alias
+    """
+    model_link = link.__class__
+    using = router.db_for_write(model_link, instance=link)
+
+    for attempt in range(INSERT_ATTEMPTS):
+        # Вне транзакции ошибка INSERT ничего не прерывает,
+        # savepoint нужен только внутри неё
+        if transaction.get_connection(using).in_atomic_block:
+            savepoint = transaction.atomic(using=using)
+        else:
+            savepoint = nullcontext()
+
+        try:
+            with savepoint:
+                save(*args, **kwargs)
+        except IntegrityError:
+            # Нарушение другого ограничения (например, внешнего ключа)
+            if not model_link.objects.filter(short=link.short).exists():
+                raise
+
+            if regenerate_short is None:
+                raise ValidationError(
+                    {"alias_error": _("Данный код для ссылки уже занят.")}
+                ) from None
+
+            regenerate_short()
+        else:
+            if regenerate_short is not None and is_random_generation():
+                get_code_length_tracker(model_link).record(
+                    attempts=attempt + 1, retries=attempt
+                )
+            return
+
+    raise ValidationError(
+        {"short_error": _("Не удалось подобрать свободный код для ссылки.")}
+    )
+
+
+def get_short_codes(model_link, amount: int) -> list[str]:
+    """Коды для пакетного создания ссылок без alias.
+
+    Пачка кодов проверяется в БД запросом short__in (по одному
+    на CODES_CHUNK_SIZE кодов), занятые коды заменяются новыми.
+    """
+    if get_links_setting("SHORT_CODE_GENERATOR") == "sequence":
+        return get_sequence_link_hash().get_short_codes(amount)
+
+    tracker = get_code_length_tracker(model_link)
+    generator = LinkHash(
+        code_len=get_random_code_length(tracker),
+        code_filter=get_word_filter().is_allowed,
+    )
+    codes: list[str] = []
+
+    while len(codes) < amount:
+        candidates = generator.get_short_codes(amount - len(codes))
+        taken = taken_short_codes(
+            model_link, candidates, get_quarantine_model()
+        ) | set(codes)
+        codes.extend(code for code in candidates if code not in taken)
+        tracker.record(attempts=len(candidates), retries=len(taken))
+
+    return codes
+
+
+def release_alias_from_pool(short: str):
+    """Alias не должен остаться в пуле свободных кодов"""
+    if get_links_setting("SHORT_CODE_POOL_ENABLED"):
+        discard_pooled_code(apps.get_model("links", "ShortCodePool"), short)
+
+
+def get_quarantine_model():
+    """Модель карантина кодов или None, если карантин выключен"""
+    if get_links_setting("SHORT_CODE_QUARANTINE_ENABLED"):
+        return apps.get_model("links", "ShortCodeQuarantine")
+    return None
+
+
+def check_alias_not_quarantined(short: str):
+    """Alias не может занять код удалённой ссылки до конца карантина"""
+    quarantine_model = get_quarantine_model()
+
+    if quarantine_model is not None and quarantined_short_codes(
+        quarantine_model, [short]
+    ):
+        raise ValidationError(
+            {"alias_error": _("Данный код для ссылки уже занят.")}
+        )
+
+
+def quarantine_deleted_code(link):
+    """Сгенерированный код удалённой ссылки на карантин.
+
+    Alias не переиспользуется. Коды кодируют ключ ссылки при
+    SHORT_CODE_DECODABLE, поэтому в этом режиме тоже не нужны.
+    """
+    quarantine_model = get_quarantine_model()
+
+    if (
+        link.is_alias
+        or quarantine_model is None
+        or get_links_setting("SHORT_CODE_DECODABLE")
+    ):
+        return
+
+    quarantine_short_codes(
+        quarantine_model,
+        [link.short],
+        timezone.now()
+        + timedelta(days=get_links_setting("SHORT_CODE_QUARANTINE_DAYS")),
+    )
+
 
 def check_links_group_constraints(group):
     """Проверка ограничений ссылок в группе"""
@@ -32,10 +316,11 @@ def check_links_group_constraints(group):
             )
 
 
-def full_clean_check_validation_short(group):
+def full_clean_check_validation_short(group, validate_unique=True):
     """Проверка ограничений имени у групп"""
     try:
-        group.full_clean()  # Выполняем проверку перед сохранением
+        # Выполняем проверку перед сохранением
+        group.full_clean(validate_unique=validate_unique)
     except DjangoValidationError as e:
         if "short" in e.error_dict:
             raise ValidationError(
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+from collections.abc import Callable, Awaitable
+
+
+class _Call:
+    """Выполняющийся вызов и его результат"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вызовов с одинаковым ключом в потоках.
+
+    Первый поток выполняет функцию, остальные ждут и получают
+    её результат или исключение.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, func: Callable):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def stats(self) -> dict:
+        """Количество выполненных и объединённых вызовов"""
+        return {"executed": self.executed, "coalesced": self.coalesced}
+
+
+class AsyncSingleFlight:
+    """
+    Объединение одновременных вызовов с одинаковым ключом в event loop.
+
+    Первая корутина выполняет функцию, остальные ждут её future.
+    Если первая корутина отменена, ожидающие повторяют вызов сами.
+    """
+
+    def __init__(self):
+        self.executed = 0
+        self.coalesced = 0
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        loop = asyncio.get_running_loop()
+        future = self._calls.get(key)
+
+        # future другого event loop (например, другого теста) не ждём
+        if future is not None and future.get_loop() is loop:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                return await self.do(key, func)
+
+        future = self._calls[key] = loop.create_future()
+        self.executed += 1
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Исключение получает вызывающий, future без ожидающих
+            # не должна предупреждать о непрочитанной ошибке
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+        return result
+
+    def stats(self) -> dict:
+        """Количество выполненных и объединённых вызовов"""
+        return {"executed": self.executed, "coalesced": self.coalesced}
@@ -0,0 +1,62 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+
+from links.conf import get_links_setting
+
+
+KEY_PREFIX = "links:resolved:"
+
+
+def _snapshot_cache():
+    return caches[get_links_setting("STALE_CACHE_ALIAS")]
+
+
+def _mark_used(cache, key: str):
+    """Продлить жизнь записи при переполнении снимка, если бэкенд
+    это умеет (RecentFileBasedCache)"""
+    mark_used = getattr(cache, "mark_used", None)
+
+    if mark_used is not None:
+        mark_used(key)
+
+
+def remember_link(short: str, link: tuple):
+    """Сохранить данные перехода в снимок на случай недоступности БД.
+
+    Запись идёт только при изменении данных: чтение файла дешевле
+    записи, которая у FileBasedCache проверяет переполнение каталога.
+    Неизменённая запись только отмечается использованной.
+    """
+    cache = _snapshot_cache()
+    key, link = KEY_PREFIX + short, tuple(link)
+
+    if cache.get(key) != link:
+        cache.set(key, link, timeout=None)
+    else:
+        _mark_used(cache, key)
+
+
+async def aremember_link(short: str, link: tuple):
+    """Асинхронный вариант remember_link"""
+    cache = _snapshot_cache()
+    key, link = KEY_PREFIX + short, tuple(link)
+
+    if await cache.aget(key) != link:
+        await cache.aset(key, link, timeout=None)
+    else:
+        await sync_to_async(_mark_used)(cache, key)
+
+
+def get_snapshot_link(short: str) -> tuple | None:
+    """Данные перехода из снимка или None"""
+    return _snapshot_cache().get(KEY_PREFIX + short)
+
+
+async def aget_snapshot_link(short: str) -> tuple | None:
+    """Асинхронный вариант get_snapshot_link"""
+    return await _snapshot_cache().aget(KEY_PREFIX + short)
+
+
+def forget_link(short: str):
+    """Удалить код из снимка после изменения ссылки"""
+    _snapshot_cache().delete(KEY_PREFIX + short)
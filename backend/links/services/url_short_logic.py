@@ -1,37 +1,73 @@
-import uuid
+import os
+import hashlib
 from re import Pattern, compile
+from functools import lru_cache
+from collections.abc import Callable
 
 from core.enums import Limits
 
-from .services_exceptions import ShortCodeError, LinkIDZeroError
+from .services_exceptions import (
+    ShortCodeError,
+    LinkIDZeroError,
+    ShortCodeSpaceExhaustedError,
+)
+
+
+# перемешанный алфавит с 0-9 и английскими буквами
+# нижнего и верхнего регистра.
+ALPHABET = "0GTWYahl4C1Dq2evKiNPJdwfLxAsH9t8E5Z3RISyUuzQVk7rjFn6mpgbBXOcoM"
+
+# Таблица перевода случайного байта в символ алфавита. Байты от
+# REJECT_FROM отбрасываются, чтобы все символы были равновероятны
+REJECT_FROM = 256 - 256 % len(ALPHABET)
+BYTE_TO_CHAR = bytes(
+    ord(ALPHABET[byte % len(ALPHABET)]) if byte < REJECT_FROM else 0
+    for byte in range(256)
+)
+REJECTED_BYTES = bytes(range(REJECT_FROM, 256))
+# Символ алфавита -> цифра Base62 для декодирования кодов
+CHAR_TO_DIGIT = {char: digit for digit, char in enumerate(ALPHABET)}
+
+
+@lru_cache
+def get_short_code_pattern(code_len: int) -> Pattern:
+    """Регулярное выражение кода длины code_len (компилируется один раз)"""
+    return compile(rf"^[a-zA-Z0-9]{{{code_len}}}$")
 
 
 class LinkHash:
     """
-    Генерация короткой ссылки по переводу id оригинальной ссылки в Base62.
+    Генерация случайного короткого кода: каждый символ равновероятно
+    выбирается из алфавита, все base_len ** code_fix_len кодов
+    равновероятны.
 
     Фиксированная длина всех ссылок определяется code_fix_len
     """
 
-    def __init__(self):
-        # перемешанный алфавит с 0-9 и английскими буквами
-        # нижнего и верхнего регистра.
-        self.alphabet = (
-            "0GTWYahl4C1Dq2evKiNPJdwfLxAsH9t8E5Z3RISyUuzQVk7rjFn6mpgbBXOcoM"
-        )
+    # Наибольшая длина случайного кода
+    max_code_len = 16
+
+    def __init__(
+        self,
+        code_len: int | None = None,
+        code_filter: Callable[[str], bool] | None = None,
+    ):
+        """
+        :param code_len: длина кода
+        :param code_filter: проверка кода, False - код запрещён
+            (зарезервированное или запрещённое слово) и заменяется новым
+        """
+        self.alphabet = ALPHABET
         self.base_len = len(self.alphabet)
-        self.code_fix_len = Limits.BASIC_LEN_SHORT_CODE
+        self.code_fix_len = code_len or Limits.BASIC_LEN_SHORT_CODE
 
-        self.short_code_pattern: Pattern = compile(
-            rf"^[a-zA-Z0-9]{{{self.code_fix_len}}}$"
+        self.short_code_pattern: Pattern = get_short_code_pattern(
+            self.code_fix_len
         )
+        self.code_filter = code_filter
 
-    @staticmethod
-    def _get_id_for_link() -> int:
-        """Получения случайного id для ссылки"""
-        random_uuid = uuid.uuid4().int
-
-        return random_uuid
+    def _is_allowed(self, short: str) -> bool:
+        return self.code_filter is None or self.code_filter(short)
 
     def _to_base_62(self, link_id: int) -> str:
         """Получение сокращенного кода ссылки.
@@ -64,12 +100,230 @@ class LinkHash:
 
     def get_short_code(self) -> str:
         """Входная точка для генерации кода"""
-        random_id = self._get_id_for_link()
-        short_code = self._to_base_62(random_id)
+        return self.get_short_codes(1)[0]
+
+    def get_short_codes(self, amount: int) -> list[str]:
+        """Несколько различных кодов за один вызов.
+
+        Случайные байты берутся одним os.urandom и переводятся
+        в символы алфавита таблицей через bytes.translate, без
+        перевода чисел в Base62 и проверки каждого кода регуляркой.
+        """
+        codes: dict[str, None] = {}
+
+        while len(codes) < amount:
+            need = (amount - len(codes)) * self.code_fix_len
+            # Запас на отброшенные байты (REJECTED_BYTES)
+            chars = (
+                os.urandom(need + need // 16 + self.code_fix_len)
+                .translate(BYTE_TO_CHAR, REJECTED_BYTES)
+                .decode("ascii")
+            )
+            usable = len(chars) - len(chars) % self.code_fix_len
+
+            codes.update(
+                dict.fromkeys(
+                    code
+                    for start in range(0, usable, self.code_fix_len)
+                    if self._is_allowed(
+                        code := chars[start : start + self.code_fix_len]
+                    )
+                )
+            )
+
+        return list(codes)[:amount]
+
+
+class SequenceLinkHash(LinkHash):
+    """
+    Генерация короткой ссылки по номеру из последовательности БД.
+
+    Номер переставляется сетью Фейстеля с ключом внутри пространства
+    base_len ** code_fix_len и переводится в Base62 фиксированной длины.
+    Перестановка взаимно однозначна, поэтому разные номера дают разные
+    коды и проверять код в БД не нужно, а соседние номера дают
+    несвязанные коды.
+    """
+
+    # Количество раундов сети Фейстеля
+    rounds = 4
+
+    def __init__(
+        self,
+        next_id: Callable[[], int],
+        key: str,
+        next_ids: Callable[[int], list[int]] | None = None,
+        code_filter: Callable[[str], bool] | None = None,
+    ):
+        """
+        :param next_id: получение следующего номера последовательности
+        :param key: секрет, от которого зависит перестановка
+        :param next_ids: получение нескольких номеров за раз
+        :param code_filter: проверка кода, номер с запрещённым
+            кодом пропускается
+        """
+        super().__init__(code_filter=code_filter)
+        self.next_id = next_id
+        self.next_ids = next_ids
+        self.key = hashlib.blake2b(key.encode(), digest_size=32).digest()
+
+        self.space = self.base_len**self.code_fix_len
+        # Сеть работает над двумя половинами по half_bits бит,
+        # значения вне space проходят через неё повторно
+        self.half_bits = ((self.space - 1).bit_length() + 1) // 2
+        self.half_mask = (1 << self.half_bits) - 1
+
+    def _round(self, number: int, half: int) -> int:
+        """Раундовая функция: хэш половины с ключом"""
+        digest = hashlib.blake2b(
+            number.to_bytes(1, "little") + half.to_bytes(8, "little"),
+            digest_size=8,
+            key=self.key,
+        ).digest()
+
+        return int.from_bytes(digest, "little") & self.half_mask
+
+    def _feistel(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+
+        for number in range(self.rounds):
+            left, right = right, left ^ self._round(number, right)
+
+        return (left << self.half_bits) | right
+
+    def _feistel_inverse(self, value: int) -> int:
+        left, right = value >> self.half_bits, value & self.half_mask
+
+        for number in reversed(range(self.rounds)):
+            left, right = right ^ self._round(number, left), left
+
+        return (left << self.half_bits) | right
+
+    def permute(self, link_id: int) -> int:
+        """Перестановка номера внутри пространства кодов.
+
+        Выход сети за space повторно пропускается через неё
+        (cycle walking), так перестановка остаётся внутри space.
+        """
+        if not 0 <= link_id < self.space:
+            raise ShortCodeSpaceExhaustedError
+
+        value = self._feistel(link_id)
+        while value >= self.space:
+            value = self._feistel(value)
+
+        return value
+
+    def unpermute(self, value: int) -> int:
+        """Обратная перестановка: номер последовательности по значению"""
+        if not 0 <= value < self.space:
+            raise ShortCodeSpaceExhaustedError
+
+        link_id = self._feistel_inverse(value)
+        while link_id >= self.space:
+            link_id = self._feistel_inverse(link_id)
+
+        return link_id
+
+    def _to_fixed_base_62(self, value: int) -> str:
+        """Base62 ровно code_fix_len символов, старшие разряды нулевые"""
+        short_code = ""
+
+        for _ in range(self.code_fix_len):
+            value, remainder = divmod(value, self.base_len)
+            short_code += self.alphabet[remainder]
+
+        return short_code[::-1]
+
+    def get_short_code(self) -> str:
+        """Входная точка для генерации кода"""
+        while True:
+            short_code = self.short_code_for(self.next_id())
+
+            if self._is_allowed(short_code):
+                return short_code
+
+    def get_short_codes(self, amount: int) -> list[str]:
+        """Коды для пакетного создания ссылок"""
+        codes: list[str] = []
+
+        while len(codes) < amount:
+            need = amount - len(codes)
+
+            if self.next_ids is not None:
+                ids = self.next_ids(need)
+            else:
+                ids = [self.next_id() for _ in range(need)]
+
+            codes.extend(
+                short_code
+                for link_id in ids
+                if self._is_allowed(short_code := self.short_code_for(link_id))
+            )
+
+        return codes
+
+    def short_code_for(self, link_id: int) -> str:
+        """Код для номера последовательности"""
+        if type(link_id) is not int:
+            raise TypeError
+
+        if link_id <= 0:
+            raise LinkIDZeroError
+
+        short_code = self._to_fixed_base_62(self.permute(link_id))
         self._check_short_code_regex(short_code)
 
         return short_code
 
+    def decode(self, short: str) -> int | None:
+        """Номер, из которого получен код, или None для чужого кода"""
+        if len(short) != self.code_fix_len:
+            return None
+
+        value = 0
+        for char in short:
+            digit = CHAR_TO_DIGIT.get(char)
+            if digit is None:
+                return None
+            value = value * self.base_len + digit
+
+        link_id = self.unpermute(value)
+        return link_id or None
+
+
+class DecodableLinkHash(SequenceLinkHash):
+    """
+    Код первичного ключа ссылки с контрольным символом в конце.
+
+    Контрольный символ зависит от ключа, поэтому случайный код или
+    alias проходит проверку с вероятностью 1 / base_len, и переход
+    ищет по первичному ключу почти только настоящие коды ключей.
+    """
+
+    def _check_char(self, short_code: str) -> str:
+        digest = hashlib.blake2b(
+            short_code.encode(), digest_size=8, key=self.key
+        ).digest()
+
+        return self.alphabet[int.from_bytes(digest, "little") % self.base_len]
+
+    def short_code_for(self, link_id: int) -> str:
+        """Код для первичного ключа с контрольным символом"""
+        short_code = super().short_code_for(link_id)
+        return short_code + self._check_char(short_code)
+
+    def decode(self, short: str) -> int | None:
+        """Первичный ключ или None, если контрольный символ не сходится"""
+        if len(short) != self.code_fix_len + 1:
+            return None
+
+        short_code, check_char = short[:-1], short[-1]
+        if self._check_char(short_code) != check_char:
+            return None
+
+        return super().decode(short_code)
+
 
 if __name__ == "__main__":
     # for manual test
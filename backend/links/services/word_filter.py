@@ -0,0 +1,142 @@
+import threading
+from pathlib import Path
+from collections import deque
+from collections.abc import Iterable
+
+from links.conf import get_links_setting
+
+
+class AhoCorasick:
+    """
+    Автомат Ахо-Корасик для поиска подстрок из словаря.
+
+    Строится один раз по всем словам, после этого поиск проходит
+    текст за один проход: стоимость зависит от длины текста,
+    а не от количества слов.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # Найденное слово в состоянии (с учётом суффиксных ссылок)
+        self._output: list[str | None] = [None]
+        self.words_amount = 0
+
+        for word in words:
+            self._add(word.lower())
+
+        self._build()
+
+    def _add(self, word: str):
+        if not word:
+            return
+
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+                self._goto[state][char] = next_state
+
+            state = next_state
+
+        self._output[state] = word
+        self.words_amount += 1
+
+    def _build(self):
+        """Суффиксные ссылки обходом в ширину"""
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+
+                if self._output[next_state] is None:
+                    self._output[next_state] = self._output[
+                        self._fail[next_state]
+                    ]
+
+    def search(self, text: str) -> str | None:
+        """Первое найденное в тексте слово словаря или None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+
+        for char in text.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(char, 0)
+
+            if output[state] is not None:
+                return output[state]
+
+        return None
+
+
+class ShortCodeWordFilter:
+    """
+    Фильтр коротких кодов: зарезервированные пути и запрещённые слова.
+
+    Зарезервированное слово запрещает код целиком (api, admin),
+    запрещённое слово - любой код, где оно встречается подстрокой.
+    Регистр не учитывается.
+    """
+
+    def __init__(self, reserved: Iterable[str], blocked: Iterable[str]):
+        self.reserved = frozenset(word.lower() for word in reserved)
+        self.matcher = AhoCorasick(blocked)
+
+    def blocked_word(self, code: str) -> str | None:
+        """Слово, из-за которого код запрещён, или None"""
+        lowered = code.lower()
+
+        if lowered in self.reserved:
+            return lowered
+
+        return self.matcher.search(lowered)
+
+    def is_allowed(self, code: str) -> bool:
+        return self.blocked_word(code) is None
+
+
+def load_words(path: str | Path) -> list[str]:
+    """Слова из файла: по одному в строке, # - комментарий"""
+    with open(path, encoding="utf-8") as file:
+        return [
+            word
+            for word in (line.strip() for line in file)
+            if word and not word.startswith("#")
+        ]
+
+
+_word_filter: ShortCodeWordFilter | None = None
+_word_filter_lock = threading.Lock()
+
+
+def get_word_filter() -> ShortCodeWordFilter:
+    """Фильтр кодов процесса, строится при первом обращении"""
+    global _word_filter
+
+    if _word_filter is None:
+        with _word_filter_lock:
+            if _word_filter is None:
+                path = get_links_setting("SHORT_CODE_BLOCKED_WORDS_PATH")
+
+                _word_filter = ShortCodeWordFilter(
+                    reserved=get_links_setting("SHORT_CODE_RESERVED_WORDS"),
+                    blocked=load_words(path) if path else (),
+                )
+
+    return _word_filter
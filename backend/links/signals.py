@@ -0,0 +1,39 @@
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+
+from .models import ShortLink
+from .services.redirects import (
+    delete_shared_link,
+    update_shared_link,
+    register_short_code,
+    invalidate_resolved_link,
+)
+from .services.short_links import quarantine_deleted_code
+
+
+@receiver(post_save, sender=ShortLink)
+def invalidate_link_on_save(sender, instance, created, **kwargs):
+    """Сброс кэша перехода при изменении ссылки (is_active, группа)"""
+    if created:
+        register_short_code(instance.short)
+
+    invalidate_resolved_link(instance.short)
+    update_shared_link(
+        instance.short,
+        instance.pk,
+        instance.original_link,
+        instance.is_active,
+    )
+
+
+@receiver(post_delete, sender=ShortLink)
+def invalidate_link_on_delete(sender, instance, **kwargs):
+    """Сброс кэша перехода при удалении ссылки"""
+    invalidate_resolved_link(instance.short)
+    delete_shared_link(instance.short)
+
+
+@receiver(post_delete, sender=ShortLink)
+def quarantine_code_on_delete(sender, instance, **kwargs):
+    """Сгенерированный код удалённой ссылки на карантин"""
+    quarantine_deleted_code(instance)
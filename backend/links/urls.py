@@ -0,0 +1,28 @@
+from django.urls import re_path
+
+from core.enums import Limits
+
+from .conf import get_links_setting
+from .views import ShortLinkRedirectView, AsyncShortLinkRedirectView
+
+
+SHORT_CODE_PATTERN = (
+    rf"[a-zA-Z0-9]{{{Limits.MIN_LEN_LINK_SHORT_CODE},"
+    rf"{Limits.MAX_LEN_LINK_SHORT_CODE}}}"
+)
+
+
+def get_redirect_urlpatterns(async_views: bool) -> list:
+    """Маршрут перехода с синхронным или асинхронным view"""
+    view = AsyncShortLinkRedirectView if async_views else ShortLinkRedirectView
+
+    return [
+        re_path(
+            rf"^(?P<short>{SHORT_CODE_PATTERN})$",
+            view.as_view(),
+            name="short-link-redirect",
+        ),
+    ]
+
+
+urlpatterns = get_redirect_urlpatterns(get_links_setting("ASYNC_VIEWS"))
@@ -0,0 +1,73 @@
+from django.http import (
+    Http404,
+    HttpResponseRedirect,
+    HttpResponsePermanentRedirect,
+)
+from django.views import View
+
+from .conf import get_links_setting
+from .models import ShortLink, ClickEvent
+from .services.clicks import record_click, arecord_click
+from .services.redirects import (
+    resolve_short_code_or_stale,
+    aresolve_short_code_or_stale,
+)
+from .services.click_events import log_click_event
+
+
+# Заголовок ответа, обслуженного из снимка при недоступности БД
+STALE_HEADER = "X-Viqzo-Stale"
+
+
+def redirect_to(original_link: str, stale: bool) -> HttpResponseRedirect:
+    """Ответ с переходом на оригинальную ссылку"""
+    if get_links_setting("REDIRECT_PERMANENT") and not stale:
+        response = HttpResponsePermanentRedirect(original_link)
+    else:
+        response = HttpResponseRedirect(original_link)
+
+    if stale:
+        response[STALE_HEADER] = "1"
+    return response
+
+
+class ShortLinkRedirectView(View):
+    """Переход по короткой ссылке без стека DRF.
+
+    Не использует аутентификацию, согласование контента и сериализаторы:
+    один запрос по индексу short и ответ с заголовком Location.
+    """
+
+    http_method_names = ["get", "head"]
+
+    def get(self, request, short):
+        link, stale = resolve_short_code_or_stale(ShortLink, short)
+
+        if link is None or not link.is_active:
+            raise Http404
+
+        clicked_at = record_click(ShortLink, link.pk)
+        log_click_event(ClickEvent, link.pk, clicked_at, request)
+
+        return redirect_to(link.original_link, stale)
+
+
+class AsyncShortLinkRedirectView(View):
+    """Асинхронный переход по короткой ссылке для ASGI.
+
+    Запросы к БД идут через async ORM, поэтому воркер не держит
+    поток на каждого ожидающего клиента.
+    """
+
+    http_method_names = ["get", "head"]
+
+    async def get(self, request, short):
+        link, stale = await aresolve_short_code_or_stale(ShortLink, short)
+
+        if link is None or not link.is_active:
+            raise Http404
+
+        clicked_at = await arecord_click(ShortLink, link.pk)
+        log_click_event(ClickEvent, link.pk, clicked_at, request)
+
+        return redirect_to(link.original_link, stale)
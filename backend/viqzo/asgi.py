@@ -13,5 +13,13 @@ from django.core.asgi import get_asgi_application
 
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "viqzo.settings")
+# Под ASGI переход и анонимное создание ссылки обслуживаются async view
+os.environ.setdefault("ASYNC_VIEWS", "1")
 
 application = get_asgi_application()
+
+# После настройки Django: данные пути перехода готовятся до первого запроса
+from links.services.redirects import warm_up_redirects  # noqa: E402
+
+
+warm_up_redirects()
@@ -21,9 +21,23 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # In-memory SQLite с общим кэшем не ждёт снятия блокировки,
+        # поэтому тесты с параллельными запросами используют файл
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "links_snapshot": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "links_snapshot",
+        "TIMEOUT": None,
+    },
+}
+
 # EMAIL BACKEND FOR LOCAL DEVELOPMENT
 EMAIL_HOST_USER = os.getenv("EMAIL")
 
@@ -72,6 +72,23 @@ DATABASES = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Снимок данных переходов на случай недоступности БД. При переполнении
+    # удаляются записи, по которым дольше всего не было переходов
+    "links_snapshot": {
+        "BACKEND": "core.cache.RecentFileBasedCache",
+        "LOCATION": os.getenv(
+            "LINKS_SNAPSHOT_DIR", BASE_DIR / "cache" / "links_snapshot"
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 100_000},
+    },
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",  # noqa: E501
@@ -200,3 +217,95 @@ DJOSER = {
     "HIDE_USERS": False,
     "PERMISSIONS": {"user_list": ["rest_framework.permissions.IsAdminUser"]},
 }
+
+
+# SHORT LINKS SETTINGS
+
+
+def env_settings(**casts) -> dict:
+    """Значения заданных переменных окружения с именами ключей.
+
+    Незаданная переменная не попадает в словарь, и настройка берёт
+    значение по умолчанию приложения (links/conf.py).
+    """
+    return {
+        name: cast(os.environ[name])
+        for name, cast in casts.items()
+        if os.environ.get(name)
+    }
+
+
+def env_flag(value: str) -> bool:
+    return value == "1"
+
+
+SHORT_LINKS = env_settings(
+    REDIRECT_PERMANENT=env_flag,
+    # Включается в asgi.py: переход обслуживается async view без потока
+    # на запрос, анонимное создание ссылки - view без стека DRF
+    ASYNC_VIEWS=env_flag,
+    # Клики копятся в памяти воркера и пишутся в БД пакетами.
+    # Окно потерь при падении: FLUSH_INTERVAL_MS / FLUSH_MAX_EVENTS
+    CLICK_BUFFER_ENABLED=env_flag,
+    CLICK_BUFFER_FLUSH_INTERVAL_MS=int,
+    CLICK_BUFFER_FLUSH_MAX_EVENTS=int,
+    # Время последнего клика пишется не чаще раза в интервал на ссылку,
+    # промежуточные клики обновляют только счётчик
+    LAST_CLICKED_INTERVAL=float,
+    # Клики пишутся в CLICK_SHARDS_COUNT строк на ссылку и переносятся
+    # в clicks_count командой fold_click_shards
+    CLICK_SHARDS_ENABLED=env_flag,
+    CLICK_SHARDS_COUNT=int,
+    # Журнал переходов пишется фоновым потоком пачками через bulk_create
+    CLICK_EVENTS_ENABLED=env_flag,
+    # Кэш переходов в памяти воркера, сбрасывается сигналами ShortLink
+    RESOLVE_CACHE_SIZE=int,
+    RESOLVE_CACHE_TTL=int,
+    # Фильтр Блума кодов строится при старте воркера. Отрицательный ответ
+    # даётся из памяти, последние строки других воркеров догружаются
+    # не чаще раза в BLOOM_FILTER_RELOAD_INTERVAL секунд
+    BLOOM_FILTER_ENABLED=env_flag,
+    BLOOM_FILTER_FP_RATE=float,
+    BLOOM_FILTER_RELOAD_INTERVAL=float,
+    # Таблица кодов в общем mmap-файле: одна копия горячих кодов на узел.
+    # Пересобирается командой build_shared_link_table. Запись старше TTL
+    # перечитывается из БД: так доходят изменения, прошедшие мимо сигналов
+    SHARED_TABLE_ENABLED=env_flag,
+    SHARED_TABLE_PATH=str,
+    SHARED_TABLE_CAPACITY=int,
+    SHARED_TABLE_HEAP_SIZE=int,
+    SHARED_TABLE_TTL=int,
+    # "sequence": код - перестановка номера из последовательности БД,
+    # уникален без проверки. Ключ нельзя менять после выдачи кодов,
+    # иначе новые коды могут совпасть с выданными
+    SHORT_CODE_GENERATOR=str,
+    SHORT_CODE_SEQUENCE_KEY=str,
+    # Воркер резервирует номера блоками (hi/lo) и выдаёт их из памяти,
+    # остаток блока при перезапуске теряется. Размер только увеличивать
+    SHORT_CODE_ID_BLOCK_SIZE=int,
+    # Случайный код удлиняется, когда вероятность совпадения с занятым
+    # превышает SHORT_CODE_MAX_COLLISION_RATE. Доля повторов в /api/metrics/
+    SHORT_CODE_ADAPTIVE_LENGTH=env_flag,
+    SHORT_CODE_MAX_COLLISION_RATE=float,
+    # Сгенерированный код - перестановка первичного ключа ссылки и
+    # контрольный символ: переход декодирует такой код и ищет ссылку
+    # по ключу, остальные коды и alias ищутся сразу по short
+    SHORT_CODE_DECODABLE=env_flag,
+    # Новые ссылки получают код из пула без проверки существования.
+    # Пул пополняется командой refill_short_code_pool --every N
+    SHORT_CODE_POOL_ENABLED=env_flag,
+    SHORT_CODE_POOL_SIZE=int,
+    # Коды удалённых ссылок (кроме alias) через SHORT_CODE_QUARANTINE_DAYS
+    # возвращаются в пул и выдаются раньше новых случайных кодов
+    SHORT_CODE_QUARANTINE_ENABLED=env_flag,
+    SHORT_CODE_QUARANTINE_DAYS=int,
+    # Alias и сгенерированные коды не могут совпадать с путями сайта
+    # (SHORT_CODE_RESERVED_WORDS) и содержать слова из файла (проверка
+    # автоматом Ахо-Корасик, время не зависит от размера списка). Файл
+    # читается в ready() приложения links, неверный путь не даст
+    # запустить процесс
+    SHORT_CODE_BLOCKED_WORDS_PATH=str,
+    # При ошибке БД переход обслуживается из снимка (кэш links_snapshot)
+    # с заголовком X-Viqzo-Stale, клики записываются после восстановления
+    STALE_FALLBACK_ENABLED=env_flag,
+)
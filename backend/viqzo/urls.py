@@ -5,4 +5,6 @@ from django.contrib import admin
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    # Переход по короткой ссылке, должен идти последним
+    path("", include("links.urls")),
 ]
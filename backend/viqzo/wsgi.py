@@ -15,3 +15,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "viqzo.settings")
 
 application = get_wsgi_application()
+
+# После настройки Django: данные пути перехода готовятся до первого запроса
+from links.services.redirects import warm_up_redirects  # noqa: E402
+
+
+warm_up_redirects()
@@ -8,4 +8,5 @@ pytest_plugins = [
     "tests.fixtures.fixture_users",
     "tests.fixtures.fixture_short_url",
     "tests.fixtures.fixture_usergroup",
+    "tests.fixtures.fixture_query_budget",
 ]
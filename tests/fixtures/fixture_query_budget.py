@@ -0,0 +1,26 @@
+import pytest
+
+
+# Наибольшее количество запросов к БД на один запрос к API.
+# Не зависит от количества ссылок или групп на странице
+QUERY_BUDGETS = {
+    # count() пагинации и страница ссылок с владельцами и группами
+    "links-list": 2,
+    # ссылка с владельцем и группой, учёт перехода
+    "links-retrieve": 2,
+    # ссылка, проверки full_clean() (владелец, группа, лимит группы,
+    # уникальность кода) и UPDATE
+    "links-update": 6,
+    # count() пагинации и страница групп с владельцами
+    "groups-list": 2,
+}
+
+
+@pytest.fixture
+def query_budget(django_assert_max_num_queries):
+    """Проверка запроса к API по бюджету запросов к БД из QUERY_BUDGETS"""
+
+    def check(name: str):
+        return django_assert_max_num_queries(QUERY_BUDGETS[name])
+
+    return check
@@ -1,6 +1,15 @@
 import pytest
 
 from backend.core.enums import Limits
+from links.services.redirects import get_resolve_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_resolve_cache():
+    """Кэш переходов процесса не должен переживать тест"""
+    get_resolve_cache().clear()
+    yield
+    get_resolve_cache().clear()
 
 
 # БАЗОВЫЕ ФИКСТУРЫ КОРОТКИХ ССЫЛОК
@@ -1,7 +1,10 @@
 from http import HTTPStatus
 
 import pytest
+from django.db import transaction
 
+from links import models
+from links.models import ShortLink
 from tests import utils
 
 
@@ -19,6 +22,77 @@ class Test00BasicShort:
             f"Детали: {response.data}"
         )
 
+    def test_01_01_01_create_short_url_single_query(
+        self, client, valid_original_link, django_assert_num_queries
+    ):
+        with django_assert_num_queries(1):
+            response = client.post("/api/links/", data=valid_original_link)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f"POST-запрос на api/links/ должен создавать ссылку одним "
+            f"INSERT без предварительных проверок кода.\n"
+            f"Детали: {response.data}"
+        )
+
+    def test_01_01_02_create_short_url_code_collision(
+        self, client, valid_original_link, monkeypatch
+    ):
+        taken = ShortLink.objects.create(**valid_original_link).short
+        codes = iter([taken])
+        get_short_code = models.get_short_code
+        monkeypatch.setattr(
+            models,
+            "get_short_code",
+            lambda model_link: next(codes, None) or get_short_code(model_link),
+        )
+
+        response = client.post("/api/links/", data=valid_original_link)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f"Занятый сгенерированный код должен заменяться новым при "
+            f"вставке ссылки.\n"
+            f"Детали: {response.data}"
+        )
+        assert response.data["short"] != taken
+        assert ShortLink.objects.count() == 2
+
+    def test_01_01_03_create_short_url_attempts_exhausted(
+        self, client, valid_original_link, monkeypatch
+    ):
+        taken = ShortLink.objects.create(**valid_original_link).short
+        monkeypatch.setattr(models, "get_short_code", lambda model_link: taken)
+
+        response = client.post("/api/links/", data=valid_original_link)
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            f"Если за INSERT_ATTEMPTS попыток не найден свободный код, "
+            f"POST-запрос на api/links/ должен возвращать ответ со "
+            f"статусом 400.\n"
+            f"Детали: {response.status_code}"
+        )
+        assert "short_error" in response.data
+        assert ShortLink.objects.count() == 1
+
+    def test_01_01_04_create_short_url_collision_in_transaction(
+        self, valid_original_link, monkeypatch
+    ):
+        taken = ShortLink.objects.create(**valid_original_link).short
+        codes = iter([taken])
+        get_short_code = models.get_short_code
+        monkeypatch.setattr(
+            models,
+            "get_short_code",
+            lambda model_link: next(codes, None) or get_short_code(model_link),
+        )
+
+        # Ошибка вставки откатывается к savepoint, внешняя
+        # транзакция продолжается
+        with transaction.atomic():
+            link = ShortLink.objects.create(**valid_original_link)
+            ShortLink.objects.create(**valid_original_link)
+
+        assert link.short != taken
+        assert ShortLink.objects.count() == 3, (
+            "Повтор вставки внутри транзакции прервал её."
+        )
+
     def test_01_02_create_short_link_and_check_idempotency(
         self, client, valid_original_link
     ):
@@ -45,6 +45,63 @@ class Test01AliasShort:
             f"Детали: {response.data}"
         )
 
+    def test_01_02_01_taken_alias_error(
+        self, client, original_link_with_alias, django_assert_num_queries
+    ):
+        client.post("/api/links/", data=original_link_with_alias)
+
+        # Вставка с нарушением уникальности и проверка, что занят short
+        with django_assert_num_queries(2):
+            response = client.post(
+                "/api/links/", data=original_link_with_alias
+            )
+        assert (
+            response.status_code == HTTPStatus.BAD_REQUEST
+            and "alias_error" in response.data
+        ), (
+            f"POST-запрос с занятым alias на api/links/ не возвращает "
+            f"ответ со статусом 400 и ошибкой alias_error.\n"
+            f"Детали: {response.data}"
+        )
+
+    def test_01_02_02_check_aliases(
+        self, client, original_link_with_alias, django_assert_num_queries
+    ):
+        alias = original_link_with_alias["alias"]
+        client.post("/api/links/", data=original_link_with_alias)
+        client.post(
+            "/api/links/",
+            data={
+                "original_link": original_link_with_alias["original_link"],
+                "alias": f"{alias}1",
+            },
+        )
+
+        with django_assert_num_queries(1):
+            response = client.post(
+                "/api/links/check-aliases/",
+                data={"aliases": [alias, "FreeAlias", "-bad-"]},
+                content_type="application/json",
+            )
+        assert response.status_code == HTTPStatus.OK, (
+            f"POST-запрос на api/links/check-aliases/ не возвращает "
+            f"ответ со статусом 200.\n"
+            f"Детали: {response.data}"
+        )
+
+        taken, free, invalid = response.data["results"]
+        assert not taken["available"] and taken["suggestions"], (
+            "Для занятого alias не предложены свободные варианты.\n"
+            f"Детали: {taken}"
+        )
+        assert f"{alias}1" not in taken["suggestions"], (
+            "Среди вариантов alias предложен занятый код."
+        )
+        assert free["available"] and not invalid["valid"], (
+            "Свободный или невалидный alias определён неверно.\n"
+            f"Детали: {free}, {invalid}"
+        )
+
     def test_01_03_create_alias_link_with_invalid_original_link(
         self, client, invalid_original_link
     ):
@@ -0,0 +1,413 @@
+import os
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import override_settings
+from django.core.cache import caches
+from rest_framework.test import APIClient
+
+from links.models import ShortLink
+from links.services import clicks, redirects, snapshot
+from links.services.short_links import decode_short_code
+from core.cache import RecentFileBasedCache
+from tests import utils
+
+
+@pytest.mark.django_db(transaction=True)
+class Test04Redirect:
+    """Тестирование перехода по короткой ссылке"""
+
+    def test_01_01_redirect_by_short_code(self, client, valid_original_link):
+        code = utils.create_short_link(client, valid_original_link)
+        response = client.get(f"/{code}")
+        assert (
+            response.status_code == HTTPStatus.FOUND
+            and response["Location"] == valid_original_link["original_link"]
+        ), (
+            f"GET-запрос на /{code} не перенаправляет на оригинальную ссылку "
+            f"со статусом 302.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_01_02_redirect_by_alias(self, client, original_link_with_alias):
+        code = utils.create_alias_link(client, original_link_with_alias)
+        response = client.get(f"/{code}")
+        assert (
+            response.status_code == HTTPStatus.FOUND
+            and response["Location"]
+            == original_link_with_alias["original_link"]
+        ), (
+            f"GET-запрос на /{code} не перенаправляет на оригинальную ссылку "
+            f"пользовательского кода.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    @override_settings(SHORT_LINKS={"REDIRECT_PERMANENT": True})
+    def test_01_03_permanent_redirect(self, client, valid_original_link):
+        code = utils.create_short_link(client, valid_original_link)
+        response = client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.MOVED_PERMANENTLY, (
+            f"GET-запрос на /{code} при REDIRECT_PERMANENT не возвращает "
+            f"ответ со статусом 301.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_01_04_redirect_counts_clicks(self, client, valid_original_link):
+        code = utils.create_short_link(client, valid_original_link)
+        client.get(f"/{code}")
+        client.get(f"/{code}")
+
+        response = client.get(f"/api/links/{code}/")
+        assert response.data.get("clicks_count") == 3, (
+            f"Переходы по /{code} не учитываются в количестве кликов.\n"
+            f"Детали: {response.data}"
+        )
+
+    def test_02_01_redirect_non_existent_code(self, client):
+        response = client.get("/NoSuchCode")
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            "GET-запрос на несуществующий код не возвращает ответ "
+            "со статусом 404.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_02_02_redirect_inactive_link(
+        self, user_client, valid_original_link, is_active_status_false_bool
+    ):
+        code = utils.create_short_link(user_client, valid_original_link)
+        user_client.patch(
+            f"/api/links/{code}/", data=is_active_status_false_bool
+        )
+
+        response = user_client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f"GET-запрос на /{code} для неактивной ссылки не возвращает "
+            f"ответ со статусом 404.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_02_03_redirect_invalid_code(self, client):
+        response = client.get("/bad-code!")
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            "GET-запрос на невалидный код не возвращает ответ "
+            "со статусом 404.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_03_01_redirect_from_resolve_cache(
+        self, client, valid_original_link, django_assert_num_queries
+    ):
+        code = utils.create_short_link(client, valid_original_link)
+        client.get(f"/{code}")
+
+        with django_assert_num_queries(1):
+            response = client.get(f"/{code}")
+
+        assert response.status_code == HTTPStatus.FOUND, (
+            f"Повторный GET-запрос на /{code} должен обслуживаться из кэша "
+            f"без запроса к ссылке (только учёт клика).\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_03_02_resolve_cache_invalidated_on_deactivation(
+        self, user_client, valid_original_link, is_active_status_false_bool
+    ):
+        code = utils.create_short_link(user_client, valid_original_link)
+        response = user_client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.FOUND
+
+        user_client.patch(
+            f"/api/links/{code}/", data=is_active_status_false_bool
+        )
+
+        response = user_client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f"После деактивации ссылки /{code} переход обслуживается "
+            f"из устаревшего кэша.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_03_03_resolve_cache_invalidated_on_delete(
+        self, user_client, valid_original_link
+    ):
+        code = utils.create_short_link(user_client, valid_original_link)
+        user_client.get(f"/{code}")
+        user_client.delete(f"/api/links/{code}/")
+
+        response = user_client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            f"После удаления ссылки /{code} переход обслуживается "
+            f"из устаревшего кэша.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_04_01_metrics_for_admin(
+        self, client, user_superuser, valid_original_link
+    ):
+        code = utils.create_short_link(client, valid_original_link)
+        client.get(f"/{code}")
+        client.get(f"/{code}")
+
+        admin_client = APIClient()
+        admin_client.force_authenticate(user=user_superuser)
+        response = admin_client.get("/api/metrics/")
+        assert response.status_code == HTTPStatus.OK, (
+            "GET-запрос администратора на /api/metrics/ не возвращает "
+            "ответ со статусом 200.\n"
+            f"Детали: {response.status_code}"
+        )
+
+        cache_stats = response.json()["resolve_cache"]
+        assert cache_stats["hits"] == 1 and cache_stats["misses"] == 1, (
+            "Счётчики попаданий и промахов кэша переходов не совпадают.\n"
+            f"Детали: {cache_stats}"
+        )
+
+    def test_04_02_metrics_not_for_user(self, user_client):
+        response = user_client.get("/api/metrics/")
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            "GET-запрос пользователя на /api/metrics/ должен возвращать "
+            "ответ со статусом 403.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_05_01_bloom_filter_rejects_unknown_code(
+        self, client, valid_original_link, monkeypatch, django_assert_num_queries
+    ):
+        monkeypatch.setattr(redirects, "_short_code_bloom", None)
+
+        with override_settings(SHORT_LINKS={"BLOOM_FILTER_ENABLED": True}):
+            code = utils.create_short_link(client, valid_original_link)
+            client.get("/NoSuchCode")
+
+            # Отрицательный ответ фильтра даётся из памяти: догрузка
+            # не чаще раза в интервал, поиска ссылки по коду нет
+            with django_assert_num_queries(0):
+                response = client.get("/NoSuchCode")
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                "GET-запрос на несуществующий код при включённом фильтре "
+                "Блума должен отсекаться без запросов к БД.\n"
+                f"Детали: {response.status_code}"
+            )
+
+            response = client.get(f"/{code}")
+            assert response.status_code == HTTPStatus.FOUND, (
+                f"GET-запрос на /{code} при включённом фильтре Блума "
+                f"не перенаправляет на оригинальную ссылку.\n"
+                f"Детали: {response.status_code}"
+            )
+
+    def test_06_01_redirect_from_shared_table(
+        self,
+        user_client,
+        tmp_path,
+        valid_original_link,
+        is_active_status_false_bool,
+        monkeypatch,
+        django_assert_num_queries,
+    ):
+        monkeypatch.setattr(redirects, "_shared_link_table", None)
+        settings = {
+            "SHARED_TABLE_ENABLED": True,
+            "SHARED_TABLE_PATH": str(tmp_path / "links.table"),
+            "SHARED_TABLE_CAPACITY": 64,
+            "SHARED_TABLE_HEAP_SIZE": 4096,
+        }
+
+        with override_settings(SHORT_LINKS=settings):
+            code = utils.create_short_link(user_client, valid_original_link)
+            # Кэш процесса пуст, как у только что запущенного воркера
+            redirects.get_resolve_cache().clear()
+
+            with django_assert_num_queries(1):
+                response = user_client.get(f"/{code}")
+            assert response.status_code == HTTPStatus.FOUND, (
+                f"GET-запрос на /{code} должен обслуживаться из общей "
+                f"таблицы без запроса к ссылке (только учёт клика).\n"
+                f"Детали: {response.status_code}"
+            )
+
+            user_client.patch(
+                f"/api/links/{code}/", data=is_active_status_false_bool
+            )
+            redirects.get_resolve_cache().clear()
+
+            response = user_client.get(f"/{code}")
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f"После деактивации ссылки /{code} переход обслуживается "
+                f"из устаревшей общей таблицы.\n"
+                f"Детали: {response.status_code}"
+            )
+
+    def test_07_01_stale_redirect_when_db_is_down(
+        self, client, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(clicks, "_click_replay_queue", None)
+        caches["links_snapshot"].clear()
+
+        def db_is_down(execute, sql, params, many, context):
+            raise OperationalError("database is down")
+
+        with override_settings(
+            SHORT_LINKS={
+                "STALE_FALLBACK_ENABLED": True,
+                "CLICK_REPLAY_RETRY_INTERVAL": 0,
+            }
+        ):
+            code = utils.create_short_link(client, valid_original_link)
+            client.get(f"/{code}")
+            redirects.get_resolve_cache().clear()
+
+            with connection.execute_wrapper(db_is_down):
+                response = client.get(f"/{code}")
+
+            assert response.status_code == HTTPStatus.FOUND, (
+                f"При недоступной БД GET-запрос на /{code} должен "
+                f"обслуживаться из снимка.\n"
+                f"Детали: {response.status_code}"
+            )
+            assert response.get("X-Viqzo-Stale") == "1", (
+                "Ответ из снимка должен содержать заголовок X-Viqzo-Stale."
+            )
+            assert clicks.get_click_replay_stats()["pending"] == 1, (
+                "Клик при недоступной БД должен быть отложен."
+            )
+
+            response = client.get(f"/{code}")
+            assert "X-Viqzo-Stale" not in response
+
+        assert ShortLink.objects.get(short=code).clicks_count == 3, (
+            "Отложенный клик не записан после восстановления БД."
+        )
+
+    def test_07_02_stale_snapshot_forgets_changed_link(
+        self, user_client, valid_original_link, is_active_status_false_bool
+    ):
+        caches["links_snapshot"].clear()
+
+        with override_settings(SHORT_LINKS={"STALE_FALLBACK_ENABLED": True}):
+            code = utils.create_short_link(user_client, valid_original_link)
+            user_client.get(f"/{code}")
+            assert caches["links_snapshot"].get(f"links:resolved:{code}")
+
+            user_client.patch(
+                f"/api/links/{code}/", data=is_active_status_false_bool
+            )
+
+            assert (
+                caches["links_snapshot"].get(f"links:resolved:{code}") is None
+            ), "Изменённая ссылка должна удаляться из снимка."
+
+    def test_07_03_snapshot_written_only_on_change(
+        self, client, valid_original_link, monkeypatch
+    ):
+        cache = caches["links_snapshot"]
+        cache.clear()
+        writes = []
+        set_value = cache.set
+
+        def counted_set(key, *args, **kwargs):
+            writes.append(key)
+            set_value(key, *args, **kwargs)
+
+        monkeypatch.setattr(cache, "set", counted_set)
+
+        with override_settings(SHORT_LINKS={"STALE_FALLBACK_ENABLED": True}):
+            code = utils.create_short_link(client, valid_original_link)
+            for _ in range(3):
+                client.get(f"/{code}")
+                redirects.get_resolve_cache().clear()
+
+        assert writes == [f"links:resolved:{code}"], (
+            "Неизменённые данные перехода не должны перезаписываться в снимке."
+            f"\nДетали: {writes}"
+        )
+
+    def test_07_04_snapshot_culls_oldest_entries(self, tmp_path):
+        cache = RecentFileBasedCache(
+            tmp_path, {"OPTIONS": {"MAX_ENTRIES": 4, "CULL_FREQUENCY": 2}}
+        )
+        for index in range(4):
+            cache.set(f"code{index}", index, timeout=None)
+            path = cache._key_to_file(f"code{index}")
+            os.utime(path, (index, index))
+
+        cache.set("code4", 4, timeout=None)
+
+        assert cache.get("code0") is None and cache.get("code1") is None, (
+            "При переполнении снимка должны удаляться самые старые записи."
+        )
+        assert all(cache.get(f"code{i}") == i for i in (2, 3, 4)), (
+            "При переполнении снимка удалены свежие записи."
+        )
+
+    def test_07_05_snapshot_marks_resolved_links_used(
+        self, client, valid_original_link, tmp_path, monkeypatch
+    ):
+        cache = RecentFileBasedCache(tmp_path, {})
+        monkeypatch.setattr(snapshot, "_snapshot_cache", lambda: cache)
+
+        with override_settings(SHORT_LINKS={"STALE_FALLBACK_ENABLED": True}):
+            code = utils.create_short_link(client, valid_original_link)
+            client.get(f"/{code}")
+            path = cache._key_to_file(f"links:resolved:{code}")
+            os.utime(path, (0, 0))
+
+            redirects.get_resolve_cache().clear()
+            client.get(f"/{code}")
+
+        assert os.path.getmtime(path) > 0, (
+            "Переход по неизменённой ссылке должен отмечать запись снимка "
+            "использованной, иначе она удаляется первой при переполнении."
+        )
+
+    @override_settings(SHORT_LINKS={"SHORT_CODE_DECODABLE": True})
+    def test_08_01_redirect_by_decodable_code(
+        self,
+        client,
+        valid_original_link,
+        original_link_with_alias,
+        django_assert_num_queries,
+    ):
+        code = utils.create_short_link(client, valid_original_link)
+        link = ShortLink.objects.get(short=code)
+        assert decode_short_code(code) == link.pk, (
+            "При SHORT_CODE_DECODABLE код ссылки не декодируется в её ключ."
+        )
+
+        redirects.get_resolve_cache().clear()
+        with django_assert_num_queries(2):
+            response = client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.FOUND, (
+            f"GET-запрос на /{code} должен искать ссылку по первичному "
+            f"ключу одним запросом (и учесть клик).\n"
+            f"Детали: {response.status_code}"
+        )
+
+        alias = utils.create_alias_link(client, original_link_with_alias)
+        response = client.get(f"/{alias}")
+        assert response.status_code == HTTPStatus.FOUND, (
+            f"При SHORT_CODE_DECODABLE alias /{alias} не перенаправляет "
+            f"на оригинальную ссылку.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    @override_settings(SHORT_LINKS={"SHORT_CODE_DECODABLE": True})
+    def test_08_02_other_codes_skip_key_lookup(
+        self, client, valid_original_link, django_assert_num_queries
+    ):
+        # Случайный код той же длины, что и код ключа без контрольного
+        # символа
+        code = "Random7"
+        ShortLink.objects.create(short=code, **valid_original_link)
+        assert decode_short_code(code) is None
+
+        redirects.get_resolve_cache().clear()
+        with django_assert_num_queries(2):
+            response = client.get(f"/{code}")
+        assert response.status_code == HTTPStatus.FOUND, (
+            f"GET-запрос на /{code} не должен искать ссылку по первичному "
+            f"ключу: один запрос по short и учёт клика.\n"
+            f"Детали: {response.status_code}"
+        )
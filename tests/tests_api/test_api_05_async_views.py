@@ -0,0 +1,188 @@
+import json
+import asyncio
+import logging
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError
+from django.conf import settings
+from django.http import HttpResponse
+from django.urls import path, include
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.views import AsyncShortLinkCreateView
+from links.urls import get_redirect_urlpatterns
+from links.models import ShortLink
+
+
+# Маршруты как под ASGI (ASYNC_VIEWS), тесты используют их через
+# pytest.mark.urls(__name__)
+urlpatterns = [
+    path("api/links/", AsyncShortLinkCreateView.as_view()),
+    path("api/", include("api.urls")),
+    *get_redirect_urlpatterns(async_views=True),
+]
+
+
+def async_request(method: str, url: str, **kwargs):
+    """Запрос к ASGI-обработчику через AsyncClient"""
+
+    async def request():
+        return await getattr(AsyncClient(), method)(url, **kwargs)
+
+    return asyncio.run(request())
+
+
+def async_create(data: dict):
+    return async_request(
+        "post",
+        "/api/links/",
+        data=json.dumps(data),
+        content_type="application/json",
+    )
+
+
+@pytest.mark.urls(__name__)
+@pytest.mark.django_db(transaction=True)
+class Test05AsyncViews:
+    """Тестирование асинхронных view перехода и создания ссылки"""
+
+    def test_01_01_async_redirect(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        response = async_request("get", f"/{link.short}")
+
+        assert response.status_code == HTTPStatus.FOUND, (
+            f"GET-запрос на /{link.short} к асинхронному view должен "
+            f"возвращать ответ со статусом 302.\n"
+            f"Детали: {response.status_code}"
+        )
+        assert response["Location"] == link.original_link
+        link.refresh_from_db()
+        assert link.clicks_count == 1, "Асинхронный переход не учтён."
+
+    def test_01_02_async_redirect_non_existent_code(self):
+        response = async_request("get", "/NoSuchCode")
+
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            "GET-запрос на несуществующий код к асинхронному view должен "
+            "возвращать ответ со статусом 404.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_01_03_async_redirect_concurrent_clicks(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        async def redirects():
+            client = AsyncClient()
+            return await asyncio.gather(
+                *(client.get(f"/{link.short}") for _ in range(50))
+            )
+
+        responses = asyncio.run(redirects())
+
+        assert all(
+            response.status_code == HTTPStatus.FOUND for response in responses
+        ), "Не все одновременные переходы выполнены."
+        link.refresh_from_db()
+        assert link.clicks_count == 50, (
+            f"Из 50 одновременных переходов учтено {link.clicks_count}."
+        )
+
+    def test_02_01_async_create(self, valid_original_link):
+        response = async_create(valid_original_link)
+
+        assert response.status_code == HTTPStatus.CREATED, (
+            "POST-запрос неавторизованного пользователя к асинхронному "
+            "view создания должен возвращать ответ со статусом 201.\n"
+            f"Детали: {response.content}"
+        )
+        short = response.json()["short"]
+        assert ShortLink.objects.filter(
+            short=short, owner=None
+        ).exists(), "Ссылка не создана в БД."
+
+        response = async_request("get", f"/{short}")
+        assert response.status_code == HTTPStatus.FOUND
+
+    def test_02_02_async_create_invalid_link(self, invalid_original_link):
+        response = async_create(invalid_original_link)
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            "POST-запрос с невалидной ссылкой к асинхронному view создания "
+            "должен возвращать ответ со статусом 400.\n"
+            f"Детали: {response.content}"
+        )
+        assert "original_link" in response.json()
+
+    def test_02_03_authorized_create_delegated(self, user, valid_original_link):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+        )
+
+        response = client.post(
+            "/api/links/", data=valid_original_link, format="json"
+        )
+
+        assert response.status_code == HTTPStatus.CREATED, (
+            "POST-запрос с токеном должен обрабатываться ShortLinkViewSet.\n"
+            f"Детали: {response.content}"
+        )
+        assert ShortLink.objects.get(
+            short=response.json()["short"]
+        ).owner == user, "Владелец ссылки не сохранён."
+
+    def test_02_04_async_create_database_error(
+        self, valid_original_link, monkeypatch
+    ):
+        def db_is_down(*args, **kwargs):
+            raise OperationalError("database is down")
+
+        monkeypatch.setattr(ShortLink, "save", db_is_down)
+        # Ответ 5xx пишется в журнал ошибок с отправкой в Telegram
+        monkeypatch.setattr(
+            logging.getLogger("django.request"), "disabled", True
+        )
+        response = async_create(valid_original_link)
+
+        assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE, (
+            "Ошибка БД при создании ссылки должна возвращать ответ "
+            "со статусом 503, как в ShortLinkViewSet.\n"
+            f"Детали: {response.status_code}"
+        )
+        assert "detail" in response.json()
+
+    def test_02_05_session_create_delegated(
+        self, valid_original_link, monkeypatch
+    ):
+        delegated = []
+
+        def viewset_view(request):
+            delegated.append(request)
+            return HttpResponse(status=HTTPStatus.CREATED)
+
+        monkeypatch.setattr(
+            AsyncShortLinkCreateView,
+            "viewset_view",
+            staticmethod(viewset_view),
+        )
+
+        async def request():
+            client = AsyncClient()
+            client.cookies[settings.SESSION_COOKIE_NAME] = "session"
+            return await client.post(
+                "/api/links/",
+                data=json.dumps(valid_original_link),
+                content_type="application/json",
+            )
+
+        asyncio.run(request())
+
+        assert len(delegated) == 1, (
+            "Запрос с сессией должен обрабатываться ShortLinkViewSet, "
+            "а не создавать анонимную ссылку."
+        )
+        assert not ShortLink.objects.exists()
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+import pytest
+
+from links.models import ShortLink
+from tests import utils
+
+
+LINKS_PAGE_SIZE = 25
+GROUPS_AMOUNT = 5
+
+
+@pytest.fixture
+def user_links(user, user_client, valid_original_link):
+    """Страница ссылок пользователя, распределённых по группам"""
+    group_ids = [
+        utils.create_usergroup(user_client, {"name": f"Group {number}"})
+        for number in range(GROUPS_AMOUNT)
+    ]
+
+    return [
+        ShortLink.objects.create(
+            original_link=valid_original_link["original_link"],
+            owner=user,
+            group_id=group_ids[number % GROUPS_AMOUNT],
+        )
+        for number in range(LINKS_PAGE_SIZE)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("init_colors")
+class Test06QueryBudget:
+    """Тестирование количества запросов к БД на запрос к API"""
+
+    def test_01_01_links_list(self, user_client, user_links, query_budget):
+        with query_budget("links-list"):
+            response = user_client.get("/api/links/")
+
+        assert (
+            response.status_code == HTTPStatus.OK
+            and len(response.data["results"]) == LINKS_PAGE_SIZE
+        ), (
+            "GET-запрос на /api/links/ не возвращает страницу ссылок.\n"
+            f"Детали: {response.status_code}"
+        )
+        assert response.data["results"][0]["group"]["owner"] == "TestUser"
+
+    def test_01_02_links_retrieve(self, user_client, user_links, query_budget):
+        code = user_links[0].short
+
+        with query_budget("links-retrieve"):
+            response = user_client.get(f"/api/links/{code}/")
+
+        assert response.status_code == HTTPStatus.OK, (
+            f"GET-запрос на /api/links/{code}/ не возвращает ответ "
+            f"со статусом 200.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_01_03_links_update(
+        self,
+        user_client,
+        user_links,
+        is_active_status_false_bool,
+        query_budget,
+    ):
+        code = user_links[0].short
+
+        with query_budget("links-update"):
+            response = user_client.patch(
+                f"/api/links/{code}/", data=is_active_status_false_bool
+            )
+
+        assert response.status_code == HTTPStatus.OK, (
+            f"PATCH-запрос на /api/links/{code}/ не возвращает ответ "
+            f"со статусом 200.\n"
+            f"Детали: {response.status_code}"
+        )
+
+    def test_02_01_groups_list(self, user_client, user_links, query_budget):
+        with query_budget("groups-list"):
+            response = user_client.get("/api/groups/")
+
+        assert response.status_code == HTTPStatus.OK, (
+            "GET-запрос на /api/groups/ не возвращает ответ "
+            "со статусом 200.\n"
+            f"Детали: {response.status_code}"
+        )
@@ -3,7 +3,21 @@ import re
 import pytest
 
 from backend.core.enums import Limits
-from backend.links.services.url_short_logic import LinkHash, LinkIDZeroError
+from backend.links.services.url_short_logic import (
+    LinkHash,
+    LinkIDZeroError,
+    SequenceLinkHash,
+    DecodableLinkHash,
+)
+from backend.links.services.services_exceptions import (
+    ShortCodeSpaceExhaustedError,
+)
+
+
+def counter(start: int = 1):
+    """Последовательность номеров для SequenceLinkHash"""
+    numbers = iter(range(start, start + 10**9))
+    return lambda: next(numbers)
 
 
 class Test00BasicURLShort:
@@ -55,3 +69,80 @@ class Test00BasicURLShort:
 
         with pytest.raises(TypeError):
             LinkHash()._to_base_62("abcdefteststringsrtlalalal")
+
+    def test_04_02_batch_of_codes(self):
+        codes = LinkHash().get_short_codes(10_000)
+
+        assert len(codes) == len(set(codes)) == 10_000, (
+            "get_short_codes вернул неверное количество различных кодов"
+        )
+        assert all(
+            re.match(rf"^[a-zA-Z0-9]{{{Limits.BASIC_LEN_SHORT_CODE}}}$", code)
+            for code in codes
+        ), "Код из пакета не соответствует алфавиту или длине лимита"
+
+    def test_05_01_sequence_codes_are_unique(self):
+        generator = SequenceLinkHash(counter(), key="test-key")
+        codes = [generator.get_short_code() for _ in range(20_000)]
+
+        assert len(set(codes)) == len(codes), (
+            "SequenceLinkHash выдал одинаковые коды для разных номеров"
+        )
+        assert all(
+            len(code) == Limits.BASIC_LEN_SHORT_CODE for code in codes
+        ), "Код SequenceLinkHash не соответствует нужной длине лимита"
+
+    def test_05_02_sequence_permutation_is_bijective(self):
+        generator = SequenceLinkHash(counter(), key="test-key")
+
+        for link_id in (0, 1, 2, 10**6, generator.space - 1):
+            value = generator.permute(link_id)
+            assert 0 <= value < generator.space
+            assert generator.unpermute(value) == link_id, (
+                f"Перестановка номера {link_id} не обратима"
+            )
+
+        with pytest.raises(ShortCodeSpaceExhaustedError):
+            generator.permute(generator.space)
+
+    def test_05_03_sequence_codes_depend_on_key(self):
+        first = SequenceLinkHash(counter(), key="first").get_short_code()
+        second = SequenceLinkHash(counter(), key="second").get_short_code()
+        neighbour = SequenceLinkHash(counter(2), key="first").get_short_code()
+
+        assert first != second, "Код SequenceLinkHash не зависит от ключа"
+        assert first[:4] != neighbour[:4], (
+            "Соседние номера дают похожие коды"
+        )
+
+    def test_05_04_decode_sequence_code(self):
+        generator = SequenceLinkHash(counter(), key="test-key")
+
+        for link_id in (1, 42, 10**9):
+            code = generator.short_code_for(link_id)
+            assert generator.decode(code) == link_id, (
+                f"Код {code} не декодируется в номер {link_id}"
+            )
+
+        assert generator.decode("bad-code") is None
+        assert generator.decode("abc") is None
+
+    def test_05_05_decodable_code_has_check_char(self):
+        generator = DecodableLinkHash(counter(), key="test-key")
+        code = generator.short_code_for(42)
+
+        assert len(code) == Limits.BASIC_LEN_SHORT_CODE + 1
+        assert generator.decode(code) == 42, (
+            f"Код {code} не декодируется в ключ 42"
+        )
+
+        # Другой последний символ: код не считается кодом ключа
+        broken = [
+            code[:-1] + char for char in generator.alphabet if char != code[-1]
+        ]
+        assert not any(generator.decode(short) for short in broken), (
+            "Код с неверным контрольным символом декодирован в ключ"
+        )
+        assert generator.decode(code[:-1]) is None, (
+            "Код без контрольного символа декодирован в ключ"
+        )
@@ -0,0 +1,437 @@
+import time
+from threading import Barrier, Thread
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from django.core.management import call_command
+
+from links.models import ClickEvent, ShortLink, ShortLinkClickShard
+from links.services import clicks, click_events, click_buffer
+from links.services.clicks import record_click
+from links.services.click_buffer import ClickBuffer
+from links.services.click_shards import fold_click_shards
+from links.services.click_events import ClickEventWriter
+from links.services.last_clicked import LastClickedThrottle
+
+
+THREADS_AMOUNT = 8
+CLICKS_PER_THREAD = 25
+
+
+def run_in_threads(target, *args):
+    """Запуск функции одновременно в нескольких потоках"""
+    barrier = Barrier(THREADS_AMOUNT)
+    errors = []
+
+    def worker():
+        try:
+            barrier.wait()
+            target(*args)
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+        finally:
+            connection.close()
+
+    threads = [Thread(target=worker) for _ in range(THREADS_AMOUNT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return errors
+
+
+@pytest.mark.django_db(transaction=True)
+class Test02Clicks:
+    """Тестирование учёта переходов по ссылке"""
+
+    def test_01_01_record_click(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+        clicked_at = record_click(ShortLink, link.pk)
+        link.refresh_from_db()
+
+        assert link.clicks_count == 1, "Переход по ссылке не был учтён."
+        assert (
+            link.last_clicked_at == clicked_at
+        ), "Время последнего перехода не было записано."
+
+    def test_01_02_record_click_single_query(
+        self, valid_original_link, django_assert_num_queries
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        with django_assert_num_queries(1):
+            record_click(ShortLink, link.pk)
+
+    def test_02_01_parallel_clicks_are_not_lost(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        def click():
+            for _ in range(CLICKS_PER_THREAD):
+                record_click(ShortLink, link.pk)
+
+        errors = run_in_threads(click)
+        link.refresh_from_db()
+
+        assert not errors, f"Ошибки при параллельных переходах: {errors}"
+        assert link.clicks_count == THREADS_AMOUNT * CLICKS_PER_THREAD, (
+            f"При параллельных переходах потеряны клики: "
+            f"{link.clicks_count} из {THREADS_AMOUNT * CLICKS_PER_THREAD}"
+        )
+
+    def test_02_02_parallel_redirects_are_not_lost(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        def redirect():
+            client = Client()
+            for _ in range(CLICKS_PER_THREAD):
+                client.get(f"/{link.short}")
+
+        errors = run_in_threads(redirect)
+        link.refresh_from_db()
+
+        assert not errors, f"Ошибки при параллельных переходах: {errors}"
+        assert link.clicks_count == THREADS_AMOUNT * CLICKS_PER_THREAD, (
+            f"При параллельных запросах на /{link.short} потеряны клики: "
+            f"{link.clicks_count} из {THREADS_AMOUNT * CLICKS_PER_THREAD}"
+        )
+
+    def test_03_01_click_buffer_flush(
+        self, valid_original_link, django_assert_num_queries
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        other_link = ShortLink.objects.create(**valid_original_link)
+        buffer = ClickBuffer(
+            ShortLink,
+            flush_interval_ms=60_000,
+            flush_max_events=1000,
+            flush_on_shutdown=False,
+        )
+
+        for _ in range(3):
+            buffer.add(link.pk, timezone.now())
+        last_click = timezone.now()
+        buffer.add(other_link.pk, last_click)
+
+        link.refresh_from_db()
+        assert (
+            link.clicks_count == 0 and buffer.pending() == 4
+        ), "Клики из буфера не должны попадать в БД до сброса."
+
+        with django_assert_num_queries(1):
+            buffer.flush()
+
+        link.refresh_from_db()
+        other_link.refresh_from_db()
+        assert (
+            link.clicks_count == 3 and other_link.clicks_count == 1
+        ), "После сброса буфера количество кликов в БД не совпадает."
+        assert (
+            other_link.last_clicked_at == last_click
+        ), "После сброса буфера не записано время последнего перехода."
+        assert buffer.pending() == 0, "Буфер не очищен после сброса."
+
+    def test_03_02_click_buffer_flush_by_events(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+        buffer = ClickBuffer(
+            ShortLink,
+            flush_interval_ms=60_000,
+            flush_max_events=5,
+            flush_on_shutdown=False,
+        )
+
+        for _ in range(5):
+            buffer.add(link.pk, timezone.now())
+
+        link.refresh_from_db()
+        assert link.clicks_count == 5, (
+            "Буфер не сбросил клики в БД после достижения "
+            "flush_max_events переходов."
+        )
+
+    def test_03_03_redirect_with_click_buffer(
+        self, client, valid_original_link, monkeypatch
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        buffer = ClickBuffer(
+            ShortLink,
+            flush_interval_ms=60_000,
+            flush_max_events=1000,
+            flush_on_shutdown=False,
+        )
+        monkeypatch.setattr(clicks, "_click_buffer", buffer)
+
+        with override_settings(SHORT_LINKS={"CLICK_BUFFER_ENABLED": True}):
+            client.get(f"/{link.short}")
+            client.get(f"/{link.short}")
+
+        assert buffer.pending() == 2, "Переходы не попали в буфер кликов."
+
+        buffer.flush()
+        link.refresh_from_db()
+        assert link.clicks_count == 2, "Клики из буфера не записаны в БД."
+
+    @override_settings(
+        SHORT_LINKS={"CLICK_SHARDS_ENABLED": True, "CLICK_SHARDS_COUNT": 4}
+    )
+    def test_04_01_sharded_clicks_fold(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        for _ in range(20):
+            record_click(ShortLink, link.pk)
+
+        shards = ShortLinkClickShard.objects.filter(link=link)
+        assert (
+            1 <= shards.count() <= 4
+        ), "Количество шардов счётчика не соответствует CLICK_SHARDS_COUNT."
+
+        link.refresh_from_db()
+        assert (
+            link.clicks_count == 0
+        ), "Клики в шардах не должны попадать в ссылку до переноса."
+
+        fold_click_shards(ShortLink, ShortLinkClickShard)
+        link.refresh_from_db()
+
+        assert (
+            link.clicks_count == 20 and link.last_clicked_at is not None
+        ), "После переноса шардов количество кликов ссылки не совпадает."
+        assert not shards.filter(
+            clicks_count__gt=0
+        ).exists(), "После переноса в шардах остались учтённые клики."
+
+    @override_settings(
+        SHORT_LINKS={"CLICK_SHARDS_ENABLED": True, "CLICK_SHARDS_COUNT": 4}
+    )
+    def test_04_02_parallel_sharded_clicks_are_not_lost(
+        self, valid_original_link
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        def click():
+            for _ in range(CLICKS_PER_THREAD):
+                record_click(ShortLink, link.pk)
+
+        errors = run_in_threads(click)
+        call_command("fold_click_shards")
+        link.refresh_from_db()
+
+        assert not errors, f"Ошибки при параллельных переходах: {errors}"
+        assert link.clicks_count == THREADS_AMOUNT * CLICKS_PER_THREAD, (
+            f"При параллельных переходах в шарды потеряны клики: "
+            f"{link.clicks_count} из {THREADS_AMOUNT * CLICKS_PER_THREAD}"
+        )
+
+    def test_05_01_click_events_batched_write(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+        writer = ClickEventWriter(
+            ClickEvent, queue_size=100, batch_size=10, flush_interval_ms=50
+        )
+
+        for _ in range(3):
+            writer.put(
+                link.pk,
+                timezone.now(),
+                referrer="https://example.com/",
+                user_agent="pytest",
+                ip="127.0.0.1",
+            )
+        writer.flush()
+
+        events = ClickEvent.objects.filter(link=link)
+        assert events.count() == 3, "События переходов не записаны в журнал."
+
+        event = events.first()
+        assert (
+            event.referrer == "https://example.com/"
+            and event.ip_hash
+            and event.ip_hash != "127.0.0.1"
+            and event.user_agent_hash != "pytest"
+        ), "В журнал переходов должны попадать хэши, а не сами значения."
+
+    def test_05_02_redirect_without_sync_insert(
+        self,
+        client,
+        valid_original_link,
+        monkeypatch,
+        django_assert_num_queries,
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        writer = ClickEventWriter(
+            ClickEvent, queue_size=100, batch_size=10, flush_interval_ms=50
+        )
+        monkeypatch.setattr(click_events, "_writer", writer)
+
+        with override_settings(SHORT_LINKS={"CLICK_EVENTS_ENABLED": True}):
+            with django_assert_num_queries(2):
+                client.get(
+                    f"/{link.short}", HTTP_REFERER="https://example.com/"
+                )
+
+        writer.flush()
+        assert ClickEvent.objects.filter(
+            link=link, referrer="https://example.com/"
+        ).exists(), "Переход не попал в журнал переходов."
+
+    def test_06_01_last_clicked_throttle(self):
+        throttle = LastClickedThrottle(interval=0.05)
+        first, second, third = (timezone.now() for _ in range(3))
+
+        assert throttle.take(1, first) == first
+        assert throttle.take(1, second) is None, (
+            "Время клика внутри интервала не должно записываться."
+        )
+        assert throttle.take(1, third) is None
+        assert throttle.pending() == 1
+
+        time.sleep(0.06)
+        assert throttle.pop_due() == {1: third}, (
+            "После интервала должно записываться самое новое время клика."
+        )
+        assert throttle.pending() == 0
+
+    def test_06_02_record_click_with_interval(
+        self, valid_original_link, monkeypatch, django_assert_num_queries
+    ):
+        monkeypatch.setattr(clicks, "_last_clicked_throttle", None)
+        link = ShortLink.objects.create(**valid_original_link)
+
+        with override_settings(SHORT_LINKS={"LAST_CLICKED_INTERVAL": 60}):
+            first_click = record_click(ShortLink, link.pk)
+            # Один UPDATE счётчика на клик, без отдельной записи времени
+            with django_assert_num_queries(9):
+                for _ in range(9):
+                    record_click(ShortLink, link.pk)
+
+        link.refresh_from_db()
+        assert link.clicks_count == 10, "Клики внутри интервала потеряны."
+        assert link.last_clicked_at == first_click, (
+            "Время последнего клика записано чаще, чем раз в интервал."
+        )
+
+    def test_06_03_last_clicked_folded_into_buffer_flush(
+        self, valid_original_link
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        buffer = ClickBuffer(
+            ShortLink,
+            flush_interval_ms=60_000,
+            flush_max_events=1000,
+            flush_on_shutdown=False,
+            throttle=LastClickedThrottle(interval=0.05),
+        )
+
+        buffer.add(link.pk, timezone.now())
+        buffer.flush()
+        last_click = timezone.now()
+        buffer.add(link.pk, last_click)
+        buffer.flush()
+
+        link.refresh_from_db()
+        assert link.clicks_count == 2
+        assert link.last_clicked_at != last_click, (
+            "Время клика внутри интервала не должно записываться."
+        )
+
+        time.sleep(0.06)
+        buffer.flush()
+        link.refresh_from_db()
+        assert link.last_clicked_at == last_click, (
+            "Отложенное время клика не записано со следующим сбросом."
+        )
+
+    def test_06_04_edit_does_not_touch_clicks(
+        self, user, user_client, valid_original_link
+    ):
+        link = ShortLink.objects.create(owner=user, **valid_original_link)
+        record_click(ShortLink, link.pk)
+        link.refresh_from_db()
+
+        user_client.patch(
+            f"/api/links/{link.short}/", data={"is_active": False}
+        )
+
+        edited = ShortLink.objects.get(pk=link.pk)
+        assert not edited.is_active, "Ссылка не деактивирована."
+        assert (
+            edited.clicks_count,
+            edited.last_clicked_at,
+        ) == (link.clicks_count, link.last_clicked_at), (
+            "Изменение активности ссылки не должно менять "
+            "счётчик и время последнего клика."
+        )
+
+    def test_06_05_last_clicked_kept_on_flush_error(
+        self, valid_original_link, monkeypatch
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        buffer = ClickBuffer(
+            ShortLink,
+            flush_interval_ms=60_000,
+            flush_max_events=1000,
+            flush_on_shutdown=False,
+            throttle=LastClickedThrottle(interval=0.05),
+        )
+        buffer.add(link.pk, timezone.now())
+        buffer.flush()
+        last_click = timezone.now()
+        buffer.add(link.pk, last_click)
+        buffer.flush()
+        time.sleep(0.06)
+
+        def db_is_down(*args, **kwargs):
+            raise OperationalError("database is down")
+
+        # Сброс снимает отложенное время с учёта до записи в БД
+        with monkeypatch.context() as patch:
+            patch.setattr(click_buffer, "apply_clicks", db_is_down)
+            with pytest.raises(OperationalError):
+                buffer.flush()
+
+        buffer.flush()
+        link.refresh_from_db()
+        assert link.last_clicked_at == last_click, (
+            "Отложенное время клика потеряно после ошибки записи."
+        )
+
+    def test_06_06_due_write_error_keeps_click(
+        self, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(clicks, "_last_clicked_throttle", None)
+        monkeypatch.setattr(clicks, "_click_replay_queue", None)
+        first, second = (
+            ShortLink.objects.create(**valid_original_link) for _ in range(2)
+        )
+        settings = {
+            "LAST_CLICKED_INTERVAL": 0.05,
+            "STALE_FALLBACK_ENABLED": True,
+        }
+
+        def db_is_down(*args, **kwargs):
+            raise OperationalError("database is down")
+
+        with override_settings(SHORT_LINKS=settings):
+            record_click(ShortLink, first.pk)
+            last_click = record_click(ShortLink, first.pk)
+            time.sleep(0.06)
+
+            # Запись отложенного времени падает после записи клика
+            with monkeypatch.context() as patch:
+                patch.setattr(clicks, "apply_clicks", db_is_down)
+                record_click(ShortLink, second.pk)
+
+            replay_stats = clicks.get_click_replay_stats()
+            record_click(ShortLink, second.pk)
+
+        second.refresh_from_db()
+        assert second.clicks_count == 2, (
+            "Записанный клик не должен повторяться из-за ошибки записи "
+            "отложенного времени другой ссылки.\n"
+            f"Детали: {replay_stats}"
+        )
+        first.refresh_from_db()
+        assert first.last_clicked_at == last_click, (
+            "Отложенное время клика потеряно после ошибки записи."
+        )
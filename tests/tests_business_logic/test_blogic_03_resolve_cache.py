@@ -0,0 +1,43 @@
+from links.services.resolve_cache import LRUCache
+
+
+class Test03ResolveCache:
+    """Тестирование LRU-кэша переходов"""
+
+    def test_01_01_get_and_set(self):
+        cache = LRUCache(max_size=10, ttl_seconds=60)
+        cache.set("abcdefg", 1)
+
+        assert cache.get("abcdefg") == 1, "Значение не сохранилось в кэше."
+        assert cache.get("missing") is None, "Промах кэша должен давать None."
+        assert (
+            cache.hits == 1 and cache.misses == 1
+        ), "Счётчики попаданий и промахов кэша не совпадают."
+
+    def test_01_02_lru_eviction(self):
+        cache = LRUCache(max_size=2, ttl_seconds=60)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.get("first")
+        cache.set("third", 3)
+
+        assert (
+            cache.get("second") is None
+        ), "Из кэша должна вытесняться давно не использованная запись."
+        assert (
+            cache.get("first") == 1 and cache.get("third") == 3
+        ), "Из кэша вытеснены недавно использованные записи."
+
+    def test_01_03_ttl_expiration(self):
+        cache = LRUCache(max_size=10, ttl_seconds=-1)
+        cache.set("abcdefg", 1)
+
+        assert cache.get("abcdefg") is None, "Устаревшая запись кэша вернулась."
+        assert cache.stats()["size"] == 0, "Устаревшая запись не удалена."
+
+    def test_01_04_invalidate(self):
+        cache = LRUCache(max_size=10, ttl_seconds=60)
+        cache.set("abcdefg", 1)
+        cache.invalidate("abcdefg")
+
+        assert cache.get("abcdefg") is None, "Запись кэша не была сброшена."
@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from links.models import ShortLink
+from links.services.bloom import BloomFilter, ShortCodeBloom
+
+
+@pytest.mark.django_db(transaction=True)
+class Test04Bloom:
+    """Тестирование фильтра Блума коротких кодов"""
+
+    def test_01_01_no_false_negatives(self):
+        bloom = BloomFilter(capacity=5000, fp_rate=0.01)
+        codes = [f"code{i}" for i in range(5000)]
+
+        for code in codes:
+            bloom.add(code)
+
+        assert all(
+            code in bloom for code in codes
+        ), "Фильтр Блума не должен давать ложноотрицательных ответов."
+
+    def test_01_02_false_positive_rate(self):
+        fp_rate = 0.01
+        bloom = BloomFilter(capacity=5000, fp_rate=fp_rate)
+
+        for i in range(5000):
+            bloom.add(f"code{i}")
+
+        false_positives = sum(f"other{i}" in bloom for i in range(20000))
+        assert false_positives / 20000 < fp_rate * 2, (
+            f"Доля ложных срабатываний {false_positives / 20000} "
+            f"сильно превышает заданную {fp_rate}."
+        )
+        assert (
+            bloom.estimated_fp_rate() < fp_rate * 2
+        ), "Оценка доли ложных срабатываний не соответствует заданной."
+
+    def test_02_01_reject_with_one_reload(
+        self, valid_original_link, django_assert_num_queries
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        bloom = ShortCodeBloom(
+            ShortLink, fp_rate=0.01, reload_overlap=10, reload_interval=0
+        )
+        bloom.build()
+
+        with django_assert_num_queries(0):
+            assert bloom.might_exist(link.short), "Существующий код отсечён."
+
+        with django_assert_num_queries(1):
+            assert not bloom.might_exist(
+                "NoSuchCode"
+            ), "Несуществующий код не отсечён фильтром."
+
+        assert bloom.stats()["rejected"] == 1
+
+    def test_02_02_codes_from_other_workers(self, valid_original_link):
+        bloom = ShortCodeBloom(
+            ShortLink, fp_rate=0.01, reload_overlap=10, reload_interval=0
+        )
+        bloom.build()
+
+        # bulk_create не отправляет сигналы, как и сохранение в другом воркере
+        (link,) = ShortLink.objects.bulk_create(
+            [ShortLink(short="OtherWrk", **valid_original_link)]
+        )
+
+        assert bloom.might_exist(
+            link.short
+        ), "Код, созданный другим воркером, не подгружен в фильтр."
+
+    def test_02_03_late_commit_with_lower_pk(self, valid_original_link):
+        ShortLink.objects.bulk_create(
+            [
+                ShortLink(pk=1, short="FirstCd", **valid_original_link),
+                ShortLink(pk=5, short="LaterCd", **valid_original_link),
+            ]
+        )
+        bloom = ShortCodeBloom(
+            ShortLink, fp_rate=0.01, reload_overlap=10, reload_interval=0
+        )
+        bloom.build()
+        assert not bloom.might_exist("NoSuchCode")
+
+        # Транзакция другого воркера с pk=3 закоммичена после pk=5
+        (late,) = ShortLink.objects.bulk_create(
+            [ShortLink(pk=3, short="LateCmt", **valid_original_link)]
+        )
+
+        assert bloom.might_exist(late.short), (
+            "Код с меньшим pk, закоммиченный позже, отсечён фильтром."
+        )
+
+    def test_02_04_misses_answered_from_memory(
+        self, django_assert_num_queries
+    ):
+        bloom = ShortCodeBloom(
+            ShortLink, fp_rate=0.01, reload_overlap=10, reload_interval=60
+        )
+        bloom.build()
+
+        with django_assert_num_queries(0):
+            for i in range(100):
+                assert not bloom.might_exist(f"Miss{i}")
+
+        assert bloom.stats()["reloads"] == 0, (
+            "Промахи внутри интервала не должны догружать коды из БД."
+        )
+
+        bloom._reloaded_at = time.monotonic() - 60
+        with django_assert_num_queries(1):
+            assert not bloom.might_exist("MissAfter")
+            assert not bloom.might_exist("MissAgain")
+
+        assert bloom.stats()["reloads"] == 1, (
+            "После интервала промах должен догрузить коды один раз."
+        )
+
+    def test_02_05_codes_added_during_build(self, monkeypatch):
+        bloom = ShortCodeBloom(
+            ShortLink, fp_rate=0.01, reload_overlap=10, reload_interval=0
+        )
+        load = bloom._load
+
+        def load_and_add(filter_, last_pk):
+            bloom.add("AddedDuringBuild")
+            return load(filter_, last_pk)
+
+        monkeypatch.setattr(bloom, "_load", load_and_add)
+        bloom.build()
+
+        assert "AddedDuringBuild" in bloom._filter, (
+            "Код, добавленный во время построения, потерян."
+        )
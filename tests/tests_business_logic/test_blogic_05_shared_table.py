@@ -0,0 +1,226 @@
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+import pytest
+from django.test import override_settings
+from django.core.management import call_command
+
+from links.models import ShortLink
+from links.services import redirects, shared_table
+from links.services.shared_table import SharedLinkTable
+
+
+def read_in_other_process(path: Path, short: str) -> str:
+    """Чтение таблицы из отдельного процесса, как в другом воркере"""
+    script = (
+        "from links.services.shared_table import SharedLinkTable\n"
+        f"print(SharedLinkTable({str(path)!r}, 64, 4096).get({short!r}))"
+    )
+    return subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(__file__).resolve().parents[2] / "backend",
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture()
+def shared_table_path(tmp_path):
+    return tmp_path / "links.table"
+
+
+@pytest.mark.django_db(transaction=True)
+class Test05SharedTable:
+    """Тестирование общей таблицы кодов в memory-mapped файле"""
+
+    def test_01_01_put_and_get(self, shared_table_path):
+        table = SharedLinkTable(shared_table_path, capacity=64, heap_size=4096)
+
+        assert table.put("AbCd1234", 1, "https://example.com/", True)
+        assert table.get("AbCd1234") == (1, "https://example.com/", True)
+        assert table.get("NoSuchCode") is None, "Найден несуществующий код."
+
+    def test_01_02_update_and_delete(self, shared_table_path):
+        table = SharedLinkTable(shared_table_path, capacity=64, heap_size=4096)
+        table.put("AbCd1234", 1, "https://example.com/", True)
+
+        table.put("AbCd1234", 1, "https://example.com/", False)
+        assert table.get("AbCd1234") == (1, "https://example.com/", False), (
+            "Изменение флага активности не записано в таблицу."
+        )
+        assert table.stats()["items"] == 1, "Обновление добавило новый слот."
+
+        table.delete("AbCd1234")
+        assert table.get("AbCd1234") is None, "Удалённый код найден."
+
+    def test_01_03_capacity_limit(self, shared_table_path):
+        table = SharedLinkTable(shared_table_path, capacity=10, heap_size=4096)
+
+        saved = [
+            table.put(f"code{i}", i, "https://example.com/", True)
+            for i in range(10)
+        ]
+        assert saved.count(True) == 7, "Таблица заполнена сверх 70% слотов."
+        assert all(
+            table.get(f"code{i}") is not None for i in range(7)
+        ), "Записанные коды не найдены."
+
+    def test_01_04_expired_entry_is_miss(self, shared_table_path, monkeypatch):
+        table = SharedLinkTable(
+            shared_table_path, capacity=64, heap_size=4096, ttl=60
+        )
+        table.put("AbCd1234", 1, "https://example.com/", True)
+        assert table.get("AbCd1234") is not None, "Свежая запись не найдена."
+
+        now = time.time()
+        monkeypatch.setattr(shared_table.time, "time", lambda: now + 61)
+        assert table.get("AbCd1234") is None, (
+            "Запись старше TTL не отправлена в БД."
+        )
+
+        table.put("AbCd1234", 1, "https://example.com/", False)
+        assert table.get("AbCd1234") == (1, "https://example.com/", False), (
+            "Перезапись не обновила время записи."
+        )
+
+    def test_01_05_old_version_file_replaced(self, shared_table_path):
+        SharedLinkTable.create_file(shared_table_path, 64, 4096)
+        with open(shared_table_path, "r+b") as file:
+            header = list(shared_table.HEADER.unpack_from(file.read(64)))
+            header[1] = shared_table.VERSION - 1
+            file.seek(0)
+            file.write(shared_table.HEADER.pack(*header))
+
+        table = SharedLinkTable(shared_table_path, capacity=64, heap_size=4096)
+        assert table.get("AbCd1234") is None
+        assert table.put("AbCd1234", 1, "https://example.com/", True), (
+            "Файл прошлой версии не заменён новым."
+        )
+
+    def test_01_06_deleted_slots_counted_and_reused(
+        self, shared_table_path, caplog
+    ):
+        table = SharedLinkTable(shared_table_path, capacity=10, heap_size=4096)
+        for i in range(7):
+            table.put(f"code{i}", i, "https://example.com/", True)
+        for i in range(3):
+            table.delete(f"code{i}")
+
+        stats = table.stats()
+        assert (stats["items"], stats["deleted"]) == (4, 3), (
+            f"Удалённые слоты не учтены.\nДетали: {stats}"
+        )
+        assert stats["needs_rebuild"], (
+            "Таблица с долей удалённых слотов выше порога "
+            "должна требовать пересборки."
+        )
+
+        for i in range(3):
+            assert table.put(f"code{i}", i, "https://example.com/", True), (
+                "Слот удалённого кода не используется повторно."
+            )
+        assert table.stats()["deleted"] == 0
+        assert "build_shared_link_table" in caplog.text, (
+            "О необходимости пересборки не предупреждено в логе."
+        )
+
+    def test_01_07_full_heap_counted(self, shared_table_path, caplog):
+        table = SharedLinkTable(shared_table_path, capacity=64, heap_size=48)
+
+        saved = [
+            table.put(f"code{i}", i, "https://example.com/", True)
+            for i in range(4)
+        ]
+        assert saved.count(False) == 2, "Код записан в заполненную кучу."
+
+        stats = table.stats()
+        assert stats["rejected"] == 2 and stats["needs_rebuild"], (
+            f"Незаписанные коды не учтены в статистике.\nДетали: {stats}"
+        )
+        assert caplog.text.count("build_shared_link_table") == 1, (
+            "Предупреждение о пересборке должно писаться один раз."
+        )
+
+    def test_02_01_visible_to_other_process(self, shared_table_path):
+        SharedLinkTable(shared_table_path, capacity=64, heap_size=4096).put(
+            "AbCd1234", 1, "https://example.com/", True
+        )
+
+        result = read_in_other_process(shared_table_path, "AbCd1234")
+        assert result == str((1, "https://example.com/", True)), (
+            "Код, записанный одним процессом, не виден в другом."
+        )
+
+    def test_03_01_rebuild_command(
+        self, shared_table_path, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(redirects, "_shared_link_table", None)
+        links = ShortLink.objects.bulk_create(
+            [ShortLink(short=f"Build{i}", **valid_original_link) for i in "ab"]
+        )
+        settings = {
+            "SHARED_TABLE_ENABLED": True,
+            "SHARED_TABLE_PATH": str(shared_table_path),
+            "SHARED_TABLE_CAPACITY": 64,
+            "SHARED_TABLE_HEAP_SIZE": 4096,
+        }
+
+        with override_settings(SHORT_LINKS=settings):
+            table = redirects.get_shared_link_table()
+            table.put("Stale1", 999, "https://stale.example.com/", True)
+            old_mm = table._mm
+
+            call_command("build_shared_link_table")
+
+            assert table.get("Stale1") is None, (
+                "После пересборки читатели не переоткрыли таблицу."
+            )
+            assert old_mm.closed, "Отображение старого файла не закрыто."
+            for link in links:
+                assert table.get(link.short) == (
+                    link.pk,
+                    link.original_link,
+                    True,
+                ), f"Код {link.short} не записан при пересборке."
+
+    def test_03_02_changes_during_rebuild_kept(
+        self, shared_table_path, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(redirects, "_shared_link_table", None)
+        links = ShortLink.objects.bulk_create(
+            [ShortLink(short=f"Build{i}", **valid_original_link) for i in "ab"]
+        )
+        settings = {
+            "SHARED_TABLE_ENABLED": True,
+            "SHARED_TABLE_PATH": str(shared_table_path),
+            "SHARED_TABLE_CAPACITY": 64,
+            "SHARED_TABLE_HEAP_SIZE": 4096,
+        }
+        put_many = SharedLinkTable.put_many
+
+        def put_many_with_writes(new_table, rows):
+            saved_amount = put_many(new_table, rows)
+            # Другой воркер меняет таблицу, пока собирается новый файл
+            table.delete(links[0].short)
+            table.put("Fresh1", 1000, "https://fresh.example.com/", True)
+            return saved_amount
+
+        monkeypatch.setattr(SharedLinkTable, "put_many", put_many_with_writes)
+
+        with override_settings(SHORT_LINKS=settings):
+            table = redirects.get_shared_link_table()
+            call_command("build_shared_link_table")
+
+            assert table.get(links[0].short) is None, (
+                "Удаление во время пересборки потеряно."
+            )
+            assert table.get("Fresh1") == (
+                1000,
+                "https://fresh.example.com/",
+                True,
+            ), "Запись во время пересборки потеряна."
+            assert table.get(links[1].short) is not None
+            assert not table.journal_path.exists(), "Журнал не удалён."
@@ -0,0 +1,163 @@
+import time
+import asyncio
+from threading import Barrier, Thread
+
+import pytest
+
+from links.models import ShortLink
+from links.services import redirects
+from links.services.single_flight import SingleFlight, AsyncSingleFlight
+
+
+THREADS_AMOUNT = 8
+
+
+def slow_lookup(calls: list, result="value"):
+    """Медленный запрос с подсчётом вызовов"""
+
+    def lookup(*args):
+        calls.append(args)
+        time.sleep(0.1)
+        return result
+
+    return lookup
+
+
+def run_in_threads(target) -> list:
+    """Одновременный вызов в нескольких потоках, возвращает результаты"""
+    barrier = Barrier(THREADS_AMOUNT)
+    results = []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:  # noqa: BLE001
+            results.append(e)
+
+    threads = [Thread(target=worker) for _ in range(THREADS_AMOUNT)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+@pytest.mark.django_db(transaction=True)
+class Test06SingleFlight:
+    """Тестирование объединения одновременных промахов кэша"""
+
+    def test_01_01_threads_share_one_call(self):
+        flight, calls = SingleFlight(), []
+        lookup = slow_lookup(calls)
+
+        results = run_in_threads(lambda: flight.do("code", lookup))
+
+        assert len(calls) == 1, (
+            f"Одновременные вызовы с одним ключом выполнили функцию "
+            f"{len(calls)} раз вместо одного."
+        )
+        assert results == ["value"] * THREADS_AMOUNT
+        assert flight.stats() == {
+            "executed": 1,
+            "coalesced": THREADS_AMOUNT - 1,
+        }
+
+    def test_01_02_error_shared_and_not_cached(self):
+        flight = SingleFlight()
+
+        def failing():
+            time.sleep(0.1)
+            raise ValueError("db is down")
+
+        results = run_in_threads(lambda: flight.do("code", failing))
+
+        assert all(
+            isinstance(result, ValueError) for result in results
+        ), "Исключение первого вызова должно передаваться ожидающим."
+        assert flight.do("code", lambda: "value") == "value", (
+            "Ошибка не должна запоминаться для следующих вызовов."
+        )
+
+    def test_02_01_coroutines_share_one_call(self):
+        flight, calls = AsyncSingleFlight(), []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "value"
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.do("code", lookup) for _ in range(100))
+            )
+
+        results = asyncio.run(main())
+
+        assert len(calls) == 1, (
+            f"Одновременные корутины с одним ключом выполнили функцию "
+            f"{len(calls)} раз вместо одного."
+        )
+        assert results == ["value"] * 100
+
+    def test_02_02_leader_cancelled(self):
+        flight, calls = AsyncSingleFlight(), []
+
+        async def lookup():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "value"
+
+        async def main():
+            leader = asyncio.create_task(flight.do("code", lookup))
+            await asyncio.sleep(0)
+            waiter = asyncio.create_task(flight.do("code", lookup))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await waiter
+
+        assert asyncio.run(main()) == "value", (
+            "Отмена первого вызова не должна отменять ожидающих."
+        )
+        assert len(calls) == 2
+
+    def test_03_01_resolve_short_code_coalesced(
+        self, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(redirects, "_resolve_flight", SingleFlight())
+        link = ShortLink.objects.create(**valid_original_link)
+        resolved = redirects.ResolvedLink(
+            link.pk, link.original_link, link.is_active
+        )
+        calls = []
+        monkeypatch.setattr(
+            redirects, "_resolve_from_shared", slow_lookup(calls, resolved)
+        )
+
+        results = run_in_threads(
+            lambda: redirects.resolve_short_code(ShortLink, link.short)
+        )
+
+        assert len(calls) == 1, (
+            f"Одновременные промахи по коду выполнили {len(calls)} "
+            f"запросов вместо одного."
+        )
+        assert results == [resolved] * THREADS_AMOUNT
+
+    def test_03_02_aresolve_short_code(self, valid_original_link):
+        link = ShortLink.objects.create(**valid_original_link)
+
+        async def main():
+            return await asyncio.gather(
+                *(
+                    redirects.aresolve_short_code(ShortLink, link.short)
+                    for _ in range(10)
+                )
+            )
+
+        results = asyncio.run(main())
+
+        assert results == [
+            (link.pk, link.original_link, link.is_active)
+        ] * 10, "Асинхронное получение ссылки вернуло неверные данные."
@@ -0,0 +1,372 @@
+from threading import Barrier, Thread
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from rest_framework.exceptions import ValidationError
+from django.core.management import call_command
+
+from links.models import (
+    ShortLink,
+    ShortCodePool,
+    ShortCodeSequence,
+    ShortCodeQuarantine,
+)
+from links.services import short_links
+from links.services.code_pool import lease_short_code, refill_short_code_pool
+from links.services.code_length import AdaptiveCodeLength
+from links.services.code_sequence import IdBlockAllocator
+from links.services.url_short_logic import LinkHash
+
+
+THREADS_AMOUNT = 8
+LEASES_PER_THREAD = 5
+POOL_ENABLED = {"SHORT_CODE_POOL_ENABLED": True}
+QUARANTINE_ENABLED = {
+    "SHORT_CODE_QUARANTINE_ENABLED": True,
+    "SHORT_CODE_QUARANTINE_DAYS": 0,
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test07CodePool:
+    """Тестирование пула заранее сгенерированных коротких кодов"""
+
+    def test_01_01_refill_up_to_size(self):
+        added = refill_short_code_pool(ShortCodePool, ShortLink, 50, 20)
+
+        assert added == 50 and ShortCodePool.objects.count() == 50, (
+            "Пул не пополнен до заданного размера.\n"
+            f"Детали: {added}, {ShortCodePool.objects.count()}"
+        )
+        assert (
+            refill_short_code_pool(ShortCodePool, ShortLink, 50, 20) == 0
+        ), "Заполненный пул не должен пополняться."
+
+    def test_01_02_refill_skips_taken_codes(
+        self, valid_original_link, monkeypatch
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        monkeypatch.setattr(
+            "links.services.code_pool.LinkHash.get_short_codes",
+            lambda self, amount: [link.short],
+        )
+
+        refill_short_code_pool(ShortCodePool, ShortLink, 1, 1_000)
+        assert not ShortCodePool.objects.filter(short=link.short).exists(), (
+            "В пул попал код, уже занятый ссылкой."
+        )
+
+    def test_01_03_refill_command(self):
+        call_command("refill_short_code_pool", size=10, batch=3)
+        assert ShortCodePool.objects.count() == 10, (
+            "Команда refill_short_code_pool не пополнила пул."
+        )
+
+    def test_01_04_batch_codes_skip_taken(
+        self, valid_original_link, monkeypatch, django_assert_num_queries
+    ):
+        link = ShortLink.objects.create(**valid_original_link)
+        batches = iter([[link.short, "FreeCd1"], ["FreeCd2"]])
+        monkeypatch.setattr(
+            "links.services.short_links.LinkHash.get_short_codes",
+            lambda self, amount: next(batches),
+        )
+
+        with django_assert_num_queries(2):
+            codes = short_links.get_short_codes(ShortLink, 2)
+
+        assert codes == ["FreeCd1", "FreeCd2"], (
+            "Пакет кодов должен проверяться в БД и заменять занятые.\n"
+            f"Детали: {codes}"
+        )
+
+    def test_02_01_lease_removes_code(self):
+        refill_short_code_pool(ShortCodePool, ShortLink, 2, 2)
+        codes = set(ShortCodePool.objects.values_list("short", flat=True))
+
+        leased = {lease_short_code(ShortCodePool) for _ in range(2)}
+        assert leased == codes, "Выданы коды не из пула или повторно."
+        assert lease_short_code(ShortCodePool) is None, (
+            "Пустой пул должен возвращать None."
+        )
+
+    def test_02_02_concurrent_lease_unique(self):
+        refill_short_code_pool(ShortCodePool, ShortLink, 40, 40)
+        codes = set(ShortCodePool.objects.values_list("short", flat=True))
+        barrier = Barrier(THREADS_AMOUNT)
+        leased, errors = [], []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(LEASES_PER_THREAD):
+                    leased.append(lease_short_code(ShortCodePool))
+            except Exception as e:  # noqa: BLE001
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=worker) for _ in range(THREADS_AMOUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors, f"Ошибки при выдаче кодов: {errors}"
+        assert len(leased) == len(set(leased)) == len(codes), (
+            "Один код выдан нескольким потокам."
+        )
+        assert set(leased) == codes, "Выданы коды не из пула."
+        assert not ShortCodePool.objects.exists()
+
+    def test_03_01_new_link_uses_pooled_code(self, valid_original_link):
+        refill_short_code_pool(ShortCodePool, ShortLink, 1, 1)
+        pooled = ShortCodePool.objects.get().short
+
+        with override_settings(SHORT_LINKS=POOL_ENABLED):
+            link = ShortLink.objects.create(**valid_original_link)
+
+        assert link.short == pooled, (
+            "При SHORT_CODE_POOL_ENABLED код ссылки берётся не из пула.\n"
+            f"Детали: {link.short} != {pooled}"
+        )
+        assert not ShortCodePool.objects.exists(), (
+            "Выданный код должен удаляться из пула."
+        )
+
+    def test_03_02_empty_pool_falls_back(self, valid_original_link):
+        with override_settings(SHORT_LINKS=POOL_ENABLED):
+            link = ShortLink.objects.create(**valid_original_link)
+
+        assert link.short, "При пустом пуле код ссылки не сгенерирован."
+
+    def test_03_03_alias_discards_pooled_code(self, original_link_with_alias):
+        alias = original_link_with_alias["alias"]
+        ShortCodePool.objects.create(short=alias)
+
+        with override_settings(SHORT_LINKS=POOL_ENABLED):
+            ShortLink.objects.create(
+                original_link=original_link_with_alias["original_link"],
+                short=alias,
+            )
+
+        assert not ShortCodePool.objects.filter(short=alias).exists(), (
+            "Код, занятый пользовательским alias, остался в пуле."
+        )
+
+    def test_04_01_sequence_generator(self, valid_original_link, monkeypatch):
+        monkeypatch.setattr(short_links, "_code_id_allocator", None)
+
+        with override_settings(SHORT_LINKS={"SHORT_CODE_GENERATOR": "sequence"}):
+            first = ShortLink.objects.create(**valid_original_link)
+            second = ShortLink.objects.create(**valid_original_link)
+
+        assert first.short != second.short, (
+            "SHORT_CODE_GENERATOR = sequence выдал одинаковые коды."
+        )
+        # Оба номера из одного блока SHORT_CODE_ID_BLOCK_SIZE
+        assert ShortCodeSequence.objects.count() == 1, (
+            "Номера кодов не берутся из последовательности."
+        )
+
+    def test_05_01_block_allocator_hands_out_ranges(self):
+        hi_values = iter(range(1, 100))
+        allocator = IdBlockAllocator(lambda: next(hi_values), block_size=10)
+
+        ids = [allocator.next_id() for _ in range(5)] + allocator.take(20)
+        assert ids == list(range(10, 35)), (
+            "Номера блоков выдаются не по схеме hi/lo.\n"
+            f"Детали: {ids}"
+        )
+        assert allocator.stats()["blocks_reserved"] == 3, (
+            "Блок должен резервироваться одним обращением к последовательности."
+        )
+
+    def test_05_02_block_allocator_for_links(
+        self, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(short_links, "_code_id_allocator", None)
+        settings = {
+            "SHORT_CODE_GENERATOR": "sequence",
+            "SHORT_CODE_ID_BLOCK_SIZE": 100,
+        }
+
+        with override_settings(SHORT_LINKS=settings):
+            links = [
+                ShortLink.objects.create(**valid_original_link)
+                for _ in range(3)
+            ]
+            codes = short_links.get_sequence_link_hash().get_short_codes(50)
+
+        shorts = {link.short for link in links} | set(codes)
+        assert len(shorts) == 53, "Коды из блока номеров повторяются."
+        assert ShortCodeSequence.objects.count() == 1, (
+            "Номера для ссылок должны браться из одного блока.\n"
+            f"Детали: {ShortCodeSequence.objects.count()}"
+        )
+
+    def test_06_01_length_grows_with_occupancy(self, valid_original_link):
+        for _ in range(3):
+            ShortLink.objects.create(**valid_original_link)
+
+        tracker = AdaptiveCodeLength(
+            ShortLink,
+            base_len=62,
+            min_length=7,
+            max_length=16,
+            max_collision_rate=1e-13,
+            refresh_interval=60,
+        )
+        assert tracker.current_length() == 8, (
+            "Длина кода не выросла при превышении вероятности совпадения.\n"
+            f"Детали: {tracker.stats()}"
+        )
+        assert tracker.stats()["occupancy"] == {7: 3}
+
+    def test_06_02_adaptive_length_for_new_links(
+        self, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(short_links, "_code_length_tracker", None)
+        ShortLink.objects.create(**valid_original_link)
+        monkeypatch.setattr(short_links, "_code_length_tracker", None)
+        settings = {
+            "SHORT_CODE_ADAPTIVE_LENGTH": True,
+            "SHORT_CODE_MAX_COLLISION_RATE": 1e-13,
+        }
+
+        with override_settings(SHORT_LINKS=settings):
+            link = ShortLink.objects.create(**valid_original_link)
+
+        assert len(link.short) == 8, (
+            "При SHORT_CODE_ADAPTIVE_LENGTH код не удлиняется "
+            "с заполненностью.\n"
+            f"Детали: {link.short}"
+        )
+
+    def test_06_03_retry_rate(self, valid_original_link, monkeypatch):
+        taken = ShortLink.objects.create(**valid_original_link).short
+        monkeypatch.setattr(short_links, "_code_length_tracker", None)
+        codes = iter([taken, "FreeCd1"])
+        monkeypatch.setattr(
+            "links.services.short_links.LinkHash.get_short_code",
+            lambda self: next(codes),
+        )
+
+        ShortLink.objects.create(**valid_original_link)
+        stats = short_links.get_short_code_stats()
+        assert stats["retries"] == 1 and stats["retry_rate"] == 0.5, (
+            "Повтор генерации из-за занятого кода не учтён в метриках.\n"
+            f"Детали: {stats}"
+        )
+
+    def test_06_04_single_codes_uniform(self):
+        generator = LinkHash()
+        codes = [generator.get_short_code() for _ in range(3000)]
+
+        first_chars = {code[0] for code in codes}
+        assert len(first_chars) == generator.base_len, (
+            "Первый символ кода должен принимать все значения алфавита, "
+            "иначе пространство кодов меньше base_len ** длина.\n"
+            f"Детали: {sorted(first_chars)}"
+        )
+
+    def test_06_05_retry_rate_counts_random_codes(
+        self, valid_original_link, monkeypatch
+    ):
+        monkeypatch.setattr(short_links, "_code_length_tracker", None)
+        monkeypatch.setattr(short_links, "_code_id_allocator", None)
+
+        with override_settings(
+            SHORT_LINKS={"SHORT_CODE_GENERATOR": "sequence"}
+        ):
+            ShortLink.objects.create(**valid_original_link)
+        assert short_links.get_short_code_stats() is None, (
+            "Вставки кодов последовательности не должны учитываться "
+            "в доле повторов случайных кодов."
+        )
+
+        ShortLink.objects.create(**valid_original_link)
+        assert short_links.get_short_code_stats()["attempts"] == 1
+
+    def test_07_01_deleted_code_quarantined(
+        self, valid_original_link, original_link_with_alias
+    ):
+        with override_settings(SHORT_LINKS=QUARANTINE_ENABLED):
+            link = ShortLink.objects.create(**valid_original_link)
+            alias_link = ShortLink.objects.create(
+                original_link=original_link_with_alias["original_link"],
+                short=original_link_with_alias["alias"],
+            )
+            link.delete()
+            alias_link.delete()
+
+        quarantined = list(
+            ShortCodeQuarantine.objects.values_list("short", flat=True)
+        )
+        assert quarantined == [link.short], (
+            "На карантин должен попадать только сгенерированный код "
+            "удалённой ссылки.\n"
+            f"Детали: {quarantined}"
+        )
+
+    def test_07_02_released_codes_refill_pool_first(self, valid_original_link):
+        with override_settings(SHORT_LINKS=QUARANTINE_ENABLED):
+            taken = ShortLink.objects.create(**valid_original_link)
+            released = ShortLink.objects.create(**valid_original_link)
+            taken.delete()
+            released.delete()
+        # Код занят alias за время карантина
+        ShortLink.objects.create(
+            original_link=valid_original_link["original_link"],
+            short=taken.short,
+        )
+
+        with override_settings(SHORT_LINKS=QUARANTINE_ENABLED):
+            call_command("refill_short_code_pool", size=1, batch=10)
+
+        pooled = list(ShortCodePool.objects.values_list("short", flat=True))
+        assert pooled == [released.short], (
+            "Код с истёкшим карантином должен попадать в пул "
+            "раньше случайных, занятый код - нет.\n"
+            f"Детали: {pooled}"
+        )
+        assert not ShortCodeQuarantine.objects.exists(), (
+            "Перенесённые коды должны сниматься с карантина."
+        )
+
+    def test_07_03_quarantined_code_not_reused(
+        self, valid_original_link, monkeypatch
+    ):
+        settings = {**QUARANTINE_ENABLED, "SHORT_CODE_QUARANTINE_DAYS": 180}
+
+        with override_settings(SHORT_LINKS=settings):
+            deleted = ShortLink.objects.create(**valid_original_link)
+            deleted.delete()
+
+            with pytest.raises(ValidationError) as error:
+                ShortLink.objects.create(
+                    original_link=valid_original_link["original_link"],
+                    short=deleted.short,
+                )
+            assert "alias_error" in error.value.detail, (
+                "Alias не должен занимать код на карантине."
+            )
+
+            monkeypatch.setattr(
+                "links.services.code_pool.LinkHash.get_short_codes",
+                lambda self, amount: [deleted.short, "FreeCd1"][:amount],
+            )
+            refill_short_code_pool(
+                ShortCodePool,
+                ShortLink,
+                2,
+                2,
+                quarantine_model=ShortCodeQuarantine,
+            )
+
+        pooled = list(ShortCodePool.objects.values_list("short", flat=True))
+        assert pooled == ["FreeCd1"], (
+            "Код на карантине не должен попадать в пул как новый.\n"
+            f"Детали: {pooled}"
+        )
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.apps import apps
+from django.test import override_settings
+
+from links.models import ShortLink
+from links.services import word_filter
+from links.services.word_filter import AhoCorasick, ShortCodeWordFilter
+from links.services.url_short_logic import LinkHash
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08WordFilter:
+    """Тестирование фильтра зарезервированных и запрещённых слов"""
+
+    def test_01_01_automaton_finds_substrings(self):
+        matcher = AhoCorasick(["he", "she", "his", "hers"])
+
+        assert matcher.search("uShErs") == "she", (
+            "Автомат не находит слово словаря без учёта регистра."
+        )
+        assert matcher.search("ahishers") == "his"
+        assert matcher.search("xxhxx") is None, (
+            "Автомат нашёл слово в тексте без слов словаря."
+        )
+
+    def test_01_02_reserved_words_match_whole_code(self):
+        codes_filter = ShortCodeWordFilter(reserved=["admin"], blocked=["bad"])
+
+        assert not codes_filter.is_allowed("AdMin"), (
+            "Зарезервированное слово должно запрещать код целиком."
+        )
+        assert codes_filter.is_allowed("admins"), (
+            "Зарезервированное слово не должно запрещать коды, "
+            "в которых оно встречается подстрокой."
+        )
+        assert codes_filter.blocked_word("xxBaDxx") == "bad"
+
+    def test_01_03_generator_skips_blocked_codes(self):
+        generator = LinkHash(code_filter=lambda code: "0" not in code)
+
+        codes = [generator.get_short_code() for _ in range(100)]
+        codes += generator.get_short_codes(1_000)
+        assert all("0" not in code for code in codes), (
+            "Генератор выдал код, отклонённый фильтром."
+        )
+
+    def test_02_01_blocked_alias_rejected(
+        self, client, tmp_path, original_link_with_alias, monkeypatch
+    ):
+        monkeypatch.setattr(word_filter, "_word_filter", None)
+        words_path = tmp_path / "blocked.txt"
+        words_path.write_text("# запрещённые слова\nr0ll\n", encoding="utf-8")
+
+        with override_settings(
+            SHORT_LINKS={"SHORT_CODE_BLOCKED_WORDS_PATH": str(words_path)}
+        ):
+            response = client.post("/api/links/", data=original_link_with_alias)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                "POST-запрос с alias, содержащим запрещённое слово, "
+                "не возвращает ответ со статусом 400.\n"
+                f"Детали: {response.data}"
+            )
+
+            data = {**original_link_with_alias, "alias": "Admin"}
+            response = client.post("/api/links/", data=data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                "POST-запрос с зарезервированным alias не возвращает "
+                "ответ со статусом 400.\n"
+                f"Детали: {response.data}"
+            )
+
+        assert not ShortLink.objects.exists()
+
+    def test_03_01_bad_words_path_fails_on_ready(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(word_filter, "_word_filter", None)
+
+        with override_settings(
+            SHORT_LINKS={
+                "SHORT_CODE_BLOCKED_WORDS_PATH": str(tmp_path / "missing.txt")
+            }
+        ):
+            with pytest.raises(FileNotFoundError):
+                apps.get_app_config("links").ready()
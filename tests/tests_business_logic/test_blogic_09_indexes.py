@@ -0,0 +1,50 @@
+import pytest
+
+from links.models import ShortLink, UserGroup
+from tests import utils
+
+
+# Сортировки ShortLinkViewSet.ordering_fields и индекс для каждой
+# (original_link не индексируется)
+LINK_ORDERINGS = {
+    "created_at": "link_owner_created_idx",
+    "-created_at": "link_owner_created_idx",
+    "clicks_count": "link_owner_clicks_idx",
+    "-clicks_count": "link_owner_clicks_idx",
+    "last_clicked_at": "link_owner_last_clicked_idx",
+    "-last_clicked_at": "link_owner_last_clicked_idx",
+    "group": "link_owner_group_created_idx",
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09Indexes:
+    """Тестирование индексов списка ссылок и групп пользователя"""
+
+    @pytest.mark.parametrize("ordering", list(LINK_ORDERINGS))
+    def test_01_01_links_ordering_uses_index(self, user, ordering):
+        links = (
+            ShortLink.objects.select_related("owner", "group__owner")
+            .filter(owner=user)
+            .order_by(ordering)
+        )
+
+        utils.assert_index_scan(links, LINK_ORDERINGS[ordering])
+
+    def test_01_02_links_of_group_use_index(self, user):
+        links = (
+            ShortLink.objects.select_related("owner", "group__owner")
+            .filter(owner=user, group=1)
+            .order_by("-created_at")
+        )
+
+        utils.assert_index_scan(links, "link_owner_group_created_idx")
+
+    def test_02_01_groups_ordering_uses_index(self, user):
+        groups = (
+            UserGroup.objects.select_related("owner")
+            .filter(owner=user)
+            .order_by("-created_at")
+        )
+
+        utils.assert_index_scan(groups, "group_owner_created_idx")
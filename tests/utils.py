@@ -2,6 +2,7 @@ from csv import reader
 from http import HTTPStatus
 from pathlib import Path
 
+from django.db import connection, transaction
 from django.conf import settings
 
 
@@ -153,3 +154,32 @@ def count_colors_from_csv() -> int:
             total += 1
 
         return total - 1
+
+
+def get_query_plan(queryset) -> str:
+    """EXPLAIN запроса. На PostgreSQL без последовательного чтения,
+    иначе для маленькой тестовой таблицы индекс не выбирается"""
+    # SET LOCAL действует до конца транзакции и не меняет соединение
+    # для следующих тестов
+    with transaction.atomic():
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+        return queryset.explain()
+
+
+def assert_index_scan(queryset, index_name: str):
+    """Запрос читает индекс index_name без отдельной сортировки"""
+    plan = get_query_plan(queryset)
+    sorted_in_memory = (
+        "TEMP B-TREE" in plan
+        if connection.vendor == "sqlite"
+        else "Sort" in plan
+    )
+
+    assert index_name in plan and not sorted_in_memory, (
+        f"Запрос не использует индекс {index_name} для сортировки.\n"
+        f"Запрос: {queryset.query}\n"
+        f"Детали: {plan}"
+    )